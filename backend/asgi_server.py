@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""Asyncio (ASGI) server that runs the Lambda functions with concurrent I/O
+
+Same routes and handlers as dev_server.py, but requests don't serialize on I/O:
+
+- get_retirement_data reads through an async DynamoDB client (aiobotocore), running the
+  create-user check and the data fetch concurrently, then projects the data in a worker
+  pool (ASGI_WORKER_POOL=process, or thread) so the event loop never stalls on numpy.
+- The other handlers, whose boto3 calls block, run on a pool of ASGI_IO_THREADS threads.
+
+With STORAGE_BACKEND=sqlite the reads also go through the thread pool.
+
+    uvicorn asgi_server:app --app-dir backend --port 5000
+    python backend/asgi_server.py
+
+For production, run it under gunicorn with gunicorn.conf.py.
+"""
+
+import asyncio
+import base64
+import importlib.util
+import logging
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qsl, unquote
+
+# Add layers to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'layers', 'shared', 'python'))
+
+# Default to DynamoDB Local, like dev_server.py
+os.environ.setdefault('DYNAMODB_ENDPOINT_URL', 'http://localhost:8000')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from db import storage
+from services.materialization import enqueue_materialization
+from utils.response import error_response
+
+logger = logging.getLogger(__name__)
+
+# Pool running the CPU-bound projection work: 'process' sidesteps the GIL, 'thread' avoids
+# copying the data to another process (better for small portfolios)
+WORKER_POOL_PROCESS = 'process'
+WORKER_POOL_THREAD = 'thread'
+ASGI_WORKER_POOL = os.environ.get('ASGI_WORKER_POOL', WORKER_POOL_PROCESS)
+ASGI_WORKERS = int(os.environ.get('ASGI_WORKERS', os.cpu_count() or 1))
+
+# Threads running the handlers that make blocking calls
+ASGI_IO_THREADS = int(os.environ.get('ASGI_IO_THREADS', 32))
+
+# Handler modules by function directory, loaded once per process
+_modules = {}
+
+def load_module(function_name):
+    module = _modules.get(function_name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(
+            f"{function_name}_handler",
+            os.path.join(os.path.dirname(__file__), 'functions', function_name, 'handler.py')
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[function_name] = module
+    return module
+
+def _warm_worker():
+    # Import the handler (and numpy) before the first request reaches the worker
+    load_module('get-retirement-data')
+
+def _build_retirement_response(event, user_id, retirement_data, options):
+    """Run the CPU-bound part of get-retirement-data (in the worker pool)"""
+    return load_module('get-retirement-data').build_response(event, user_id, retirement_data, options)
+
+class ServerState:
+    # Pools and clients of one server process, created at lifespan startup
+    def __init__(self):
+        self.io_pool = None
+        self.worker_pool = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.io_pool = ThreadPoolExecutor(max_workers=ASGI_IO_THREADS, thread_name_prefix='asgi-io')
+        if ASGI_WORKER_POOL == WORKER_POOL_PROCESS:
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+            self.worker_pool = ProcessPoolExecutor(max_workers=ASGI_WORKERS, mp_context=context)
+        else:
+            self.worker_pool = ThreadPoolExecutor(max_workers=ASGI_WORKERS, thread_name_prefix='asgi-worker')
+
+        await asyncio.gather(*(loop.run_in_executor(self.worker_pool, _warm_worker) for _ in range(ASGI_WORKERS)))
+        await loop.run_in_executor(self.io_pool, storage.db_create_tables_if_not_exist)
+        if storage.STORAGE_BACKEND == storage.STORAGE_DYNAMODB:
+            from db import dynamodb_async
+            await dynamodb_async.db_async_get_client()
+
+    async def stop(self):
+        if storage.STORAGE_BACKEND == storage.STORAGE_DYNAMODB:
+            from db import dynamodb_async
+            await dynamodb_async.db_async_close_client()
+        self.worker_pool.shutdown(wait=True)
+        self.io_pool.shutdown(wait=True)
+
+state = ServerState()
+
+async def run_io(function, *args):
+    """Run a blocking call on the I/O thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(state.io_pool, function, *args)
+
+async def create_user_if_not_exists(user_id):
+    if storage.STORAGE_BACKEND == storage.STORAGE_DYNAMODB:
+        from db import dynamodb_async
+        return await dynamodb_async.db_async_create_user_if_not_exists(user_id)
+    return await run_io(storage.db_create_user_if_not_exists, user_id)
+
+async def get_retirement_data(user_id):
+    if storage.STORAGE_BACKEND == storage.STORAGE_DYNAMODB:
+        from db import dynamodb_async
+        return await dynamodb_async.db_async_get_retirement_data(user_id)
+    return await run_io(storage.db_get_retirement_data, user_id)
+
+async def get_retirement_data_route(event):
+    """get-retirement-data with async reads and the projection in the worker pool"""
+    try:
+        user_id = event['pathParameters']['user_id']
+        if not user_id or user_id.strip() == "":
+            return error_response(400, "user_id not provided")
+
+        options, error = load_module('get-retirement-data').parse_request(event)
+        if error:
+            return error
+
+        # The create-user check and the read are independent
+        _, retirement_data = await asyncio.gather(create_user_if_not_exists(user_id), get_retirement_data(user_id))
+
+        # A current materialized projection is served as stored, without the worker pool
+        response, stale = load_module('get-retirement-data').materialized_response(event, retirement_data, options)
+        if response:
+            return response
+
+        loop = asyncio.get_running_loop()
+        if stale:
+            # Queued without waiting, the projection below doesn't depend on it
+            loop.run_in_executor(state.io_pool, enqueue_materialization, user_id)
+        return await loop.run_in_executor(
+            state.worker_pool, _build_retirement_response, event, user_id, retirement_data, options
+        )
+    except Exception as e:
+        logger.error(f"Error processing retirement data: {str(e)}", exc_info=True)
+        return error_response(500, f"An error occurred: {str(e)}")
+
+def handler_route(function_name):
+    """Route running a function's lambda_handler on the I/O thread pool"""
+    async def route(event):
+        return await run_io(load_module(function_name).lambda_handler, event, {})
+    return route
+
+# (method, path template, route)
+ROUTES = [
+    ('GET', '/api/health', handler_route('health')),
+    ('GET', '/api/get_retirement_data/{user_id}', get_retirement_data_route),
+    ('POST', '/api/update_family_info/{user_id}', handler_route('update-family-info')),
+    ('POST', '/api/update_retirement_data/{user_id}', handler_route('update-retirement-data')),
+    ('POST', '/api/update_retirement_data/{user_id}/funds/{fund_id}', handler_route('update-retirement-fund-data')),
+    ('POST', '/api/import_actual_data/{user_id}/funds/{fund_id}', handler_route('import-actual-data')),
+    ('POST', '/api/goal_seek/{user_id}', handler_route('goal-seek')),
+]
+COMPILED_ROUTES = [
+    (method, re.compile('^' + re.sub(r'\{(\w+)\}', r'(?P<\1>[^/]+)', path) + '$'), route)
+    for method, path, route in ROUTES
+]
+
+# Every function the routes run, loaded up front by preload()
+FUNCTION_NAMES = (
+    'health', 'options', 'get-retirement-data', 'update-family-info', 'update-retirement-data',
+    'update-retirement-fund-data', 'import-actual-data', 'goal-seek',
+)
+
+def preload():
+    """
+    Import every handler and the storage backend's client libraries
+
+    Runs when this module is imported, so a preloading server (gunicorn.conf.py) does it
+    once in the master and its workers fork with everything already imported.
+    """
+    for function_name in FUNCTION_NAMES:
+        load_module(function_name)
+    if storage.STORAGE_BACKEND == storage.STORAGE_DYNAMODB:
+        importlib.import_module('db.dynamodb_async')
+
+preload()
+
+def match_route(method, path):
+    """
+    Find the route of a request
+
+    Returns:
+        tuple: (route, path parameters), route is None if nothing matches
+    """
+    for route_method, pattern, route in COMPILED_ROUTES:
+        match = pattern.match(path)
+        if match and route_method == method:
+            return route, {name: unquote(value) for name, value in match.groupdict().items()}
+    return None, None
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+def build_event(scope, body, path_parameters):
+    """Build a Lambda proxy event from an ASGI request, like dev_server.py"""
+    event = {
+        'pathParameters': path_parameters,
+        'body': None,
+        'isBase64Encoded': False,
+        'queryStringParameters': dict(parse_qsl(scope.get('query_string', b'').decode('latin-1'))) or None,
+        'httpMethod': scope['method'],
+        'headers': {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+    }
+    if body:
+        try:
+            event['body'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            event['body'] = base64.b64encode(body).decode('ascii')
+            event['isBase64Encoded'] = True
+    return event
+
+async def send_response(send, response):
+    body = response.get('body') or ''
+    body = base64.b64decode(body) if response.get('isBase64Encoded') else body.encode('utf-8')
+    headers = [(name.encode('latin-1'), str(value).encode('latin-1')) for name, value in (response.get('headers') or {}).items()]
+    headers.append((b'content-length', str(len(body)).encode('ascii')))
+    await send({'type': 'http.response.start', 'status': response['statusCode'], 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await state.start()
+            except Exception as e:
+                logger.error(f"Server startup failed: {str(e)}", exc_info=True)
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await state.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    """ASGI application"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    body = await read_body(receive)
+    if scope['method'] == 'OPTIONS':
+        response = load_module('options').lambda_handler(build_event(scope, body, {}), {})
+    else:
+        route, path_parameters = match_route(scope['method'], scope['path'])
+        if route is None:
+            response = error_response(404, "Not found")
+        else:
+            response = await route(build_event(scope, body, path_parameters))
+    await send_response(send, response)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=5000)
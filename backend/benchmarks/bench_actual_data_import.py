@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Measure parse time and peak memory of the actual_data import on multi-MB uploads
+
+Builds a daily CSV statement and an OFX transaction list covering --years years and
+parses each with services.actual_data_import. Peak memory (tracemalloc, excluding the
+upload itself) stays flat as the upload grows, since only per-year totals are kept:
+
+    python benchmarks/bench_actual_data_import.py --years 40
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+# Add layers to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'shared', 'python'))
+
+from services.actual_data_import import parse_actual_data_import
+
+def make_csv(years, rows_per_day):
+    lines = ['Date,Balance,Contributions,Growth']
+    day = date(2000, 1, 1)
+    balance = 1000.0
+    while day.year < 2000 + years:
+        for _ in range(rows_per_day):
+            balance += 12.5
+            lines.append(f'{day.isoformat()},"${balance:,.2f}",10.00,2.50')
+        day += timedelta(days=1)
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+def make_ofx(years, rows_per_day):
+    parts = ['OFXHEADER:100\n<OFX><BANKTRANLIST>\n']
+    day = date(2000, 1, 1)
+    while day.year < 2000 + years:
+        stamp = day.strftime('%Y%m%d')
+        for _ in range(rows_per_day):
+            parts.append(f'<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>{stamp}120000<TRNAMT>10.00</STMTTRN>\n')
+        if day.month == 12 and day.day == 31:
+            parts.append(f'<LEDGERBAL><BALAMT>{day.year * 10.0}<DTASOF>{stamp}</LEDGERBAL>\n')
+        day += timedelta(days=1)
+    parts.append('</BANKTRANLIST></OFX>\n')
+    return ''.join(parts).encode('utf-8')
+
+def measure(name, body):
+    start = time.perf_counter()
+    actual_data, num_records = parse_actual_data_import(body)
+    elapsed = time.perf_counter() - start
+
+    # Separate pass, tracemalloc slows parsing down several times
+    tracemalloc.start()
+    parse_actual_data_import(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<6} {len(body) / 1e6:7.1f} MB  {num_records:>9} records  {len(actual_data):>3} years  "
+          f"{elapsed * 1000:9.1f} ms  peak {peak / 1024:8.1f} KB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=40)
+    args = parser.parse_args()
+
+    for rows_per_day in (1, 4, 16):
+        measure('csv', make_csv(args.years, rows_per_day))
+    for rows_per_day in (1, 4, 16):
+        measure('ofx', make_ofx(args.years, rows_per_day))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Microbenchmark the Decimal (boto3 resource) and native DynamoDB codecs
+
+Decodes and encodes a synthetic 50-fund x 60-year retirement document both ways and
+projects it from each decoded form. No database needed:
+
+    python benchmarks/bench_codec.py --funds 50 --years 60
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+# Add layers to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'shared', 'python'))
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from services.retirement_calculator import calculate_retirement_projection
+from utils.codec import decode_item, encode_item
+from utils.converter import convert_floats_to_decimals
+
+def make_document(funds, years, seed=0):
+    rng = random.Random(seed)
+    return {
+        'user_id': 'bench-codec',
+        'family_info_data': [
+            {'id': 'member-0', 'name': 'A', 'date_of_birth': '1975-06-01', 'retirement_age': 65, 'life_expectancy': 90},
+        ],
+        'retirement_fund_data': [
+            {
+                'id': f'fund-{i}',
+                'name': f'Fund {i}',
+                'family_member_id': 'member-0',
+                'initial_investment': round(rng.uniform(0, 100000), 2),
+                'regular_contribution': round(rng.uniform(0, 1000), 2),
+                'contribution_frequency': 12,
+                'start_date': '2000-01-01',
+                'return_rate_params': [{'from_age': 20, 'to_age': 60, 'return_rate': 6.5}, {'from_age': 61, 'to_age': 90, 'return_rate': 4.0}],
+                'contribution_params': [{'from_age': 20, 'to_age': 50, 'contribution_amount': 250.5, 'contribution_frequency': 26}],
+                'actual_data': [
+                    {'year': 2000 + y, 'actual_balance': round(rng.uniform(0, 500000), 2),
+                     'actual_contributions': round(rng.uniform(0, 10000), 2), 'actual_growth': round(rng.uniform(-5000, 30000), 2)}
+                    for y in range(years)
+                ],
+            }
+            for i in range(funds)
+        ],
+    }
+
+def measure(name, func, repeat):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"{name:<40} {best * 1000:9.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funds', type=int, default=50)
+    parser.add_argument('--years', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    document = make_document(args.funds, args.years)
+    serializer = TypeSerializer()
+    deserializer = TypeDeserializer()
+    wire_item = encode_item(document)
+
+    def decimal_decode():
+        return {key: deserializer.deserialize(value) for key, value in wire_item.items()}
+
+    def decimal_encode():
+        return {key: serializer.serialize(value) for key, value in convert_floats_to_decimals(document).items()}
+
+    measure('decode: boto3 resource (Decimal)', decimal_decode, args.repeat)
+    measure('decode: native codec', lambda: decode_item(wire_item), args.repeat)
+    measure('encode: convert_floats_to_decimals + boto3', decimal_encode, args.repeat)
+    measure('encode: native codec', lambda: encode_item(document), args.repeat)
+    measure('decode + project: Decimal', lambda: calculate_retirement_projection(*[decimal_decode()] * 2), args.repeat)
+    measure('decode + project: native', lambda: calculate_retirement_projection(*[decode_item(wire_item)] * 2), args.repeat)
+
+if __name__ == '__main__':
+    main()
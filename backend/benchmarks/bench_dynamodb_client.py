@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Benchmark per-request DynamoDB latency with fresh vs pooled resource handles
+
+Runs against DynamoDB Local (docker run -p 8000:8000 amazon/dynamodb-local):
+
+    python benchmarks/bench_dynamodb_client.py --requests 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add layers to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'shared', 'python'))
+
+os.environ.setdefault('DYNAMODB_ENDPOINT_URL', 'http://localhost:8000')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from db import dynamodb
+
+BENCH_USER_ID = 'bench-dynamodb-client'
+
+def simulate_request(table_factory):
+    """Do the DynamoDB calls of one get-retirement-data request"""
+    table_factory(dynamodb.USERS_TABLE).get_item(Key={'user_id': BENCH_USER_ID})
+    table_factory(dynamodb.RETIREMENT_DATA_TABLE).get_item(Key={'user_id': BENCH_USER_ID})
+
+def fresh_table(table_name):
+    # Baseline: a brand-new resource (session, credentials, connection pool) per call
+    return dynamodb.db_create_dynamodb_client().Table(table_name)
+
+def time_requests(table_factory, requests):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        simulate_request(table_factory)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<8} mean {statistics.mean(latencies):7.2f} ms   p50 {statistics.median(latencies):7.2f} ms   p99 {p99:7.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    dynamodb.db_create_tables_if_not_exist()
+    dynamodb.db_create_user_if_not_exists(BENCH_USER_ID)
+
+    # Warm up both paths so imports and the first connection are not measured
+    time_requests(fresh_table, 5)
+    time_requests(dynamodb.db_get_table, 5)
+
+    report('fresh', time_requests(fresh_table, args.requests))
+    report('pooled', time_requests(dynamodb.db_get_table, args.requests))
+
+if __name__ == '__main__':
+    main()
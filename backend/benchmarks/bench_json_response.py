@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Compare the old and new JSON response pipelines on large retirement_fund_data payloads
+
+The old pipeline is json.dumps(default=str) in the handler followed by json.loads and
+jsonify in the dev server; the new one is a single utils.response.json_response. The
+payload is a projected document with Decimal inputs, as read through the boto3 resource:
+
+    python benchmarks/bench_json_response.py --funds 200
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+# Add layers to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'shared', 'python'))
+
+from flask import Flask, jsonify
+
+from services.projection_result import RESULT_COLUMNS, projection_json_default
+from services.retirement_calculator import calculate_retirement_projection
+from utils.converter import convert_floats_to_decimals
+from utils.response import json_response, json_loads
+
+def make_document(funds, seed=0):
+    rng = random.Random(seed)
+    return convert_floats_to_decimals({
+        'family_info_data': [
+            {'id': 'member-0', 'name': 'A', 'date_of_birth': '1985-06-01', 'retirement_age': 65, 'life_expectancy': 95},
+        ],
+        'retirement_fund_data': [
+            {
+                'id': f'fund-{i}',
+                'name': f'Fund {i}',
+                'family_member_id': 'member-0',
+                'initial_investment': round(rng.uniform(0, 100000), 2),
+                'regular_contribution': round(rng.uniform(0, 1000), 2),
+                'contribution_frequency': 12,
+                'start_date': '2010-01-01',
+                'return_rate_params': [{'from_age': 18, 'to_age': 60, 'return_rate': 6.5}, {'from_age': 61, 'to_age': 95, 'return_rate': 4.0}],
+                'contribution_params': [{'from_age': 18, 'to_age': 50, 'contribution_amount': 250.5, 'contribution_frequency': 26}],
+                'actual_data': [
+                    {'year': 2010 + y, 'actual_balance': round(rng.uniform(0, 500000), 2),
+                     'actual_contributions': round(rng.uniform(0, 10000), 2), 'actual_growth': round(rng.uniform(-5000, 30000), 2)}
+                    for y in range(10)
+                ],
+            }
+            for i in range(funds)
+        ],
+    })
+
+def measure(name, func, repeat):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"{name:<44} {best * 1000:9.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funds', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    rows_document = make_document(args.funds)
+    calculate_retirement_projection(rows_document, rows_document)
+    columns_document = make_document(args.funds)
+    calculate_retirement_projection(columns_document, columns_document, result_format=RESULT_COLUMNS)
+
+    def old_pipeline():
+        body = json.dumps(rows_document, default=str)
+        with app.app_context():
+            return jsonify(json.loads(body)).get_data()
+
+    body = json_response(200, rows_document)['body']
+    print(f"payload: {args.funds} funds, {len(body) / 1024:.0f} KB")
+    measure('rows: json.dumps(default=str)', lambda: json.dumps(rows_document, default=str), args.repeat)
+    measure('rows: json.dumps + dev server loads/jsonify', old_pipeline, args.repeat)
+    measure('rows: json_response', lambda: json_response(200, rows_document), args.repeat)
+    measure('columns: json.dumps(default)', lambda: json.dumps(columns_document, default=projection_json_default), args.repeat)
+    measure('columns: json_response', lambda: json_response(200, columns_document, default=projection_json_default), args.repeat)
+    measure('request: json.loads', lambda: json.loads(body), args.repeat)
+    measure('request: json_loads', lambda: json_loads(body), args.repeat)
+
+if __name__ == '__main__':
+    main()
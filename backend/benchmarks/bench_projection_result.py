@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Compare peak memory and serialization time of row and columnar projection results
+
+Projects a synthetic portfolio of many funds over a long horizon in both result
+formats, then measures tracemalloc peak while building the result and json.dumps
+time of the response body. No database needed:
+
+    python benchmarks/bench_projection_result.py --funds 500
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+# Add layers to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'shared', 'python'))
+
+from services.projection_result import RESULT_ROWS, RESULT_COLUMNS, projection_json_default
+from services.retirement_calculator import calculate_retirement_projection
+
+def make_document(funds, seed=0):
+    rng = random.Random(seed)
+    return {
+        'family_info_data': [
+            {'id': 'member-0', 'name': 'A', 'date_of_birth': '1995-06-01', 'retirement_age': 67, 'life_expectancy': 100},
+        ],
+        'retirement_fund_data': [
+            {
+                'id': f'fund-{i}',
+                'name': f'Fund {i}',
+                'family_member_id': 'member-0',
+                'initial_investment': round(rng.uniform(0, 100000), 2),
+                'regular_contribution': round(rng.uniform(0, 1000), 2),
+                'contribution_frequency': 12,
+                'start_date': '2015-01-01',
+                'return_rate_params': [{'from_age': 18, 'to_age': 60, 'return_rate': 6.5}, {'from_age': 61, 'to_age': 100, 'return_rate': 4.0}],
+                'contribution_params': [{'from_age': 18, 'to_age': 50, 'contribution_amount': 250.5, 'contribution_frequency': 26}],
+                'actual_data': [],
+            }
+            for i in range(funds)
+        ],
+    }
+
+def project(document, result_format):
+    document = copy.deepcopy(document)
+    calculate_retirement_projection(document, document, result_format=result_format)
+    return document
+
+def peak_memory(document, result_format):
+    document = copy.deepcopy(document)
+    tracemalloc.start()
+    calculate_retirement_projection(document, document, result_format=result_format)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funds', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    document = make_document(args.funds)
+    print(f"{'format':<10} {'peak MB':>10} {'project ms':>12} {'dumps ms':>10} {'body KB':>10}")
+    for result_format in (RESULT_ROWS, RESULT_COLUMNS):
+        peak = peak_memory(document, result_format)
+        project_time = min(timeit.repeat(lambda: project(document, result_format), number=1, repeat=args.repeat))
+        projected = project(document, result_format)
+        dumps_time = min(timeit.repeat(lambda: json.dumps(projected, default=projection_json_default), number=1, repeat=args.repeat))
+        body_size = len(json.dumps(projected, default=projection_json_default))
+        print(f"{result_format:<10} {peak / 1e6:10.1f} {project_time * 1000:12.1f} {dumps_time * 1000:10.1f} {body_size / 1024:10.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Benchmark cold and warm get-retirement-data latency with and without the bootstrap memo
+
+Runs the handler in-process against DynamoDB Local (docker run -p 8000:8000 amazon/dynamodb-local).
+"Unmemoized" forgets the verified tables and known users before every request, which
+is what every request paid before the bootstrap state was cached per process:
+
+    python benchmarks/bench_request_bootstrap.py --requests 200
+"""
+
+import time
+
+# Taken before any other import so cold starts include module loading
+_PROCESS_START = time.perf_counter()
+
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+
+# Add layers to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'shared', 'python'))
+
+os.environ.setdefault('DYNAMODB_ENDPOINT_URL', 'http://localhost:8000')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+BENCH_USER_ID = 'bench-request-bootstrap'
+
+def load_handler(function_name):
+    spec = importlib.util.spec_from_file_location(
+        f"{function_name}_handler",
+        os.path.join(os.path.dirname(__file__), '..', 'functions', function_name, 'handler.py')
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.lambda_handler
+
+def get_event():
+    return {'pathParameters': {'user_id': BENCH_USER_ID}, 'queryStringParameters': None}
+
+def cold_start():
+    """Time imports plus the first request in a fresh interpreter, like a Lambda cold start"""
+    output = subprocess.run(
+        [sys.executable, __file__, '--single-request'],
+        check=True, capture_output=True, text=True
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+def time_requests(handler, requests, memoized):
+    from db import dynamodb
+    latencies = []
+    for _ in range(requests):
+        if not memoized:
+            dynamodb.db_reset_bootstrap_state()
+        start = time.perf_counter()
+        handler(get_event(), {})
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<18} mean {statistics.mean(latencies):7.2f} ms   p50 {statistics.median(latencies):7.2f} ms   p99 {p99:7.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--cold-starts', type=int, default=5)
+    parser.add_argument('--single-request', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    handler = load_handler('get-retirement-data')
+    if args.single_request:
+        time_requests(handler, 1, True)
+        print((time.perf_counter() - _PROCESS_START) * 1000)
+        return
+
+    # Seed the user and tables once so both variants measure the steady state
+    handler(get_event(), {})
+
+    report('cold start', [cold_start() for _ in range(args.cold_starts)])
+    report('warm unmemoized', time_requests(handler, args.requests, False))
+    report('warm memoized', time_requests(handler, args.requests, True))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Load test a running server: throughput and latency percentiles under concurrent GETs
+
+Start the server under test, then point this at it, e.g. dev_server.py (Flask) against
+asgi_server.py (uvicorn) at the same concurrency:
+
+    python dev_server.py &
+    python benchmarks/bench_server_throughput.py --url http://localhost:5000 --concurrency 32
+    uvicorn asgi_server:app --port 5001 &
+    python benchmarks/bench_server_throughput.py --url http://localhost:5001 --concurrency 32
+
+Each client thread keeps its connection alive and cycles through --users user ids. Send
+the server a SIGHUP during a run to check that a graceful reload drops no requests.
+"""
+
+import argparse
+import collections
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+def run_client(url, path_template, users, deadline, latencies, errors, offset):
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    i = offset
+    while time.perf_counter() < deadline:
+        path = path_template.format(user_id=f'bench-user-{i % users}')
+        i += 1
+        start = time.perf_counter()
+        # Like browsers and urllib3, retry once when a kept-alive connection turns out to
+        # have been closed by the server (e.g. a worker replaced during a graceful reload)
+        for attempt in range(2):
+            reused = connection.sock is not None
+            try:
+                connection.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+                response = connection.getresponse()
+                response.read()
+            except (ConnectionResetError, http.client.RemoteDisconnected, BrokenPipeError) as e:
+                connection.close()
+                if reused and attempt == 0:
+                    continue
+                errors.append(str(e))
+                break
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                errors.append(str(e))
+                break
+            if response.status >= 500:
+                errors.append(response.status)
+            else:
+                latencies.append(time.perf_counter() - start)
+            break
+    connection.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--path', default='/api/get_retirement_data/{user_id}')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    args = parser.parse_args()
+
+    # Warm up the server (imports, connection pools, worker processes) without measuring
+    run_client(args.url, args.path, args.users, time.perf_counter() + args.warmup, [], [], 0)
+
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=run_client, args=(args.url, args.path, args.users, deadline, latencies, errors, i))
+        for i in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        print(f"No successful requests ({len(errors)} errors)")
+        return
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{args.url}  concurrency {args.concurrency}")
+    print(f"requests {len(latencies)}  errors {len(errors)}  throughput {len(latencies) / elapsed:8.1f} req/s")
+    for error, count in collections.Counter(errors).most_common(3):
+        print(f"  {count} x {error}")
+    print(f"latency p50 {quantiles[49] * 1000:8.1f} ms  p90 {quantiles[89] * 1000:8.1f} ms  p99 {quantiles[98] * 1000:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
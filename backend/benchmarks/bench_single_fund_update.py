@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Benchmark single-fund update latency and consumed capacity as fund count grows
+
+Compares the previous read-then-write-by-index update of the retirement_fund_data list
+with db_update_single_fund's single conditional write to the id-keyed fund map.
+Runs against DynamoDB Local (docker run -p 8000:8000 amazon/dynamodb-local):
+
+    python benchmarks/bench_single_fund_update.py --fund-counts 1 10 50 200 --updates 50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+
+# Add layers to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'shared', 'python'))
+
+os.environ.setdefault('DYNAMODB_ENDPOINT_URL', 'http://localhost:8000')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from db import dynamodb
+
+class CapacityTrackingTable:
+    # Table wrapper that asks for and sums the consumed capacity of every call
+    def __init__(self, table):
+        self.table = table
+        self.capacity_units = 0.0
+
+    def __getattr__(self, name):
+        method = getattr(self.table, name)
+        def call(**kwargs):
+            response = method(ReturnConsumedCapacity='TOTAL', **kwargs)
+            self.capacity_units += response.get('ConsumedCapacity', {}).get('CapacityUnits', 0.0)
+            return response
+        return call
+
+def make_funds(fund_count):
+    return [
+        {
+            'id': f'fund-{i}',
+            'name': f'Fund {i}',
+            'family_member_id': 'member-0',
+            'initial_investment': Decimal(10000),
+            'regular_contribution': Decimal(500),
+            'contribution_frequency': Decimal(12),
+            'return_rate_params': [{'from_age': Decimal(20), 'to_age': Decimal(65), 'return_rate': Decimal('6.5')}],
+            'actual_data': [
+                {'year': Decimal(year), 'actual_balance': Decimal('12345.67'),
+                 'actual_contributions': Decimal(6000), 'actual_growth': Decimal('789.01')}
+                for year in range(2010, 2025)
+            ],
+        }
+        for i in range(fund_count)
+    ]
+
+def legacy_update_single_fund(table, user_id, fund_id, fund_data):
+    """The previous implementation: read the whole list, then write the fund by index"""
+    response = table.get_item(Key={'user_id': user_id}, ProjectionExpression='retirement_fund_data')
+    funds = response['Item']['retirement_fund_data']
+    fund_index = next(i for i, fund in enumerate(funds) if fund.get('id') == fund_id)
+    table.update_item(
+        Key={'user_id': user_id},
+        UpdateExpression=f'SET retirement_fund_data[{fund_index}] = :fund_data, updated_at = :updated',
+        ExpressionAttributeValues={
+            ':fund_data': {**funds[fund_index], **fund_data},
+            ':updated': datetime.now().isoformat()
+        }
+    )
+
+def time_updates(update, updates):
+    latencies = []
+    for i in range(updates):
+        start = time.perf_counter()
+        update(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fund-counts', type=int, nargs='+', default=[1, 10, 50, 200])
+    parser.add_argument('--updates', type=int, default=50)
+    args = parser.parse_args()
+
+    dynamodb.db_create_tables_if_not_exist()
+    table = dynamodb.db_get_table(dynamodb.RETIREMENT_DATA_TABLE)
+
+    print(f"{'funds':>6} {'variant':<8} {'mean ms':>9} {'p50 ms':>9} {'capacity/update':>16}")
+    for fund_count in args.fund_counts:
+        funds = make_funds(fund_count)
+        fund_id = funds[-1]['id']
+        legacy_user = f'bench-legacy-{fund_count}'
+        pooled_user = f'bench-single-fund-{fund_count}'
+        table.put_item(Item={'user_id': legacy_user, 'retirement_fund_data': funds})
+        dynamodb.db_update_retirement_fund_data(pooled_user, funds)
+
+        tracked = CapacityTrackingTable(table)
+        latencies = time_updates(
+            lambda i: legacy_update_single_fund(tracked, legacy_user, fund_id, {'name': f'Fund {i}'}), args.updates
+        )
+        print(f"{fund_count:>6} {'legacy':<8} {statistics.mean(latencies):>9.2f} {statistics.median(latencies):>9.2f} "
+              f"{tracked.capacity_units / args.updates:>16.2f}")
+
+        tracked = CapacityTrackingTable(table)
+        db_get_table = dynamodb.db_get_table
+        dynamodb.db_get_table = lambda table_name: tracked
+        try:
+            latencies = time_updates(
+                lambda i: dynamodb.db_update_single_fund(pooled_user, fund_id, {'name': f'Fund {i}'}), args.updates
+            )
+        finally:
+            dynamodb.db_get_table = db_get_table
+        assert dynamodb.db_get_retirement_fund_data(pooled_user)[-1]['name'] == f'Fund {args.updates - 1}'
+        print(f"{fund_count:>6} {'single':<8} {statistics.mean(latencies):>9.2f} {statistics.median(latencies):>9.2f} "
+              f"{tracked.capacity_units / args.updates:>16.2f}")
+
+if __name__ == '__main__':
+    main()
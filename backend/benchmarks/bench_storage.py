@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Compare read + projection latency of get_retirement_data across storage backends
+
+Writes one user with --funds funds through each backend and times db_get_retirement_data
+followed by calculate_retirement_projection. The in-memory SQLite backend runs
+in-process with no network or disk I/O, so projection benchmarks aren't drowned in noise:
+
+    python benchmarks/bench_storage.py --funds 50 --backends sqlite-memory sqlite-file dynamodb
+
+The dynamodb backend needs DynamoDB Local (DYNAMODB_ENDPOINT_URL, default localhost:8000).
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+# Add layers to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'shared', 'python'))
+
+os.environ.setdefault('DYNAMODB_ENDPOINT_URL', 'http://localhost:8000')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from db import storage
+from services.retirement_calculator import calculate_retirement_projection
+
+BENCH_USER_ID = 'bench-storage-user'
+
+def make_funds(fund_count):
+    return [
+        {
+            'id': f'fund-{i}',
+            'name': f'Fund {i}',
+            'family_member_id': 'member-0',
+            'initial_investment': 10000.0,
+            'regular_contribution': 500.0,
+            'contribution_frequency': 12,
+            'start_date': '2010-01-01',
+            'return_rate_params': [{'from_age': 20, 'to_age': 65, 'return_rate': 6.5}],
+            'actual_data': [
+                {'year': year, 'actual_balance': 12345.67, 'actual_contributions': 6000.0, 'actual_growth': 789.01}
+                for year in range(2010, 2025)
+            ],
+        }
+        for i in range(fund_count)
+    ]
+
+def create_backend(name, directory):
+    if name == 'sqlite-memory':
+        from db.sqlite import SQLiteStorage
+        return SQLiteStorage(':memory:')
+    if name == 'sqlite-file':
+        from db.sqlite import SQLiteStorage
+        return SQLiteStorage(os.path.join(directory, 'bench.sqlite3'))
+    from db.dynamodb import DynamoDBStorage
+    return DynamoDBStorage()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funds', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--backends', nargs='+', default=['sqlite-memory', 'sqlite-file'],
+                        choices=['sqlite-memory', 'sqlite-file', 'dynamodb'])
+    args = parser.parse_args()
+
+    family_info_data = [{'id': 'member-0', 'name': 'A', 'date_of_birth': '1985-06-01', 'retirement_age': 65, 'life_expectancy': 95}]
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.backends:
+            storage.db_set_storage(create_backend(name, directory))
+            storage.db_create_tables_if_not_exist()
+            storage.db_update_family_info(BENCH_USER_ID, family_info_data)
+            storage.db_update_retirement_fund_data(BENCH_USER_ID, make_funds(args.funds))
+
+            def read():
+                return storage.db_get_retirement_data(BENCH_USER_ID)
+
+            def read_and_project():
+                document = read()
+                return calculate_retirement_projection(document, document)
+
+            read_time = min(timeit.repeat(read, number=1, repeat=args.repeat))
+            total_time = min(timeit.repeat(read_and_project, number=1, repeat=args.repeat))
+            print(f"{name:<14} read {read_time * 1000:8.2f} ms   read + projection {total_time * 1000:8.2f} ms")
+    storage.db_set_storage(None)
+
+if __name__ == '__main__':
+    main()
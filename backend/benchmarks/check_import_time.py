@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Check the import time of each Lambda function against a budget
+
+Imports every handler in a fresh interpreter under `python -X importtime` and fails
+(exit 1) when a function's import time goes over its budget or it imports a module it
+must load lazily (boto3 before the storage backend is created, numpy in functions that
+never project). tests/test_import_time.py runs the same checks under pytest; run this
+script for the per-module breakdown:
+
+    python benchmarks/check_import_time.py
+    python benchmarks/check_import_time.py --runs 9 --scale 2 --top 15
+
+Budgets are milliseconds on a developer machine; --scale multiplies them for slower hosts.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+LAYER_DIR = os.path.join(BACKEND_DIR, 'layers', 'shared', 'python')
+
+# Function -> (import budget in ms, modules its import must not load)
+FUNCTION_BUDGETS = {
+    'health': (40, ('numpy', 'boto3', 'botocore')),
+    'options': (5, ('numpy', 'boto3', 'botocore', 'orjson')),
+    'update-family-info': (60, ('numpy', 'boto3', 'botocore')),
+    'update-retirement-data': (60, ('numpy', 'boto3', 'botocore')),
+    'update-retirement-fund-data': (60, ('numpy', 'boto3', 'botocore')),
+    'import-actual-data': (250, ('boto3', 'botocore')),
+    'get-retirement-data': (250, ('boto3', 'botocore')),
+    'materialize-projections': (60, ('numpy', 'boto3', 'botocore')),
+    'goal-seek': (250, ('boto3', 'botocore')),
+}
+
+# Written to stderr right before the handler import, so interpreter startup isn't counted
+MARKER = '--- handler import ---'
+
+LOAD_HANDLER = '''
+import importlib.util, sys
+sys.path.insert(0, {layer_dir!r})
+sys.stderr.write({marker!r} + "\\n")
+spec = importlib.util.spec_from_file_location("handler", {path!r})
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+'''
+
+def parse_importtime(stderr):
+    """
+    Parse -X importtime output after MARKER
+
+    Returns:
+        list: (module, self us, cumulative us, depth) in import order
+    """
+    lines = stderr.split(MARKER, 1)[-1].splitlines()
+    imports = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+def measure_function(function_name):
+    """
+    Import one function's handler in a fresh interpreter
+
+    Returns:
+        tuple: (import time in ms, parsed imports)
+    """
+    path = os.path.join(BACKEND_DIR, 'functions', function_name, 'handler.py')
+    # Outside Lambda, so the storage clients aren't created at import (STORAGE_INIT_CLIENTS)
+    env = {k: v for k, v in os.environ.items() if k not in ('AWS_LAMBDA_FUNCTION_NAME', 'STORAGE_INIT_CLIENTS')}
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', LOAD_HANDLER.format(layer_dir=LAYER_DIR, marker=MARKER, path=path)],
+        check=True, capture_output=True, text=True, env=env
+    )
+    imports = parse_importtime(output.stderr)
+    total_us = sum(cumulative_us for _, _, cumulative_us, depth in imports if depth == 0)
+    return total_us / 1000, imports
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='imports per function, the median is checked')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every budget')
+    parser.add_argument('--top', type=int, default=0, help='list the N slowest modules of each function')
+    parser.add_argument('--functions', nargs='+', default=list(FUNCTION_BUDGETS), choices=list(FUNCTION_BUDGETS))
+    args = parser.parse_args()
+
+    failures = []
+    for function_name in args.functions:
+        budget_ms, forbidden = FUNCTION_BUDGETS[function_name]
+        budget_ms *= args.scale
+        runs = [measure_function(function_name) for _ in range(args.runs)]
+        import_ms = statistics.median(total for total, _ in runs)
+        imports = runs[-1][1]
+        imported = {name for name, _, _, _ in imports}
+
+        status = 'ok' if import_ms <= budget_ms else 'OVER BUDGET'
+        print(f"{function_name:<28} {import_ms:8.1f} ms  (budget {budget_ms:.0f} ms)  {status}")
+        if import_ms > budget_ms:
+            failures.append(f"{function_name} imports in {import_ms:.1f} ms, budget {budget_ms:.0f} ms")
+        for module in forbidden:
+            if module in imported:
+                failures.append(f"{function_name} imports {module}, which it must load lazily")
+
+        for name, self_us, cumulative_us, depth in sorted(imports, key=lambda i: i[2], reverse=True)[:args.top]:
+            print(f"    {cumulative_us / 1000:8.1f} ms  {'  ' * depth}{name}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
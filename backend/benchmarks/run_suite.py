@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Run the benchmark suite over synthetic households and check for regressions
+
+Times projection, validation, encode/decode and the get/update handler paths for a set
+of seeded households (synthetic.py) of different sizes, contribution frequencies,
+band counts and actual_data histories. The handlers run in-process against an
+in-memory SQLite backend, so the results measure CPU work, not the network.
+
+Results are written as JSON; pass a previous run as --baseline to fail (exit 1) when any
+benchmark got more than --threshold slower:
+
+    python benchmarks/run_suite.py --output main.json
+    python benchmarks/run_suite.py --output branch.json --baseline main.json --threshold 0.10
+"""
+
+import argparse
+import copy
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timezone
+
+# Add layers to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'shared', 'python'))
+
+import numpy
+
+from db import storage
+from db.sqlite import SQLiteStorage
+from models.family_info_data import FamilyInfoData
+from models.retirement_fund_data import RetirementFundData
+from services.materialization import materialize_user
+from services.projection_cache import projection_cache
+from services.projection_result import RESULT_ROWS, RESULT_COLUMNS
+from services.retirement_calculator import calculate_retirement_projection
+from utils.codec import decode_item, encode_item
+from utils.converter import convert_floats_to_decimals
+from utils.response import json_dumps, json_response
+
+from synthetic import make_household
+
+# Households by case name, as make_household arguments (seed 0 unless given)
+CASES = {
+    'single-fund': {'members': 1, 'funds': 1, 'horizon': 40},
+    'typical': {'members': 2, 'funds': 4, 'horizon': 60},
+    'large': {'members': 4, 'funds': 20, 'horizon': 80, 'return_bands': 6, 'contribution_bands': 4, 'actual_years': 20},
+    'no-history': {'members': 2, 'funds': 4, 'horizon': 60, 'actual_years': 0},
+    'many-bands': {'members': 2, 'funds': 4, 'horizon': 60, 'return_bands': 20, 'contribution_bands': 20},
+    'annual': {'members': 2, 'funds': 4, 'horizon': 60, 'contribution_frequency': 1},
+    'bi-weekly': {'members': 2, 'funds': 4, 'horizon': 60, 'contribution_frequency': 26},
+    'weekly': {'members': 2, 'funds': 4, 'horizon': 60, 'contribution_frequency': 52},
+    'daily': {'members': 2, 'funds': 4, 'horizon': 60, 'contribution_frequency': 365},
+}
+
+def load_handler(function_name):
+    spec = importlib.util.spec_from_file_location(
+        f"{function_name}_handler",
+        os.path.join(os.path.dirname(__file__), '..', 'functions', function_name, 'handler.py')
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.lambda_handler
+
+def measure(func, repeat, setup=None):
+    """Time func repeat times (after an untimed setup call each time), returns min/median in milliseconds"""
+    times = timeit.repeat(func, setup=setup or 'pass', number=1, repeat=repeat)
+    return {'min_ms': min(times) * 1000, 'median_ms': statistics.median(times) * 1000, 'repeat': repeat}
+
+def case_benchmarks(household, get_handler, update_handler):
+    """Benchmarks of one household as (name, function) pairs"""
+    user_id = household['user_id']
+    family_info_data = household['family_info_data']
+    retirement_fund_data = household['retirement_fund_data']
+    fund_request = {'retirement_fund_data': retirement_fund_data}
+    family_request = {'family_info_data': family_info_data}
+
+    projected = copy.deepcopy(household)
+    calculate_retirement_projection(projected, projected)
+    fund = retirement_fund_data[0] if retirement_fund_data else {}
+    encoded_fund = encode_item(fund)
+
+    update_event = {'pathParameters': {'user_id': user_id}, 'body': json_dumps(fund_request)}
+    get_event = {'pathParameters': {'user_id': user_id}, 'queryStringParameters': None}
+    gzip_get_event = {**get_event, 'headers': {'Accept-Encoding': 'gzip'}}
+
+    def get_cold():
+        projection_cache.clear()
+        return get_handler(get_event, {})
+
+    return [
+        ('projection.rows', lambda: calculate_retirement_projection(projected, projected, result_format=RESULT_ROWS)),
+        ('projection.columns', lambda: calculate_retirement_projection(projected, projected, result_format=RESULT_COLUMNS)),
+        ('validate.funds', lambda: RetirementFundData(fund_request).validate()),
+        ('validate.family', lambda: FamilyInfoData(family_request).validate()),
+        ('codec.to_decimals', lambda: convert_floats_to_decimals(retirement_fund_data)),
+        ('codec.encode_fund', lambda: encode_item(fund)),
+        ('codec.decode_fund', lambda: decode_item(encoded_fund)),
+        ('codec.json_response', lambda: json_response(200, projected)),
+        ('handler.update', lambda: update_handler(update_event, {})),
+        ('handler.get_cold', get_cold),
+        ('handler.get_warm', lambda: get_handler(get_event, {})),
+        ('handler.get_materialized', lambda: get_handler(gzip_get_event, {}), lambda: materialize_user(user_id)),
+    ]
+
+def git_commit():
+    try:
+        output = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                check=True, capture_output=True, text=True)
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline run
+
+    Args:
+        results (dict): Results by benchmark name
+        baseline (dict): Results of the baseline run
+        threshold (float): Allowed slowdown of min_ms, e.g. 0.1 for 10%
+    Returns:
+        list: (name, baseline ms, current ms) of every regressed benchmark
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous and result['min_ms'] > previous['min_ms'] * (1 + threshold):
+            regressions.append((name, previous['min_ms'], result['min_ms']))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='benchmark-results.json', help='results file')
+    parser.add_argument('--baseline', help='results file of a previous run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed slowdown, 0.10 = 10%%')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    storage.db_set_storage(SQLiteStorage(':memory:'))
+    storage.db_create_tables_if_not_exist()
+    get_handler = load_handler('get-retirement-data')
+    update_handler = load_handler('update-retirement-data')
+
+    # Households are generated relative to today, like the projection (which uses today's ages)
+    results = {}
+    for case, params in CASES.items():
+        household = make_household(seed=args.seed, **params)
+        household['user_id'] = f"{household['user_id']}-{case}"
+        storage.db_update_family_info(household['user_id'], household['family_info_data'])
+        storage.db_update_retirement_fund_data(household['user_id'], household['retirement_fund_data'])
+
+        for name, func, *setup in case_benchmarks(household, get_handler, update_handler):
+            name = f'{case}/{name}'
+            if args.filter not in name:
+                continue
+            results[name] = measure(func, args.repeat, *setup)
+            print(f"{name:<36} {results[name]['min_ms']:10.3f} ms")
+    storage.db_set_storage(None)
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'git_commit': git_commit(),
+                'python': platform.python_version(),
+                'numpy': numpy.__version__,
+                'platform': platform.platform(),
+                'seed': args.seed,
+            },
+            'results': results,
+        }, f, indent=2, sort_keys=True)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for name, previous, current in regressions:
+            print(f"REGRESSION {name}: {previous:.3f} ms -> {current:.3f} ms (+{(current / previous - 1) * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Seeded synthetic households for the benchmarks
+
+make_household builds a retirement document (family_info_data + retirement_fund_data) in
+the shape the API receives it: plain ints and floats, valid for FamilyInfoData and
+RetirementFundData. The same arguments and seed always give the same household for a
+given current year.
+"""
+
+import random
+from datetime import datetime
+
+# Contribution frequencies the calculator supports: annual, monthly, bi-weekly, weekly, daily
+CONTRIBUTION_FREQUENCIES = (1, 12, 26, 52, 365)
+
+# Age range the generated bands cover
+BAND_MIN_AGE = 18
+BAND_MAX_AGE = 100
+
+def _split_ages(rng, count):
+    """Split BAND_MIN_AGE..BAND_MAX_AGE into count contiguous (from_age, to_age) bands"""
+    if count <= 0:
+        return []
+    cuts = sorted(rng.sample(range(BAND_MIN_AGE + 1, BAND_MAX_AGE), count - 1))
+    starts = [BAND_MIN_AGE] + cuts
+    ends = [cut - 1 for cut in cuts] + [BAND_MAX_AGE]
+    return list(zip(starts, ends))
+
+def make_household(seed=0, members=2, funds=4, horizon=60, contribution_frequency=12,
+                   return_bands=2, contribution_bands=1, actual_years=10, now=None):
+    """
+    Build a synthetic household
+
+    Args:
+        seed (int): Random seed
+        members (int): Family members
+        funds (int): Funds, assigned to the members in turn
+        horizon (int): Projected years, from the funds' start to 5 years after the last retirement
+        contribution_frequency (int): Contributions per year of every fund and contribution band
+        return_bands (int): Return rate bands per fund
+        contribution_bands (int): Contribution bands per fund
+        actual_years (int): Years of actual_data per fund, ending last year (funds start then)
+        now (datetime): Reference date (optional, defaults to now)
+
+    Returns:
+        dict: Retirement document with user_id, family_info_data and retirement_fund_data
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    # The projection runs from the funds' start to 5 years after the latest retirement
+    years_to_retirement = max(1, horizon - actual_years - 5)
+
+    family_info_data = []
+    for i in range(members):
+        retirement_age = rng.randint(55, 70)
+        # The first member retires last and sets the horizon, the others retire up to 10 years earlier
+        member_years_to_retirement = years_to_retirement if i == 0 else max(1, years_to_retirement - rng.randint(0, 10))
+        age = max(0, retirement_age - member_years_to_retirement)
+        family_info_data.append({
+            'id': f'member-{i}',
+            'name': f'Member {i}',
+            'date_of_birth': f'{now.year - age}-01-01',
+            'retirement_age': retirement_age,
+            'life_expectancy': rng.randint(80, 100),
+        })
+
+    start_year = now.year - actual_years
+    retirement_fund_data = []
+    for i in range(funds):
+        balance = round(rng.uniform(0, 200000), 2)
+        actual_data = []
+        for year in range(start_year, now.year):
+            contributions = round(rng.uniform(0, 20000), 2)
+            growth = round(balance * rng.uniform(-0.15, 0.2), 2)
+            balance = max(0.0, round(balance + contributions + growth, 2))
+            actual_data.append({
+                'year': year, 'actual_balance': balance,
+                'actual_contributions': contributions, 'actual_growth': growth,
+            })
+
+        retirement_fund_data.append({
+            'id': f'fund-{i}',
+            'name': f'Fund {i}',
+            'family_member_id': family_info_data[i % members]['id'] if members else 'member-0',
+            'initial_investment': round(rng.uniform(0, 100000), 2),
+            'regular_contribution': round(rng.uniform(0, 2000), 2),
+            'contribution_frequency': contribution_frequency,
+            'start_date': f'{start_year}-01-01',
+            'return_rate_params': [
+                {'from_age': from_age, 'to_age': to_age, 'return_rate': round(rng.uniform(2, 10), 2)}
+                for from_age, to_age in _split_ages(rng, return_bands)
+            ],
+            'contribution_params': [
+                {'from_age': from_age, 'to_age': to_age, 'contribution_amount': round(rng.uniform(0, 2000), 2),
+                 'contribution_frequency': contribution_frequency}
+                for from_age, to_age in _split_ages(rng, contribution_bands)
+            ],
+            'actual_data': actual_data,
+        })
+
+    return {
+        'user_id': f'synthetic-{seed}',
+        'family_info_data': family_info_data,
+        'retirement_fund_data': retirement_fund_data,
+    }
@@ -1,10 +1,16 @@
 #!/usr/bin/env python3
 """Fast development server that wraps Lambda functions"""
 
+import base64
+import cProfile
+import io
+import pstats
 import sys
 import os
-import json
-from flask import Flask, request, jsonify
+import tempfile
+import time
+import tracemalloc
+from flask import Flask, Response, request
 from flask_cors import CORS
 
 # Add layers to Python path
@@ -26,16 +32,80 @@ def load_handler(function_name):
     spec.loader.exec_module(module)
     return module.lambda_handler
 
-# Load handlers
-health_handler = load_handler('health')
-update_family_handler = load_handler('update-family-info')
-get_retirement_handler = load_handler('get-retirement-data')
-update_retirement_handler = load_handler('update-retirement-data')
-update_retirement_fund_handler = load_handler('update-retirement-fund-data')
+def lazy_handler(function_name):
+    """Handler that loads its function on the first request, so startup doesn't import every function"""
+    handler = None
+    def run(event, context):
+        nonlocal handler
+        if handler is None:
+            handler = load_handler(function_name)
+        return handler(event, context)
+    return run
+
+# Handlers
+health_handler = lazy_handler('health')
+update_family_handler = lazy_handler('update-family-info')
+get_retirement_handler = lazy_handler('get-retirement-data')
+update_retirement_handler = lazy_handler('update-retirement-data')
+update_retirement_fund_handler = lazy_handler('update-retirement-fund-data')
+import_actual_data_handler = lazy_handler('import-actual-data')
+goal_seek_handler = lazy_handler('goal-seek')
 
 app = Flask(__name__)
 CORS(app)
 
+# Opt-in profiling of a single request, e.g. curl -H 'X-Profile: cpu,memory' ...
+# cpu runs the handler under cProfile, memory under tracemalloc (process-wide, so only
+# profile one request at a time). Reports go to the server log and .prof files to PROFILE_DIR.
+PROFILE_HEADER = 'X-Profile'
+PROFILE_CPU = 'cpu'
+PROFILE_MEMORY = 'memory'
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'retirement-portfolio-profiles'))
+PROFILE_TOP = 25
+
+def profile_handler(handler, event, modes):
+    """
+    Run a handler under cProfile and/or tracemalloc and log the report
+    
+    Args:
+        handler (callable): Lambda handler
+        event (dict): Lambda event
+        modes (set): PROFILE_CPU and/or PROFILE_MEMORY
+    Returns:
+        tuple: (Lambda response, profile headers to add to the response)
+    """
+    headers = {}
+    profiler = cProfile.Profile() if PROFILE_CPU in modes else None
+    if PROFILE_MEMORY in modes:
+        tracemalloc.start()
+    try:
+        if profiler:
+            profiler.enable()
+        response = handler(event, {})
+    finally:
+        if profiler:
+            profiler.disable()
+        if PROFILE_MEMORY in modes:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    
+    report = [f"Profile of {event['httpMethod']} {request.path}"]
+    if profiler:
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        report.append(stream.getvalue())
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profile_path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint}.prof")
+        profiler.dump_stats(profile_path)
+        headers['X-Profile-File'] = profile_path
+    if PROFILE_MEMORY in modes:
+        report.append(f"Peak traced memory: {peak / 1024:.1f} KiB, top allocations:")
+        report.extend(str(stat) for stat in snapshot.statistics('lineno')[:PROFILE_TOP])
+        headers['X-Profile-Peak-Memory'] = str(peak)
+    print('\n'.join(report), file=sys.stderr)
+    return response, headers
+
 def lambda_to_flask(handler):
     """Convert Lambda handler to Flask route"""
     def wrapper(*args, **kwargs):
@@ -43,15 +113,24 @@ def lambda_to_flask(handler):
         event = {
             'pathParameters': kwargs,
             'body': request.get_data(as_text=True) if request.data else None,
+            'isBase64Encoded': False,
+            'queryStringParameters': request.args.to_dict() or None,
             'httpMethod': request.method,
             'headers': dict(request.headers)
         }
         
-        # Call Lambda handler
-        response = handler(event, {})
+        # Call Lambda handler, profiled if the request asks for it
+        profile_modes = {mode.strip() for mode in request.headers.get(PROFILE_HEADER, '').lower().split(',') if mode.strip()}
+        if profile_modes & {PROFILE_CPU, PROFILE_MEMORY}:
+            response, profile_headers = profile_handler(handler, event, profile_modes)
+        else:
+            response, profile_headers = handler(event, {}), {}
         
-        # Return Flask response
-        return jsonify(json.loads(response['body'])), response['statusCode']
+        # Return the handler's body as is, it is already serialized (and possibly compressed)
+        body = response['body']
+        if response.get('isBase64Encoded'):
+            body = base64.b64decode(body)
+        return Response(body, status=response['statusCode'], headers={**(response.get('headers') or {}), **profile_headers})
     
     return wrapper
 
@@ -76,5 +155,13 @@ def update_retirement_data(user_id):
 def update_retirement_fund(user_id, fund_id):
     return lambda_to_flask(update_retirement_fund_handler)(user_id=user_id, fund_id=fund_id)
 
+@app.route('/api/import_actual_data/<user_id>/funds/<fund_id>', methods=['POST'])
+def import_actual_data(user_id, fund_id):
+    return lambda_to_flask(import_actual_data_handler)(user_id=user_id, fund_id=fund_id)
+
+@app.route('/api/goal_seek/<user_id>', methods=['POST'])
+def goal_seek(user_id):
+    return lambda_to_flask(goal_seek_handler)(user_id=user_id)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -1,12 +1,149 @@
-import json
 import logging
-from db.dynamodb import db_get_retirement_data, db_create_tables_if_not_exist, db_create_user_if_not_exists
-from services.retirement_calculator import calculate_retirement_projection
+from datetime import date
+from db.storage import db_initialize, db_get_retirement_data, db_create_tables_if_not_exist, db_create_user_if_not_exists, MATERIALIZED_PROJECTION_KEY
+from services.materialization import enqueue_materialization, is_fresh, projection_source_version
+from services.projection_cache import calculate_retirement_projection_cached
+from services.projection_result import RESULT_ROWS, RESULT_COLUMNS, projection_json_default
+from services.retirement_calculator import simulate_retirement_projection, MONTE_CARLO_PATHS, MONTE_CARLO_VOLATILITY, MONTE_CARLO_SEED
+from utils.validators import validate_numeric_range
+from utils.response import json_response, error_response, compress_response, etag_for, matching_etag, not_modified_response, precompressed_response
+from utils.metrics import instrument_handler
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Create the storage clients during the Lambda init phase, not in the first request
+db_initialize()
+
+def parse_request(event):
+    """
+    Read the projection options from the query string
+    
+    Args:
+        event (dict): Lambda proxy event
+    Returns:
+        tuple: (options, None), or (None, error response) if an option is invalid
+    """
+    # Optional Monte Carlo simulation, e.g. ?simulation=monte_carlo&paths=10000&volatility=0.15&seed=0
+    query_parameters = event.get('queryStringParameters') or {}
+    simulation = query_parameters.get('simulation')
+    if simulation and simulation != 'monte_carlo':
+        return None, error_response(400, "simulation must be monte_carlo")
+    
+    # Optional columnar projections (one list per field instead of one dict per year), e.g. ?format=columns
+    result_format = query_parameters.get('format', RESULT_ROWS)
+    if result_format not in (RESULT_ROWS, RESULT_COLUMNS):
+        return None, error_response(400, "format must be rows or columns")
+    
+    simulation_params = {
+        'paths': query_parameters.get('paths', MONTE_CARLO_PATHS),
+        'volatility': query_parameters.get('volatility', MONTE_CARLO_VOLATILITY),
+        'seed': query_parameters.get('seed', MONTE_CARLO_SEED),
+    }
+    for name, min_value, max_value in (('paths', 1, 100000), ('volatility', 0, 1), ('seed', 0, None)):
+        is_valid, error_message = validate_numeric_range(simulation_params[name], min_value, max_value, name)
+        if not is_valid:
+            return None, error_response(400, error_message)
+    
+    return {'simulation': simulation, 'result_format': result_format, 'simulation_params': simulation_params}, None
+
+def response_etag(source_version, options):
+    """
+    Entity tag of a GET response
+    
+    The response only depends on the stored inputs, the request options and the day
+    (ages in the projection are computed from today's date).
+    
+    Args:
+        source_version (str): projection_source_version of the stored data
+        options (dict): Options from parse_request
+    Returns:
+        str: Quoted entity tag
+    """
+    simulation = options['simulation']
+    return etag_for(source_version, date.today().isoformat(), options['result_format'], simulation and options['simulation_params'])
+
+def materialized_response(event, retirement_data, options):
+    """
+    Answer from the materialized projection stored with the data, without projecting
+    
+    Args:
+        event (dict): Lambda proxy event
+        retirement_data (dict): Stored retirement data, as returned by db_get_retirement_data
+        options (dict): Options from parse_request
+    Returns:
+        tuple: (response or None, stale), stale is True when the request could have been
+            answered by a materialized projection but there is no current one
+    """
+    if not retirement_data:
+        return None, False
+    
+    materialized = retirement_data.pop(MATERIALIZED_PROJECTION_KEY, None)
+    source_version = projection_source_version(retirement_data)
+    etag = response_etag(source_version, options)
+    matched_etag = matching_etag(event, etag)
+    if matched_etag:
+        return not_modified_response(matched_etag), False
+    
+    # The worker materializes the rows-format response without a simulation
+    if options['simulation'] or options['result_format'] != RESULT_ROWS:
+        return None, False
+    if is_fresh(materialized, source_version, date.today()):
+        # No body when the response is too large to store: project inline, without queueing
+        if materialized['body'] is None:
+            return None, False
+        return precompressed_response(event, materialized['body'], etag), False
+    return None, True
+
+def build_response(event, user_id, retirement_data, options):
+    """
+    Project the stored retirement data and build the response
+    
+    This is the CPU-bound part of the request, no I/O (the async server runs it in a worker pool).
+    
+    Args:
+        event (dict): Lambda proxy event
+        user_id (str): User ID
+        retirement_data (dict): Stored retirement data, as returned by db_get_retirement_data
+        options (dict): Options from parse_request
+    Returns:
+        dict: Lambda proxy response
+    """
+    if not retirement_data:
+        return error_response(404, "Retirement data not found")
+    
+    simulation = options['simulation']
+    result_format = options['result_format']
+    simulation_params = options['simulation_params']
+    
+    retirement_data.pop(MATERIALIZED_PROJECTION_KEY, None)
+    etag = response_etag(projection_source_version(retirement_data), options)
+    matched_etag = matching_etag(event, etag)
+    if matched_etag:
+        return not_modified_response(matched_etag)
+    
+    # Calculate retirement projection with both datasets
+    calculate_retirement_projection_cached(retirement_data, retirement_data, user_id=user_id, result_format=result_format)
+    
+    # Return the data structure
+    response_data = {
+        'retirement_fund_data': retirement_data.get('retirement_fund_data', []),
+        'family_info_data': retirement_data.get('family_info_data', [])
+    }
+    
+    if simulation:
+        response_data['retirement_simulation'] = simulate_retirement_projection(
+            retirement_data,
+            retirement_data,
+            num_paths=int(float(simulation_params['paths'])),
+            volatility=float(simulation_params['volatility']),
+            seed=int(float(simulation_params['seed']))
+        )
+    
+    return compress_response(event, json_response(200, response_data, default=projection_json_default, etag=etag))
+
+@instrument_handler('get-retirement-data')
 def lambda_handler(event, context):
     """Get retirement fund data for a user"""    
     try:
@@ -20,40 +157,21 @@ def lambda_handler(event, context):
         db_create_user_if_not_exists(user_id)
         
         if not user_id or user_id.strip() == "":
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({"message": "user_id not provided", "status": "error"})
-            }
+            return error_response(400, "user_id not provided")
         
-        # Get all retirement data (both fund and family info)
-        retirement_data = db_get_retirement_data(user_id)
-        if not retirement_data:
-            return {
-                'statusCode': 404,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({"message": "Retirement data not found", "status": "error"})
-            }
-        
-        # Calculate retirement projection with both datasets
-        calculate_retirement_projection(retirement_data, retirement_data)
+        options, error = parse_request(event)
+        if error:
+            return error
         
-        # Return the data structure
-        response_data = {
-            'retirement_fund_data': retirement_data.get('retirement_fund_data', []),
-            'family_info_data': retirement_data.get('family_info_data', [])
-        }
-        
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(response_data, default=str)
-        }
+        # Get all retirement data (both fund and family info) and its materialized projection
+        retirement_data = db_get_retirement_data(user_id)
+        response, stale = materialized_response(event, retirement_data, options)
+        if response:
+            return response
+        if stale:
+            enqueue_materialization(user_id)
+        return build_response(event, user_id, retirement_data, options)
         
     except Exception as e:
         logger.error(f"Error processing retirement data: {str(e)}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({"message": f"An error occurred: {str(e)}", "status": "error"})
-        }
\ No newline at end of file
+        return error_response(500, f"An error occurred: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,56 @@
+import json
+import logging
+from db.storage import db_initialize, db_get_retirement_data, db_create_tables_if_not_exist, db_create_user_if_not_exists, MATERIALIZED_PROJECTION_KEY
+from services.goal_seek import parse_goal_seek_request, solve_goal, GoalSeekError
+from utils.response import json_response, error_response, json_loads, get_request_body
+from utils.metrics import instrument_handler
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Create the storage clients during the Lambda init phase, not in the first request
+db_initialize()
+
+@instrument_handler('goal-seek')
+def lambda_handler(event, context):
+    """Find the contribution, retirement age or return that reaches a target balance at retirement"""
+    try:
+        # Ensure tables exist
+        db_create_tables_if_not_exist()
+        
+        # Get user_id from path parameters
+        user_id = event['pathParameters']['user_id']
+        
+        if not user_id or user_id.strip() == "":
+            return error_response(400, "user_id not provided")
+        
+        # Create user if they don't exist
+        db_create_user_if_not_exists(user_id)
+        
+        # Parse request body, e.g. {"solve_for": "contribution", "fund_id": "...", "target_balance": 1000000}
+        if not event.get('body'):
+            return error_response(400, "No data provided!")
+        try:
+            goal_request = parse_goal_seek_request(json_loads(get_request_body(event)))
+        except json.JSONDecodeError:
+            return error_response(400, "Invalid JSON in request body")
+        except GoalSeekError as e:
+            return error_response(400, str(e))
+        
+        retirement_data = db_get_retirement_data(user_id)
+        if not retirement_data:
+            return error_response(404, "Retirement data not found")
+        retirement_data.pop(MATERIALIZED_PROJECTION_KEY, None)
+        
+        # Solved against the stored data, nothing is written
+        try:
+            result = solve_goal(retirement_data, goal_request)
+        except GoalSeekError as e:
+            return error_response(400, str(e))
+        
+        return json_response(200, result)
+        
+    except Exception as e:
+        logger.error(f"Error solving goal: {str(e)}", exc_info=True)
+        return error_response(500, f"An error occurred: {str(e)}")
\ No newline at end of file
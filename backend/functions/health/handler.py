@@ -1,12 +1,7 @@
-import json
+from utils.response import json_response
+from utils.metrics import instrument_handler
 
+@instrument_handler('health')
 def lambda_handler(event, context):
     """Health check endpoint"""
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({"status": "healthy"})
-    }
\ No newline at end of file
+    return json_response(200, {"status": "healthy"})
\ No newline at end of file
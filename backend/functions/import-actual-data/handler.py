@@ -0,0 +1,90 @@
+import logging
+from db.storage import db_initialize, db_get_retirement_fund_data, db_update_single_fund, db_create_tables_if_not_exist, db_create_user_if_not_exists, FundVersionConflictError
+from models.retirement_fund_data import RetirementFundData
+from services.actual_data_import import parse_actual_data_import, merge_actual_data, ActualDataImportError, IMPORT_FORMAT_CSV, IMPORT_FORMAT_OFX
+from services.materialization import enqueue_materialization
+from utils.response import json_response, error_response, get_request_body, get_header
+from utils.metrics import instrument_handler
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Create the storage clients during the Lambda init phase, not in the first request
+db_initialize()
+
+@instrument_handler('import-actual-data')
+def lambda_handler(event, context):
+    """Import a CSV or OFX statement export into a fund's actual_data"""
+    try:
+        # Ensure tables exist
+        db_create_tables_if_not_exist()
+        
+        # Get user_id and fund_id from path parameters
+        user_id = event['pathParameters']['user_id']
+        fund_id = event['pathParameters']['fund_id']
+        
+        if not user_id or user_id.strip() == "":
+            return error_response(400, "user_id not provided")
+            
+        if not fund_id or fund_id.strip() == "":
+            return error_response(400, "fund_id not provided")
+        
+        # Create user if they don't exist
+        db_create_user_if_not_exists(user_id)
+        
+        import_format = (event.get('queryStringParameters') or {}).get('format')
+        if import_format not in (None, IMPORT_FORMAT_CSV, IMPORT_FORMAT_OFX):
+            return error_response(400, "format must be 'csv' or 'ofx'")
+        
+        body = get_request_body(event)
+        if not body:
+            return error_response(400, "No file in request body")
+        
+        # Stream-parse the upload; only the per-year totals are kept in memory
+        try:
+            imported_actual_data, num_records = parse_actual_data_import(
+                body, import_format, get_header(event, 'Content-Type')
+            )
+        except ActualDataImportError as e:
+            return error_response(400, str(e))
+        
+        if not imported_actual_data:
+            return error_response(400, "No records found in file")
+        
+        funds = db_get_retirement_fund_data(user_id) or []
+        fund = next((fund for fund in funds if fund.get('id') == fund_id), None)
+        if fund is None:
+            return error_response(404, "User or fund not found")
+        
+        # Imported years replace the stored ones, other years are kept
+        actual_data = merge_actual_data(fund.get('actual_data'), imported_actual_data)
+        
+        # Validate the fund as it will be stored, with the same rules as a regular update
+        fund_data = RetirementFundData({'retirement_fund_data': [{**fund, 'actual_data': actual_data}]})
+        is_valid, error_message = fund_data.validate()
+        if not is_valid:
+            return error_response(400, error_message)
+        
+        # One conditional write of the fund, so a concurrent edit isn't overwritten
+        try:
+            success = db_update_single_fund(user_id, fund_id, {'actual_data': actual_data}, expected_version=fund.get('version'))
+        except FundVersionConflictError:
+            return error_response(409, "Fund was modified by another request, try the import again")
+        
+        if not success:
+            return error_response(404, "User or fund not found")
+        
+        # Recompute the materialized projection in the background
+        enqueue_materialization(user_id)
+        
+        return json_response(200, {
+            "message": "Actual data imported successfully",
+            "status": "success",
+            "records": num_records,
+            "years": [entry['year'] for entry in imported_actual_data]
+        })
+        
+    except Exception as e:
+        logger.error(f"Error importing actual data: {str(e)}", exc_info=True)
+        return error_response(500, f"An error occurred: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,32 @@
+import logging
+from db.storage import db_initialize
+from services.materialization import materialize_user, materialize_all_users
+from utils.response import json_loads
+from utils.metrics import instrument_handler
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Create the storage clients during the Lambda init phase, not in the first request
+db_initialize()
+
+@instrument_handler('materialize-projections')
+def lambda_handler(event, context):
+    """Materialize projections: users queued on SQS after a write, or every user on the New Year schedule"""
+    # Scheduled (EventBridge) run: the year rolled over, so every stored projection is stale
+    if event.get('source') == 'aws.events':
+        count = materialize_all_users()
+        logger.info(f"Materialized projections of {count} users")
+        return {'materialized': count}
+    
+    # SQS batch: report only the failed messages, so the rest aren't retried
+    failures = []
+    for record in event.get('Records', []):
+        try:
+            materialize_user(json_loads(record['body'])['user_id'])
+        except Exception as e:
+            logger.error(f"Error materializing projection: {str(e)}", exc_info=True)
+            failures.append({'itemIdentifier': record['messageId']})
+    
+    return {'batchItemFailures': failures}
\ No newline at end of file
@@ -1,5 +1,3 @@
-import json
-
 def lambda_handler(event, context):
     """Handle CORS preflight OPTIONS requests"""
     return {
@@ -1,12 +1,18 @@
-import json
 import logging
-from db.dynamodb import db_update_retirement_fund_data, db_create_tables_if_not_exist, db_create_user_if_not_exists
+from db.storage import db_initialize, db_update_retirement_fund_data, db_create_tables_if_not_exist, db_create_user_if_not_exists
+from services.materialization import enqueue_materialization
 from models.retirement_fund_data import RetirementFundData
+from utils.response import json_response, error_response, json_loads, get_request_body
+from utils.metrics import instrument_handler
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Create the storage clients during the Lambda init phase, not in the first request
+db_initialize()
+
+@instrument_handler('update-retirement-data')
 def lambda_handler(event, context):
     """Update retirement fund data for a user"""
     try:
@@ -20,32 +26,20 @@ def lambda_handler(event, context):
         db_create_user_if_not_exists(user_id)
         
         if not user_id or user_id.strip() == "":
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({"message": "user_id parameter is required", "status": "error"})
-            }
+            return error_response(400, "user_id parameter is required")
         
         # Get JSON data from request body
         if not event.get('body'):
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({"message": "No data provided!", "status": "error"})
-            }
+            return error_response(400, "No data provided!")
         
-        input_data = json.loads(event['body'])
+        input_data = json_loads(get_request_body(event))
         
         # Create and validate input model
         retirement_fund_info_data = RetirementFundData(input_data)
         is_valid, error_message = retirement_fund_info_data.validate()
         
         if not is_valid:
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({"message": error_message, "status": "error"})
-            }
+            return error_response(400, error_message)
         
         # Get validated input data
         validated_input = retirement_fund_info_data.to_dict()
@@ -57,16 +51,12 @@ def lambda_handler(event, context):
         
         success = db_update_retirement_fund_data(user_id, validated_input['retirement_fund_data'])
         
-        return {
-            'statusCode': 200 if success else 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({"status": "success" if success else "error"})
-        }
+        # Recompute the materialized projection in the background
+        if success:
+            enqueue_materialization(user_id)
+        
+        return json_response(200 if success else 500, {"status": "success" if success else "error"})
         
     except Exception as e:
         logger.error(f"Error updating retirement data: {str(e)}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({"message": f"An error occurred: {str(e)}", "status": "error"})
-        }
\ No newline at end of file
+        return error_response(500, f"An error occurred: {str(e)}")
\ No newline at end of file
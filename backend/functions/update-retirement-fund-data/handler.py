@@ -1,12 +1,18 @@
 import json
 import logging
-from db.dynamodb import db_get_family_info, db_update_single_fund, db_create_tables_if_not_exist, db_create_user_if_not_exists
-from services.retirement_calculator import calculate_retirement_projection
+from db.storage import db_initialize, db_get_family_info, db_update_single_fund, db_create_tables_if_not_exist, db_create_user_if_not_exists, FundVersionConflictError
+from services.materialization import enqueue_materialization
+from utils.response import json_response, error_response, json_loads, get_request_body
+from utils.metrics import instrument_handler
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Create the storage clients during the Lambda init phase, not in the first request
+db_initialize()
+
+@instrument_handler('update-retirement-fund-data')
 def lambda_handler(event, context):
     """Update a specific retirement fund for a user"""
     try:
@@ -21,48 +27,36 @@ def lambda_handler(event, context):
         db_create_user_if_not_exists(user_id)
         
         if not user_id or user_id.strip() == "":
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({"message": "user_id not provided", "status": "error"})
-            }
+            return error_response(400, "user_id not provided")
             
         if not fund_id or fund_id.strip() == "":
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({"message": "fund_id not provided", "status": "error"})
-            }
+            return error_response(400, "fund_id not provided")
         
-        # Parse request body
+        # Parse request body, the fields to change, e.g. {"regular_contribution": 600, "version": 3}
+        if not event.get('body'):
+            return error_response(400, "No data provided!")
         try:
-            fund_data = json.loads(event['body'])
+            fund_data = json_loads(get_request_body(event))
         except json.JSONDecodeError:
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({"message": "Invalid JSON in request body", "status": "error"})
-            }
+            return error_response(400, "Invalid JSON in request body")
+        if not isinstance(fund_data, dict):
+            return error_response(400, "Request body must be a JSON object")
+        
+        # Update specific fund directly in database. A fund version sent by the client
+        # (as returned by get-retirement-data) must still match the stored one.
+        try:
+            success = db_update_single_fund(user_id, fund_id, fund_data, expected_version=fund_data.get('version'))
+        except FundVersionConflictError:
+            return error_response(409, "Fund was modified by another request, reload and try again")
         
-        # Update specific fund directly in database
-        success = db_update_single_fund(user_id, fund_id, fund_data)
         if not success:
-            return {
-                'statusCode': 404,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({"message": "User or fund not found", "status": "error"})
-            }        
+            return error_response(404, "User or fund not found")        
+        
+        # Recompute the materialized projection in the background
+        enqueue_materialization(user_id)
         
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({"message": "Fund updated successfully", "status": "success"})
-        }
+        return json_response(200, {"message": "Fund updated successfully", "status": "success"})
         
     except Exception as e:
         logger.error(f"Error updating retirement fund: {str(e)}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({"message": f"An error occurred: {str(e)}", "status": "error"})
-        }
\ No newline at end of file
+        return error_response(500, f"An error occurred: {str(e)}")
\ No newline at end of file
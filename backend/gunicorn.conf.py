@@ -0,0 +1,55 @@
+# Gunicorn settings of the production server: uvicorn workers running asgi_server:app
+#
+#     cd backend && gunicorn -c gunicorn.conf.py
+#
+# The app is preloaded in the master (handlers, numpy, boto3 imported once), then each
+# worker creates its own connection and worker pools at lifespan startup.
+#
+# Reloading: kill -HUP <master> replaces the workers gracefully with the new settings, but
+# not new code, since it was preloaded. To deploy code without dropping requests, start a
+# new master with kill -USR2 <master>, then stop the old one's workers with kill -WINCH
+# and the old master with kill -QUIT once the new workers are serving.
+import multiprocessing
+import os
+
+wsgi_app = 'asgi_server:app'
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+
+# One event loop per core by default
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'uvicorn.workers.UvicornWorker'
+preload_app = True
+
+# Requests in flight get graceful_timeout seconds to finish on reload or shutdown
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', 30))
+timeout = int(os.environ.get('WORKER_TIMEOUT', 60))
+keepalive = int(os.environ.get('KEEPALIVE', 5))
+
+# Optionally recycle workers after some requests; jitter keeps them from restarting together
+max_requests = int(os.environ.get('MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('MAX_REQUESTS_JITTER', 0))
+
+# Worker heartbeats in memory, so a slow disk can't get workers killed
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = os.environ.get('ACCESS_LOG')
+errorlog = '-'
+
+# Production talks to DynamoDB itself unless an endpoint is set (asgi_server.py defaults to DynamoDB Local)
+os.environ.setdefault('DYNAMODB_ENDPOINT_URL', '')
+
+# Split the cores between the workers' projection pools
+os.environ.setdefault('ASGI_WORKERS', str(max(1, multiprocessing.cpu_count() // workers)))
+
+def post_fork(server, worker):
+    # Nothing opened before the fork may be shared: each worker gets its own backend,
+    # boto3 clients and (at lifespan startup) connection and worker pools
+    import sys
+    from db import storage
+    storage.db_set_storage(None)
+    if 'db.dynamodb' in sys.modules:
+        sys.modules['db.dynamodb'].db_reset_clients()
+        sys.modules['db.dynamodb'].db_reset_bootstrap_state()
+    if 'db.dynamodb_async' in sys.modules:
+        sys.modules['db.dynamodb_async']._clients.clear()
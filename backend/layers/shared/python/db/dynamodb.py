@@ -2,11 +2,17 @@
 
 import os
 import boto3
+import threading
+import time
 import uuid
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from datetime import datetime
 from decimal import Decimal
 import json
 
+from db.storage import FundVersionConflictError, StorageBackend, MATERIALIZED_PROJECTION_KEY
+from utils.codec import decode_item, encode_item
 from utils.converter import convert_floats_to_decimals
 
 # Get DynamoDB configuration from environment variables
@@ -16,41 +22,197 @@ AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
 AWS_SESSION_TOKEN = os.environ.get('AWS_SESSION_TOKEN')
 
+# HTTP connection pool settings for the DynamoDB client
+DYNAMODB_MAX_POOL_CONNECTIONS = int(os.environ.get('DYNAMODB_MAX_POOL_CONNECTIONS', 10))
+DYNAMODB_TCP_KEEPALIVE = os.environ.get('DYNAMODB_TCP_KEEPALIVE', 'true').lower() == 'true'
+
+# Value codec: 'decimal' reads and writes through boto3's resource layer (Decimal values),
+# 'native' goes through the low-level client and decodes numbers straight to int/float.
+# Every retirement data read and write, in either layout, goes through the configured codec
+# (_db_get_item, _db_get_items, _db_update_item, _db_put_item, _db_paginate, _db_write_batch,
+# _db_transact_write); the users table holds only strings and stays on the resource.
+CODEC_DECIMAL = 'decimal'
+CODEC_NATIVE = 'native'
+DYNAMODB_CODEC = os.environ.get('DYNAMODB_CODEC', CODEC_DECIMAL)
+
 # Table names
 USERS_TABLE = 'users'
 RETIREMENT_DATA_TABLE = 'retirement_data'
+RETIREMENT_ITEMS_TABLE = 'retirement_items'
+# Materialized projections of the document layout, one item per user kept off the
+# RETIREMENT_DATA_TABLE item so it stays far under the 400 KB item limit and its reads and
+# writes don't pay capacity for the projection
+RETIREMENT_PROJECTIONS_TABLE = 'retirement_projections'
+
+# Storage layout of retirement data: one document per user in RETIREMENT_DATA_TABLE, or
+# per-fund items under a sort key in RETIREMENT_ITEMS_TABLE (see the items layout section)
+LAYOUT_DOCUMENT = 'document'
+LAYOUT_ITEMS = 'items'
+RETIREMENT_DATA_LAYOUT = os.environ.get('RETIREMENT_DATA_LAYOUT', LAYOUT_DOCUMENT)
+
+# Fund keys that db_update_single_fund never writes from a patch, and that are not compared
+# when a full fund list write decides which funds changed
+FUND_UPDATE_EXCLUDED_KEYS = ('id', 'version', 'retirement_projection', 'retirement_simulation')
+
+# Attempts of a full fund list write in the document layout before giving up on concurrent writers
+FUND_LIST_WRITE_ATTEMPTS = 3
+
+# BatchWriteItem limit, and attempts at the unprocessed items of one batch (native codec)
+BATCH_WRITE_MAX_ITEMS = 25
+BATCH_WRITE_MAX_ATTEMPTS = 8
+
+# Attempts at the unprocessed keys of a BatchGetItem
+BATCH_GET_MAX_ATTEMPTS = 8
+
+# TransactWriteItems limit on the actions of one transaction
+TRANSACT_WRITE_MAX_ITEMS = 100
+
+# Pooled resource and table handles, reused across warm Lambda invocations.
+# boto3 resources are not thread-safe, so each thread (dev server) gets its own.
+_registry = threading.local()
+
+# Per-process bootstrap state, so warm invocations skip the table check and known users
+_bootstrap_lock = threading.Lock()
+_tables_verified = False
+_known_users = set()
+KNOWN_USERS_MAX = 10000
 
 # Initialize DynamoDB client
-def db_get_dynamodb_client():
-    """Get DynamoDB client based on environment"""
+def _dynamodb_connection_args():
+    """Connection arguments for DynamoDB resources and clients based on environment"""
+    config = Config(
+        max_pool_connections=DYNAMODB_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=DYNAMODB_TCP_KEEPALIVE
+    )
+    
+    # Check if we're running locally (DynamoDB Local)
+    endpoint_url = os.environ.get('DYNAMODB_ENDPOINT_URL')
+    if endpoint_url:
+        # print(f"Connecting to DynamoDB Local at: {endpoint_url}")
+        return {
+            'endpoint_url': endpoint_url,
+            'region_name': 'us-east-1',
+            'aws_access_key_id': 'dummy',
+            'aws_secret_access_key': 'dummy',
+            'config': config
+        }
+    else:  # AWS environment
+        return {'region_name': AWS_REGION, 'config': config}
+
+def db_create_dynamodb_client():
+    """Create a new DynamoDB resource based on environment"""
     try:        
-        # Check if we're running locally (DynamoDB Local)
-        endpoint_url = os.environ.get('DYNAMODB_ENDPOINT_URL')
-        if endpoint_url:
-            # print(f"Connecting to DynamoDB Local at: {endpoint_url}")
-            return boto3.resource(
-                'dynamodb',
-                endpoint_url=endpoint_url,
-                region_name='us-east-1',
-                aws_access_key_id='dummy',
-                aws_secret_access_key='dummy'
-            )
-        else:  # AWS environment
-            return boto3.resource('dynamodb', region_name=AWS_REGION)
+        return boto3.session.Session().resource('dynamodb', **_dynamodb_connection_args())
     except Exception as e:
         print(f"Error connecting to DynamoDB: {str(e)}")
         raise
 
+def db_get_low_level_client():
+    """
+    Get the pooled low-level DynamoDB client, creating it on first use
+    
+    Unlike the resource's meta.client, it takes and returns wire-format attribute values.
+    """
+    client = getattr(_registry, 'low_level_client', None)
+    if client is None:
+        try:
+            client = boto3.session.Session().client('dynamodb', **_dynamodb_connection_args())
+        except Exception as e:
+            print(f"Error connecting to DynamoDB: {str(e)}")
+            raise
+        _registry.low_level_client = client
+    return client
+
+def db_get_dynamodb_client():
+    """Get the pooled DynamoDB resource, creating it on first use"""
+    dynamodb = getattr(_registry, 'dynamodb', None)
+    if dynamodb is None:
+        dynamodb = db_create_dynamodb_client()
+        _registry.dynamodb = dynamodb
+        _registry.tables = {}
+    return dynamodb
+
+def db_get_table(table_name):
+    """Get a pooled Table handle"""
+    dynamodb = db_get_dynamodb_client()
+    table = _registry.tables.get(table_name)
+    if table is None:
+        table = dynamodb.Table(table_name)
+        _registry.tables[table_name] = table
+    return table
+
+def db_initialize_clients():
+    """Create the resource, table handles and (native codec) low-level client the db_* functions use"""
+    db_get_table(USERS_TABLE)
+    db_get_table(RETIREMENT_ITEMS_TABLE if RETIREMENT_DATA_LAYOUT == LAYOUT_ITEMS else RETIREMENT_DATA_TABLE)
+    if DYNAMODB_CODEC == CODEC_NATIVE:
+        db_get_low_level_client()
+
+def db_reset_clients():
+    """Drop the current thread's pooled resource, client and table handles (e.g. between tests)"""
+    _registry.dynamodb = None
+    _registry.low_level_client = None
+    _registry.tables = {}
+
+def db_reset_bootstrap_state():
+    """Forget verified tables and known users so the next request bootstraps again"""
+    global _tables_verified
+    with _bootstrap_lock:
+        _tables_verified = False
+        _known_users.clear()
+
 # Initialize tables
 def db_create_tables_if_not_exist():
-    """Create DynamoDB tables if they don't exist"""
+    """Create DynamoDB tables if they don't exist (checked once per process)"""
+    global _tables_verified
+    if _tables_verified:
+        return
+    
+    with _bootstrap_lock:
+        if not _tables_verified:
+            _db_create_tables()
+            _tables_verified = True
+
+def db_layout_tables():
+    """Names of the tables the configured RETIREMENT_DATA_LAYOUT uses"""
+    if RETIREMENT_DATA_LAYOUT == LAYOUT_ITEMS:
+        return (USERS_TABLE, RETIREMENT_DATA_TABLE, RETIREMENT_ITEMS_TABLE)
+    return (USERS_TABLE, RETIREMENT_DATA_TABLE, RETIREMENT_PROJECTIONS_TABLE)
+
+def db_existing_tables():
+    """Names of the tables that exist"""
+    return [table.name for table in db_get_dynamodb_client().tables.all()]
+
+def db_create_tables(table_names):
+    """
+    Create the named tables that don't exist yet and wait until they can be written
+    
+    Args:
+        table_names (iterable): Names among USERS_TABLE, RETIREMENT_DATA_TABLE, RETIREMENT_ITEMS_TABLE
+            and RETIREMENT_PROJECTIONS_TABLE
+    Raises:
+        ValueError: If a name isn't one of these tables
+    """
+    unknown_tables = set(table_names) - {USERS_TABLE, RETIREMENT_DATA_TABLE, RETIREMENT_ITEMS_TABLE, RETIREMENT_PROJECTIONS_TABLE}
+    if unknown_tables:
+        raise ValueError(f"Unknown tables: {', '.join(sorted(unknown_tables))}")
+    
+    created_tables = _db_create_tables(table_names)
+    client = db_get_dynamodb_client().meta.client
+    for table_name in created_tables:
+        client.get_waiter('table_exists').wait(TableName=table_name, WaiterConfig={'Delay': 2})
+
+def _db_create_tables(table_names=None):
+    """Create the named tables (default: the layout's) that don't exist, returns the created names"""
+    table_names = db_layout_tables() if table_names is None else table_names
     dynamodb = db_get_dynamodb_client()
     
     # Get existing tables
-    existing_tables = [table.name for table in dynamodb.tables.all()]
+    existing_tables = db_existing_tables()
+    created_tables = [table_name for table_name in table_names if table_name not in existing_tables]
     
     # Create users table if it doesn't exist. secondary index for email
-    if USERS_TABLE not in existing_tables:
+    if USERS_TABLE in created_tables:
         dynamodb.create_table(
             TableName=USERS_TABLE,
             KeySchema=[
@@ -85,7 +247,7 @@ def db_create_tables_if_not_exist():
         )
     
     # Create consolidated retirement data table if it doesn't exist
-    if RETIREMENT_DATA_TABLE not in existing_tables:
+    if RETIREMENT_DATA_TABLE in created_tables:
         dynamodb.create_table(
             TableName=RETIREMENT_DATA_TABLE,
             KeySchema=[
@@ -96,31 +258,71 @@ def db_create_tables_if_not_exist():
             ],
             BillingMode='PAY_PER_REQUEST'
         )
+    
+    # Create materialized projections table if the document layout is in use
+    if RETIREMENT_PROJECTIONS_TABLE in created_tables:
+        dynamodb.create_table(
+            TableName=RETIREMENT_PROJECTIONS_TABLE,
+            KeySchema=[
+                {'AttributeName': 'user_id', 'KeyType': 'HASH'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'user_id', 'AttributeType': 'S'}
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+    
+    # Create per-item retirement data table if that layout is in use
+    if RETIREMENT_ITEMS_TABLE in created_tables:
+        dynamodb.create_table(
+            TableName=RETIREMENT_ITEMS_TABLE,
+            KeySchema=[
+                {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'sk', 'KeyType': 'RANGE'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'sk', 'AttributeType': 'S'}
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+    
+    return created_tables
 
 def db_create_user_if_not_exists(user_id, email=None):
-    """Create user if they don't exist"""
+    """Create user if they don't exist (one conditional write, skipped for users known to this process)"""
+    if user_id in _known_users:
+        return True
+    
     try:
-        dynamodb = db_get_dynamodb_client()
-        table = dynamodb.Table(USERS_TABLE)
+        table = db_get_table(USERS_TABLE)
         
-        # Check if user exists
-        response = table.get_item(Key={'user_id': user_id})
-        if response.get('Item'):
-            return True  # User already exists
-        
-        # Create new user
+        # Create new user unless it already exists
         table.put_item(
             Item={
                 'user_id': user_id,
                 'email': email or f'{user_id}@example.com',
                 'created_at': datetime.now().isoformat(),
                 'updated_at': datetime.now().isoformat()
-            }
+            },
+            ConditionExpression='attribute_not_exists(user_id)'
         )
-        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            return False  # Anything but "user already exists" is a failure
     except Exception:
         return False
     
+    _remember_user(user_id)
+    return True
+
+def _remember_user(user_id):
+    """Skip the create-user write for this user for the rest of the process"""
+    with _bootstrap_lock:
+        if len(_known_users) >= KNOWN_USERS_MAX:
+            _known_users.clear()
+        _known_users.add(user_id)
+    
 def db_get_user_id(email):
     """
     Get user ID by email
@@ -129,8 +331,7 @@ def db_get_user_id(email):
     Returns:
         str: User ID or None if not found
     """
-    dynamodb = db_get_dynamodb_client()
-    table = dynamodb.Table(USERS_TABLE)
+    table = db_get_table(USERS_TABLE)
     
     response = table.query(
         IndexName='EmailIndex',
@@ -141,70 +342,289 @@ def db_get_user_id(email):
     items = response.get('Items', [])
     return items[0]['user_id'] if items else None
 
-def db_get_retirement_data(user_id):
-    """Get consolidated retirement data for a user"""
-    dynamodb = db_get_dynamodb_client()
-    table = dynamodb.Table(RETIREMENT_DATA_TABLE)
+def _db_get_item(table_name, key, projection_expression=None):
+    """Get one item through the configured codec"""
+    request = {'Key': key}
+    if projection_expression:
+        request['ProjectionExpression'] = projection_expression
+    
+    if DYNAMODB_CODEC == CODEC_NATIVE:
+        client = db_get_low_level_client()
+        response = client.get_item(TableName=table_name, **{**request, 'Key': encode_item(key)})
+        return decode_item(response.get('Item'))
     
-    response = table.get_item(Key={'user_id': user_id})
+    response = db_get_table(table_name).get_item(**request)
     return response.get('Item')
 
+def _db_get_items(keys_by_table):
+    """Get one item from each table with BatchGetItem through the configured codec, returns table name -> item or None"""
+    if DYNAMODB_CODEC == CODEC_NATIVE:
+        client = db_get_low_level_client()
+        request = {table_name: {'Keys': [encode_item(key)]} for table_name, key in keys_by_table.items()}
+        decode = decode_item
+    else:
+        client = db_get_dynamodb_client()
+        request = {table_name: {'Keys': [key]} for table_name, key in keys_by_table.items()}
+        decode = None
+    
+    items = dict.fromkeys(keys_by_table)
+    for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+        response = client.batch_get_item(RequestItems=request)
+        for table_name, table_items in response.get('Responses', {}).items():
+            for item in table_items:
+                items[table_name] = decode(item) if decode else item
+        request = response.get('UnprocessedKeys')
+        if not request:
+            return items
+        time.sleep(0.05 * 2 ** attempt)  # Back off while the table is throttling
+    raise RuntimeError(f"Batch get from {', '.join(keys_by_table)} left unprocessed keys")
+
+def _db_update_item(table_name, key, update_expression, values, condition_expression=None, names=None):
+    """Run an update through the configured codec, conditional if condition_expression is given"""
+    request = {'UpdateExpression': update_expression}
+    if condition_expression:
+        request['ConditionExpression'] = condition_expression
+    if names:
+        request['ExpressionAttributeNames'] = names
+    
+    if DYNAMODB_CODEC == CODEC_NATIVE:
+        client = db_get_low_level_client()
+        client.update_item(
+            TableName=table_name,
+            Key=encode_item(key),
+            ExpressionAttributeValues=encode_item(values),
+            **request
+        )
+    else:
+        db_get_table(table_name).update_item(
+            Key=key,
+            ExpressionAttributeValues=convert_floats_to_decimals(values),
+            **request
+        )
+
+def _db_put_item(table_name, item):
+    """Put one item through the configured codec"""
+    if DYNAMODB_CODEC == CODEC_NATIVE:
+        db_get_low_level_client().put_item(TableName=table_name, Item=encode_item(item))
+    else:
+        db_get_table(table_name).put_item(Item=convert_floats_to_decimals(item))
+
+def _db_paginate(table_name, operation, request):
+    """Run a query or scan through the configured codec, yielding items across pages"""
+    if DYNAMODB_CODEC == CODEC_NATIVE:
+        client = db_get_low_level_client()
+        request = {**request, 'TableName': table_name}
+        if 'ExpressionAttributeValues' in request:
+            request['ExpressionAttributeValues'] = encode_item(request['ExpressionAttributeValues'])
+        page = getattr(client, operation)
+        decode = decode_item
+    else:
+        page = getattr(db_get_table(table_name), operation)
+        decode = None
+    
+    while True:
+        response = page(**request)
+        for item in response.get('Items', []):
+            yield decode(item) if decode else item
+        if 'LastEvaluatedKey' not in response:
+            break
+        request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def _db_write_batch(table_name, put_items, delete_keys, key_names):
+    """Put and delete items in batches through the configured codec"""
+    if DYNAMODB_CODEC != CODEC_NATIVE:
+        with db_get_table(table_name).batch_writer(overwrite_by_pkeys=list(key_names)) as batch:
+            for item in put_items:
+                batch.put_item(Item=convert_floats_to_decimals(item))
+            for key in delete_keys:
+                batch.delete_item(Key=key)
+        return
+    
+    client = db_get_low_level_client()
+    requests = [{'PutRequest': {'Item': encode_item(item)}} for item in put_items]
+    requests += [{'DeleteRequest': {'Key': encode_item(key)}} for key in delete_keys]
+    for start in range(0, len(requests), BATCH_WRITE_MAX_ITEMS):
+        pending = {table_name: requests[start:start + BATCH_WRITE_MAX_ITEMS]}
+        for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+            pending = client.batch_write_item(RequestItems=pending).get('UnprocessedItems')
+            if not pending:
+                break
+            time.sleep(0.05 * 2 ** attempt)  # Back off while the table is throttling
+        else:
+            raise RuntimeError(f"Batch write to {table_name} left unprocessed items")
+
+def _db_transact_write(actions):
+    """
+    Run TransactWriteItems through the configured codec
+    
+    Args:
+        actions (list): Actions like {'Put': {'TableName': ..., 'Item': {...}}}, with native values
+    Raises:
+        ClientError: TransactionCanceledException if a condition failed, nothing is written then
+    """
+    if DYNAMODB_CODEC == CODEC_NATIVE:
+        client = db_get_low_level_client()
+        encode = encode_item
+    else:
+        # The resource's client takes and returns Python values, like the Table handles
+        client = db_get_dynamodb_client().meta.client
+        encode = convert_floats_to_decimals
+    
+    transact_items = []
+    for action in actions:
+        (operation, request), = action.items()
+        request = {
+            field: encode(value) if field in ('Item', 'Key', 'ExpressionAttributeValues') else value
+            for field, value in request.items()
+        }
+        transact_items.append({operation: request})
+    client.transact_write_items(TransactItems=transact_items)
+
+# Funds are stored as a map keyed by fund id (retirement_funds) plus the list of ids in
+# display order (fund_order), so a single fund can be patched in place with one write.
+# Items written before this layout keep a retirement_fund_data list until their first update.
+def _funds_from_item(item):
+    """Rebuild the ordered retirement_fund_data list from a stored item"""
+    funds_by_id = item.get('retirement_funds')
+    if funds_by_id is None:
+        return item.get('retirement_fund_data')
+    
+    fund_order = item.get('fund_order', [])
+    ordered_ids = set(fund_order)
+    funds = [funds_by_id[fund_id] for fund_id in fund_order if fund_id in funds_by_id]
+    funds.extend(fund for fund_id, fund in funds_by_id.items() if fund_id not in ordered_ids)
+    return funds
+
+def _fund_inputs(fund):
+    """The keys of a fund a write can change"""
+    return {k: v for k, v in fund.items() if k not in FUND_UPDATE_EXCLUDED_KEYS}
+
+def _fund_inputs_changed(stored_fund, inputs):
+    """Compare a stored fund with new inputs, as Decimals so either codec's numbers compare equal"""
+    return convert_floats_to_decimals(_fund_inputs(stored_fund)) != convert_floats_to_decimals(inputs)
+
+def _fund_storage_attributes(retirement_fund_data, stored_funds):
+    """
+    Split a fund list into the id-keyed map and id order stored in the item
+    
+    Versions come from the stored funds, never from the fund list: a fund keeps its stored
+    version unless its inputs changed, and new funds start at version 1.
+    """
+    stored_by_id = {fund.get('id'): fund for fund in stored_funds or []}
+    funds_by_id = {}
+    fund_order = []
+    for fund in retirement_fund_data:
+        fund_id = fund.get('id') or str(uuid.uuid4())
+        inputs = _fund_inputs(fund)
+        stored_fund = stored_by_id.get(fund_id)
+        version = int(stored_fund.get('version', 0)) if stored_fund else 0
+        if stored_fund is None or _fund_inputs_changed(stored_fund, inputs):
+            version += 1
+        funds_by_id[fund_id] = {**inputs, 'id': fund_id, 'version': version}
+        fund_order.append(fund_id)
+    return funds_by_id, fund_order
+
+def _db_document(item, projection_item):
+    """Build the document db_get_retirement_data returns from a retirement data item and its projection item"""
+    if not item:
+        return None
+    
+    if 'retirement_funds' in item:
+        item['retirement_fund_data'] = _funds_from_item(item)
+        del item['retirement_funds']
+        item.pop('fund_order', None)
+    
+    # A projection stored on the data item itself, as before RETIREMENT_PROJECTIONS_TABLE, is
+    # ignored and removed by the next write of the item
+    item.pop(MATERIALIZED_PROJECTION_KEY, None)
+    if projection_item:
+        item[MATERIALIZED_PROJECTION_KEY] = projection_item[MATERIALIZED_PROJECTION_KEY]
+    return item
+
+def db_get_retirement_data(user_id):
+    """Get consolidated retirement data for a user, with its materialized projection in the same request"""
+    if RETIREMENT_DATA_LAYOUT == LAYOUT_ITEMS:
+        return db_items_get_retirement_data(user_id)
+    
+    key = {'user_id': user_id}
+    items = _db_get_items({RETIREMENT_DATA_TABLE: key, RETIREMENT_PROJECTIONS_TABLE: key})
+    return _db_document(items[RETIREMENT_DATA_TABLE], items[RETIREMENT_PROJECTIONS_TABLE])
+
 def db_get_retirement_fund_data(user_id):
     """Get retirement_fund_data portion"""
-    dynamodb = db_get_dynamodb_client()
-    table = dynamodb.Table(RETIREMENT_DATA_TABLE)
+    if RETIREMENT_DATA_LAYOUT == LAYOUT_ITEMS:
+        item = db_items_get_retirement_data(user_id)
+        return item.get('retirement_fund_data') if item else None
     
-    response = table.get_item(
-        Key={'user_id': user_id},
-        ProjectionExpression='retirement_fund_data'
+    item = _db_get_item(
+        RETIREMENT_DATA_TABLE,
+        {'user_id': user_id},
+        'retirement_funds, fund_order, retirement_fund_data'
     )
-    item = response.get('Item')
-    return item.get('retirement_fund_data') if item else None
+    return _funds_from_item(item) if item else None
 
 def db_update_retirement_fund_data(user_id, retirement_fund_data):
     """Update retirement_fund_data portion"""
+    if RETIREMENT_DATA_LAYOUT == LAYOUT_ITEMS:
+        return db_items_update_retirement_fund_data(user_id, retirement_fund_data)
+    
     try:
-        dynamodb = db_get_dynamodb_client()
-        table = dynamodb.Table(RETIREMENT_DATA_TABLE)
-        
-        retirement_fund_data = convert_floats_to_decimals(retirement_fund_data)
-        
-        table.update_item(
-            Key={'user_id': user_id},
-            UpdateExpression='SET retirement_fund_data = :data, updated_at = :updated',
-            ExpressionAttributeValues={
-                ':data': retirement_fund_data,
+        for _ in range(FUND_LIST_WRITE_ATTEMPTS):
+            # Versions are bumped against the funds as stored, and the write only goes through
+            # if the item hasn't been written since they were read
+            item = _db_get_item(
+                RETIREMENT_DATA_TABLE,
+                {'user_id': user_id},
+                'retirement_funds, fund_order, retirement_fund_data, updated_at'
+            ) or {}
+            funds_by_id, fund_order = _fund_storage_attributes(retirement_fund_data, _funds_from_item(item))
+            
+            values = {
+                ':funds': funds_by_id,
+                ':order': fund_order,
                 ':updated': datetime.now().isoformat()
             }
-        )
-        return True
+            if 'updated_at' in item:
+                condition = 'updated_at = :read_updated'
+                values[':read_updated'] = item['updated_at']
+            else:
+                condition = 'attribute_not_exists(updated_at)'
+            
+            try:
+                _db_update_item(
+                    RETIREMENT_DATA_TABLE,
+                    {'user_id': user_id},
+                    f'SET retirement_funds = :funds, fund_order = :order, updated_at = :updated REMOVE retirement_fund_data, {MATERIALIZED_PROJECTION_KEY}',
+                    values,
+                    condition
+                )
+                return True
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+        return False
     except Exception:
         return False
 
 def db_get_family_info(user_id):
     """Get family_info_data portion"""
-    dynamodb = db_get_dynamodb_client()
-    table = dynamodb.Table(RETIREMENT_DATA_TABLE)
+    if RETIREMENT_DATA_LAYOUT == LAYOUT_ITEMS:
+        return db_items_get_family_info(user_id)
     
-    response = table.get_item(
-        Key={'user_id': user_id},
-        ProjectionExpression='family_info_data'
-    )
-    item = response.get('Item')
+    item = _db_get_item(RETIREMENT_DATA_TABLE, {'user_id': user_id}, 'family_info_data')
     return item.get('family_info_data') if item else None
 
 def db_update_family_info(user_id, family_info_data):
     """Update family_info_data portion"""
+    if RETIREMENT_DATA_LAYOUT == LAYOUT_ITEMS:
+        return db_items_update_family_info(user_id, family_info_data)
+    
     try:
-        dynamodb = db_get_dynamodb_client()
-        table = dynamodb.Table(RETIREMENT_DATA_TABLE)
-        
-        family_info_data = convert_floats_to_decimals(family_info_data)
-        
-        table.update_item(
-            Key={'user_id': user_id},
-            UpdateExpression='SET family_info_data = :data, updated_at = :updated',
-            ExpressionAttributeValues={
+        _db_update_item(
+            RETIREMENT_DATA_TABLE,
+            {'user_id': user_id},
+            f'SET family_info_data = :data, updated_at = :updated REMOVE {MATERIALIZED_PROJECTION_KEY}',
+            {
                 ':data': family_info_data,
                 ':updated': datetime.now().isoformat()
             }
@@ -213,47 +633,430 @@ def db_update_family_info(user_id, family_info_data):
     except Exception:
         return False
 
-def db_update_single_fund(user_id, fund_id, fund_data):
-    """Update a specific fund without reading first"""
+def db_update_single_fund(user_id, fund_id, fund_data, expected_version=None):
+    """
+    Update a specific fund with one conditional write
+    
+    Each key of fund_data is set in place on the stored fund and the fund's version is
+    bumped in the same write. If expected_version is given, the write only succeeds
+    while the stored fund still has that version.
+    
+    Args:
+        user_id (str): User ID
+        fund_id (str): Fund ID
+        fund_data (dict): Fund keys to update
+        expected_version (int): Version the stored fund must have (optional)
+    Returns:
+        bool: True on success, False if the user or fund was not found
+    Raises:
+        FundVersionConflictError: If the stored fund's version differs from expected_version
+    """
+    if RETIREMENT_DATA_LAYOUT == LAYOUT_ITEMS:
+        return db_items_update_single_fund(user_id, fund_id, fund_data, expected_version)
+    
     try:
-        dynamodb = db_get_dynamodb_client()
-        table = dynamodb.Table(RETIREMENT_DATA_TABLE)
+        names = {'#fund': fund_id, '#version': 'version'}
+        values = {':updated': datetime.now().isoformat(), ':zero': 0, ':one': 1}
+        assignments = []
+        for i, (key, value) in enumerate(fund_data.items()):
+            if key in FUND_UPDATE_EXCLUDED_KEYS:
+                continue
+            names[f'#k{i}'] = key
+            values[f':v{i}'] = value
+            assignments.append(f'retirement_funds.#fund.#k{i} = :v{i}')
+        assignments.append('retirement_funds.#fund.#version = if_not_exists(retirement_funds.#fund.#version, :zero) + :one')
+        assignments.append('updated_at = :updated')
         
-        fund_data = convert_floats_to_decimals(fund_data)
+        condition = 'attribute_exists(retirement_funds.#fund)'
+        if expected_version is not None:
+            condition += ' AND retirement_funds.#fund.#version = :expected_version'
+            values[':expected_version'] = int(expected_version)
         
-        # Find fund index by scanning the list
-        response = table.get_item(
-            Key={'user_id': user_id},
-            ProjectionExpression='retirement_fund_data'
-        )
+        try:
+            _db_update_item(
+                RETIREMENT_DATA_TABLE, {'user_id': user_id},
+                'SET ' + ', '.join(assignments) + f' REMOVE {MATERIALIZED_PROJECTION_KEY}', values, condition, names
+            )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
         
-        if not response.get('Item'):
+        # The condition failed: find out why, off the hot path
+        item = _db_get_item(RETIREMENT_DATA_TABLE, {'user_id': user_id})
+        if not item:
             return False
         
-        funds = response['Item']['retirement_fund_data']
-        fund_index = None
-        
-        for i, fund in enumerate(funds):
-            if fund.get('id') == fund_id:
-                fund_index = i
-                break
+        if 'retirement_funds' not in item:
+            # Legacy list layout: move it to the fund map once and retry the write
+            funds = item.get('retirement_fund_data', [])
+            if not any(fund.get('id') == fund_id for fund in funds):
+                return False
+            funds_by_id, fund_order = _fund_storage_attributes(funds, funds)
+            _db_update_item(
+                RETIREMENT_DATA_TABLE,
+                {'user_id': user_id},
+                'SET retirement_funds = :funds, fund_order = :order REMOVE retirement_fund_data',
+                {':funds': funds_by_id, ':order': fund_order},
+                'attribute_not_exists(retirement_funds)'
+            )
+            return db_update_single_fund(user_id, fund_id, fund_data, expected_version)
         
-        if fund_index is None:
+        if fund_id not in item['retirement_funds']:
             return False
         
-        # Update specific fund using list index
-        update_expression = f'SET retirement_fund_data[{fund_index}] = :fund_data, updated_at = :updated'
+        raise FundVersionConflictError(
+            f"Fund {fund_id} is at version {item['retirement_funds'][fund_id].get('version')}, expected {expected_version}"
+        )
+    except FundVersionConflictError:
+        raise
+    except Exception:
+        return False
+
+def db_put_materialized_projection(user_id, materialized):
+    """Store a user's materialized projection as their item of RETIREMENT_PROJECTIONS_TABLE"""
+    if RETIREMENT_DATA_LAYOUT == LAYOUT_ITEMS:
+        return db_items_put_materialized_projection(user_id, materialized)
+    
+    try:
+        _db_put_item(RETIREMENT_PROJECTIONS_TABLE, {'user_id': user_id, MATERIALIZED_PROJECTION_KEY: materialized})
+        return True
+    except Exception:
+        return False
+
+def db_iter_user_ids():
+    """Yield the ID of every user with retirement data"""
+    if RETIREMENT_DATA_LAYOUT == LAYOUT_ITEMS:
+        # A user has a FAMILY item, FUND# items or both. A scan returns the items of one
+        # user together, so skipping repeats of the previous ID yields each user once.
+        scan = {
+            'ProjectionExpression': 'user_id',
+            'FilterExpression': 'sk = :family OR begins_with(sk, :fund)',
+            'ExpressionAttributeValues': {':family': FAMILY_SORT_KEY, ':fund': FUND_SORT_KEY_PREFIX},
+        }
+        previous_user_id = None
+        for item in _db_paginate(RETIREMENT_ITEMS_TABLE, 'scan', scan):
+            if item['user_id'] != previous_user_id:
+                previous_user_id = item['user_id']
+                yield previous_user_id
+        return
+    
+    for item in _db_paginate(RETIREMENT_DATA_TABLE, 'scan', {'ProjectionExpression': 'user_id'}):
+        yield item['user_id']
+
+# Items layout: RETIREMENT_ITEMS_TABLE keyed by user_id + sk, with
+#   sk = FAMILY                      family_info_data
+#   sk = FUND#<fund_id>              one fund without its actual_data, plus its position in the list
+#   sk = ACTUAL#<fund_id>#<year>     one actual_data entry
+#   sk = PROJECTION                  materialized projection (services/materialization.py)
+# A user's data is read back with one paginated query, and writes only touch the items
+# that changed, so their cost scales with the size of the change, not of the portfolio.
+FAMILY_SORT_KEY = 'FAMILY'
+PROJECTION_SORT_KEY = 'PROJECTION'
+FUND_SORT_KEY_PREFIX = 'FUND#'
+ACTUAL_SORT_KEY_PREFIX = 'ACTUAL#'
+ITEM_ONLY_KEYS = ('user_id', 'sk', 'position', 'fund_id', 'updated_at')  # storage keys, not part of the document
+
+def _fund_sort_key(fund_id):
+    return f'{FUND_SORT_KEY_PREFIX}{fund_id}'
+
+def _actual_sort_key(fund_id, year):
+    return f'{ACTUAL_SORT_KEY_PREFIX}{fund_id}#{int(year):04d}'
+
+def _fund_actual_items(user_id, fund_id, actual_data):
+    """Build the ACTUAL items of a fund"""
+    return [
+        {
+            **{k: v for k, v in entry.items() if k not in ITEM_ONLY_KEYS},
+            'user_id': user_id,
+            'sk': _actual_sort_key(fund_id, entry['year']),
+            'fund_id': fund_id
+        }
+        for entry in actual_data
+    ]
+
+def db_items_from_document(user_id, retirement_fund_data, family_info_data=None):
+    """
+    Split retirement data into items of the items layout
+    
+    Args:
+        user_id (str): User ID
+        retirement_fund_data (list): Funds, each with its actual_data
+        family_info_data (list): Family members (optional, no FAMILY item if None)
+    Returns:
+        list: Items keyed by user_id and sk
+    """
+    items = []
+    if family_info_data is not None:
+        items.append({'user_id': user_id, 'sk': FAMILY_SORT_KEY, 'family_info_data': family_info_data})
+    
+    for position, fund in enumerate(retirement_fund_data):
+        fund_id = fund.get('id') or str(uuid.uuid4())
+        fund_item = {k: v for k, v in fund.items() if k not in ITEM_ONLY_KEYS + ('actual_data', 'retirement_projection', 'retirement_simulation')}
+        items.append({**fund_item, 'id': fund_id, 'user_id': user_id, 'sk': _fund_sort_key(fund_id), 'position': position})
+        items.extend(_fund_actual_items(user_id, fund_id, fund.get('actual_data', [])))
+    return items
+
+def db_document_retirement_data(document):
+    """
+    Read the funds and family data out of a stored retirement data document, e.g. to migrate
+    it to the items layout with db_items_from_document
+    
+    Args:
+        document (dict): Item of RETIREMENT_DATA_TABLE, with the fund map or a legacy fund list
+    Returns:
+        tuple: (retirement_fund_data list in display order, family_info_data list or None)
+    """
+    return _funds_from_item(document) or [], document.get('family_info_data')
+
+def db_items_to_document(user_id, items):
+    """
+    Assemble items of the items layout into the document shape of db_get_retirement_data
+    
+    Args:
+        user_id (str): User ID
+        items (iterable): Items of one user, in any order
+    Returns:
+        dict: Retirement data, or None if the user has no items
+    """
+    document = None
+    funds = []
+    actual_data_by_fund = {}
+    materialized = None
+    for item in items:
+        sort_key = item['sk']
+        if sort_key == PROJECTION_SORT_KEY:
+            materialized = item.get(MATERIALIZED_PROJECTION_KEY)
+            continue
+        document = document or {'user_id': user_id}
+        if sort_key == FAMILY_SORT_KEY:
+            document['family_info_data'] = item.get('family_info_data', [])
+        elif sort_key.startswith(FUND_SORT_KEY_PREFIX):
+            funds.append(item)
+        elif sort_key.startswith(ACTUAL_SORT_KEY_PREFIX):
+            entry = {k: v for k, v in item.items() if k not in ITEM_ONLY_KEYS}
+            actual_data_by_fund.setdefault(item['fund_id'], []).append(entry)
+    
+    if document is None:
+        return None
+    
+    funds.sort(key=lambda fund: fund.get('position', 0))
+    document['retirement_fund_data'] = [
+        {
+            **{k: v for k, v in fund.items() if k not in ITEM_ONLY_KEYS},
+            'actual_data': actual_data_by_fund.get(fund['id'], []),
+        }
+        for fund in funds
+    ]
+    if materialized is not None:
+        document[MATERIALIZED_PROJECTION_KEY] = materialized
+    return document
+
+def _db_items_query(user_id, sort_key_prefix=None):
+    """Query every item of a user (optionally under a sort key prefix), following pagination"""
+    query = {'KeyConditionExpression': 'user_id = :user_id', 'ExpressionAttributeValues': {':user_id': user_id}}
+    if sort_key_prefix:
+        query['KeyConditionExpression'] += ' AND begins_with(sk, :prefix)'
+        query['ExpressionAttributeValues'][':prefix'] = sort_key_prefix
+    return _db_paginate(RETIREMENT_ITEMS_TABLE, 'query', query)
+
+def _items_equal(stored_item, item):
+    """Compare a stored item with a new one, ignoring the write timestamp, as Decimals so either codec's numbers compare equal"""
+    return convert_floats_to_decimals({k: v for k, v in stored_item.items() if k != 'updated_at'}) == convert_floats_to_decimals(item)
+
+def _db_items_changes(existing_items, new_items):
+    """Find the items to put (new or changed) and the keys to delete (gone), returns (put_items, delete_keys)"""
+    existing_by_sort_key = {item['sk']: item for item in existing_items}
+    put_items = []
+    for item in new_items:
+        existing_item = existing_by_sort_key.pop(item['sk'], None)
+        if existing_item is None or not _items_equal(existing_item, item):
+            put_items.append({**item, 'updated_at': datetime.now().isoformat()})
+    delete_keys = [{'user_id': item['user_id'], 'sk': item['sk']} for item in existing_by_sort_key.values()]
+    return put_items, delete_keys
+
+def _db_items_write_changes(existing_items, new_items):
+    """Put items that are new or changed and delete items that are gone, in batches"""
+    put_items, delete_keys = _db_items_changes(existing_items, new_items)
+    _db_write_batch(RETIREMENT_ITEMS_TABLE, put_items, delete_keys, ('user_id', 'sk'))
+
+def db_items_get_retirement_data(user_id):
+    """Get consolidated retirement data for a user from the items layout"""
+    return db_items_to_document(user_id, _db_items_query(user_id))
+
+def db_items_get_family_info(user_id):
+    """Get family_info_data from the items layout"""
+    item = _db_get_item(RETIREMENT_ITEMS_TABLE, {'user_id': user_id, 'sk': FAMILY_SORT_KEY})
+    return item.get('family_info_data') if item else None
+
+def db_items_update_family_info(user_id, family_info_data):
+    """Update family_info_data in the items layout"""
+    try:
+        _db_put_item(RETIREMENT_ITEMS_TABLE, {
+            'user_id': user_id,
+            'sk': FAMILY_SORT_KEY,
+            'family_info_data': family_info_data,
+            'updated_at': datetime.now().isoformat()
+        })
+        return True
+    except Exception:
+        return False
+
+def db_items_update_retirement_fund_data(user_id, retirement_fund_data):
+    """Replace all funds in the items layout, writing only the fund and actual items that changed"""
+    try:
+        existing_items = [item for item in _db_items_query(user_id) if item['sk'] not in (FAMILY_SORT_KEY, PROJECTION_SORT_KEY)]
+        existing_by_sort_key = {item['sk']: item for item in existing_items}
         
-        table.update_item(
-            Key={'user_id': user_id},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues={
-                ':fund_data': {**funds[fund_index], **fund_data},
-                ':updated': datetime.now().isoformat()
-            }
+        new_items = db_items_from_document(user_id, retirement_fund_data)
+        
+        # Funds whose actual_data changed: an ACTUAL item added, changed or removed
+        new_sort_keys = {item['sk'] for item in new_items}
+        changed_actual_fund_ids = {
+            item['fund_id'] for item in new_items
+            if item['sk'].startswith(ACTUAL_SORT_KEY_PREFIX)
+            and (item['sk'] not in existing_by_sort_key or not _items_equal(existing_by_sort_key[item['sk']], item))
+        }
+        changed_actual_fund_ids.update(
+            item['fund_id'] for item in existing_items
+            if item['sk'].startswith(ACTUAL_SORT_KEY_PREFIX) and item['sk'] not in new_sort_keys
         )
+        
+        for item in new_items:
+            if not item['sk'].startswith(FUND_SORT_KEY_PREFIX):
+                continue
+            # Funds keep their stored version unless something in the fund item or its actual_data changed
+            existing_item = existing_by_sort_key.get(item['sk'])
+            item['version'] = existing_item.get('version', 0) if existing_item else 0
+            if existing_item is None or not _items_equal(existing_item, item) or item['id'] in changed_actual_fund_ids:
+                item['version'] = int(item['version']) + 1
+        
+        _db_items_write_changes(existing_items, new_items)
+        return True
+    except Exception:
+        return False
+
+def db_items_put_materialized_projection(user_id, materialized):
+    """Store a user's materialized projection as the PROJECTION item of the items layout"""
+    try:
+        _db_put_item(RETIREMENT_ITEMS_TABLE, {'user_id': user_id, 'sk': PROJECTION_SORT_KEY, MATERIALIZED_PROJECTION_KEY: materialized})
+        return True
+    except Exception:
+        return False
+
+def db_items_update_single_fund(user_id, fund_id, fund_data, expected_version=None):
+    """
+    Update a specific fund in the items layout
+    
+    Patches the FUND item with one conditional write (bumping its version). If actual_data
+    is part of the patch, the fund's ACTUAL items that changed are written in the same
+    transaction, so a version conflict writes neither. Patches with more ACTUAL changes
+    than a transaction holds write the FUND item first and the ACTUAL items after it.
+    
+    Args:
+        user_id (str): User ID
+        fund_id (str): Fund ID
+        fund_data (dict): Fund keys to update
+        expected_version (int): Version the stored fund must have (optional)
+    Returns:
+        bool: True on success, False if the user or fund was not found
+    Raises:
+        FundVersionConflictError: If the stored fund's version differs from expected_version
+    """
+    try:
+        names = {'#version': 'version'}
+        values = {':updated': datetime.now().isoformat(), ':zero': 0, ':one': 1}
+        assignments = []
+        for i, (key, value) in enumerate(fund_data.items()):
+            # Storage keys (sk, position, ...) are never patched, nor are actual_data's own items
+            if key in FUND_UPDATE_EXCLUDED_KEYS or key in ITEM_ONLY_KEYS or key == 'actual_data':
+                continue
+            names[f'#k{i}'] = key
+            values[f':v{i}'] = value
+            assignments.append(f'#k{i} = :v{i}')
+        assignments.append('#version = if_not_exists(#version, :zero) + :one')
+        assignments.append('updated_at = :updated')
+        
+        condition = 'attribute_exists(sk)'
+        if expected_version is not None:
+            condition += ' AND #version = :expected_version'
+            values[':expected_version'] = int(expected_version)
+        
+        key = {'user_id': user_id, 'sk': _fund_sort_key(fund_id)}
+        put_items, delete_keys = [], []
+        if 'actual_data' in fund_data:
+            existing_items = list(_db_items_query(user_id, f'{ACTUAL_SORT_KEY_PREFIX}{fund_id}#'))
+            put_items, delete_keys = _db_items_changes(existing_items, _fund_actual_items(user_id, fund_id, fund_data['actual_data']))
+        num_actions = 1 + len(put_items) + len(delete_keys)
+        
+        try:
+            if num_actions == 1 or num_actions > TRANSACT_WRITE_MAX_ITEMS:
+                _db_update_item(RETIREMENT_ITEMS_TABLE, key, 'SET ' + ', '.join(assignments), values, condition, names)
+            else:
+                _db_transact_write(
+                    [{'Update': {
+                        'TableName': RETIREMENT_ITEMS_TABLE, 'Key': key, 'UpdateExpression': 'SET ' + ', '.join(assignments),
+                        'ConditionExpression': condition, 'ExpressionAttributeNames': names, 'ExpressionAttributeValues': values,
+                    }}]
+                    + [{'Put': {'TableName': RETIREMENT_ITEMS_TABLE, 'Item': item}} for item in put_items]
+                    + [{'Delete': {'TableName': RETIREMENT_ITEMS_TABLE, 'Key': delete_key}} for delete_key in delete_keys]
+                )
+                return True
+        except ClientError as e:
+            # A cancelled transaction lists a reason per action, the fund update is the first
+            reasons = e.response.get('CancellationReasons') or [{}]
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException' and reasons[0].get('Code') != 'ConditionalCheckFailed':
+                raise
+            
+            item = _db_get_item(RETIREMENT_ITEMS_TABLE, key)
+            if not item:
+                return False
+            raise FundVersionConflictError(
+                f"Fund {fund_id} is at version {item.get('version')}, expected {expected_version}"
+            )
+        
+        if put_items or delete_keys:
+            _db_write_batch(RETIREMENT_ITEMS_TABLE, put_items, delete_keys, ('user_id', 'sk'))
         return True
+    except FundVersionConflictError:
+        raise
     except Exception:
         return False
 
+class DynamoDBStorage(StorageBackend):
+    # Storage backend over the db_* functions of this module (document or items layout)
+    def initialize(self):
+        db_initialize_clients()
+
+    def create_tables_if_not_exist(self):
+        return db_create_tables_if_not_exist()
+
+    def create_user_if_not_exists(self, user_id, email=None):
+        return db_create_user_if_not_exists(user_id, email)
+
+    def get_user_id(self, email):
+        return db_get_user_id(email)
+
+    def get_retirement_data(self, user_id):
+        return db_get_retirement_data(user_id)
+
+    def get_retirement_fund_data(self, user_id):
+        return db_get_retirement_fund_data(user_id)
+
+    def update_retirement_fund_data(self, user_id, retirement_fund_data):
+        return db_update_retirement_fund_data(user_id, retirement_fund_data)
+
+    def get_family_info(self, user_id):
+        return db_get_family_info(user_id)
+
+    def update_family_info(self, user_id, family_info_data):
+        return db_update_family_info(user_id, family_info_data)
+
+    def update_single_fund(self, user_id, fund_id, fund_data, expected_version=None):
+        return db_update_single_fund(user_id, fund_id, fund_data, expected_version)
+
+    def put_materialized_projection(self, user_id, materialized):
+        return db_put_materialized_projection(user_id, materialized)
 
+    def iter_user_ids(self):
+        return db_iter_user_ids()
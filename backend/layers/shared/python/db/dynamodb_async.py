@@ -0,0 +1,100 @@
+# Async DynamoDB reads for the ASGI server - aiobotocore client, values decoded like the sync reads
+import asyncio
+from datetime import datetime
+
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+
+from db import dynamodb
+from utils.codec import decode_item, encode_item, encode_value
+
+_deserializer = TypeDeserializer()
+
+def _decode(item):
+    """Decode a wire-format item with the configured DYNAMODB_CODEC (Decimal or native numbers)"""
+    if item is None or dynamodb.DYNAMODB_CODEC == dynamodb.CODEC_NATIVE:
+        return decode_item(item)
+    return {key: _deserializer.deserialize(value) for key, value in item.items()}
+
+# One client per event loop, it can't be shared across loops. The server creates it at
+# startup, so requests never race to create it.
+_clients = {}
+
+async def db_async_get_client():
+    """Get the running loop's aiobotocore DynamoDB client, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        args = dynamodb._dynamodb_connection_args()
+        args['config'] = AioConfig(max_pool_connections=dynamodb.DYNAMODB_MAX_POOL_CONNECTIONS)
+        client = await get_session().create_client('dynamodb', **args).__aenter__()
+        _clients[loop] = client
+    return client
+
+async def db_async_close_client():
+    """Close the running loop's client (on server shutdown)"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.__aexit__(None, None, None)
+
+async def db_async_create_user_if_not_exists(user_id, email=None):
+    """Create user if they don't exist, like db_create_user_if_not_exists"""
+    if user_id in dynamodb._known_users:
+        return True
+
+    client = await db_async_get_client()
+    now = datetime.now().isoformat()
+    try:
+        await client.put_item(
+            TableName=dynamodb.USERS_TABLE,
+            Item=encode_item({
+                'user_id': user_id,
+                'email': email or f'{user_id}@example.com',
+                'created_at': now,
+                'updated_at': now
+            }),
+            ConditionExpression='attribute_not_exists(user_id)'
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            return False
+    except Exception:
+        return False
+
+    dynamodb._remember_user(user_id)
+    return True
+
+async def db_async_get_retirement_data(user_id):
+    """Get consolidated retirement data for a user, like db_get_retirement_data"""
+    client = await db_async_get_client()
+    if dynamodb.RETIREMENT_DATA_LAYOUT == dynamodb.LAYOUT_ITEMS:
+        items = []
+        query = {
+            'TableName': dynamodb.RETIREMENT_ITEMS_TABLE,
+            'KeyConditionExpression': 'user_id = :user_id',
+            'ExpressionAttributeValues': {':user_id': encode_value(user_id)},
+        }
+        while True:
+            response = await client.query(**query)
+            items.extend(_decode(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return dynamodb.db_items_to_document(user_id, items)
+
+    # The data item and its materialized projection in one BatchGetItem
+    key = encode_item({'user_id': user_id})
+    request = {table_name: {'Keys': [key]} for table_name in (dynamodb.RETIREMENT_DATA_TABLE, dynamodb.RETIREMENT_PROJECTIONS_TABLE)}
+    items = dict.fromkeys(request)
+    for attempt in range(dynamodb.BATCH_GET_MAX_ATTEMPTS):
+        response = await client.batch_get_item(RequestItems=request)
+        for table_name, table_items in response.get('Responses', {}).items():
+            for item in table_items:
+                items[table_name] = _decode(item)
+        request = response.get('UnprocessedKeys')
+        if not request:
+            return dynamodb._db_document(items[dynamodb.RETIREMENT_DATA_TABLE], items[dynamodb.RETIREMENT_PROJECTIONS_TABLE])
+        await asyncio.sleep(0.05 * 2 ** attempt)  # Back off while the table is throttling
+    raise RuntimeError(f"Batch get of {user_id} left unprocessed keys")
@@ -0,0 +1,231 @@
+# Embedded SQLite storage backend - the db_* operations on a local database file (WAL mode, JSON columns)
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+from db.storage import FundVersionConflictError, StorageBackend, MATERIALIZED_PROJECTION_KEY
+from utils.response import json_dumps, json_loads
+
+# Database file; ':memory:' keeps everything in the process (benchmarks, tests)
+SQLITE_DATABASE_PATH = os.environ.get('SQLITE_DATABASE_PATH', 'retirement_portfolio.sqlite3')
+
+# Fund keys that update_single_fund never writes from a patch, and that are not compared
+# when a full fund list write decides which funds changed
+FUND_UPDATE_EXCLUDED_KEYS = ('id', 'version', 'retirement_projection', 'retirement_simulation')
+
+# Funds are one row each, so a single fund is patched and versioned without touching the others.
+# family_info_data and fund bodies are JSON text columns holding the same shapes as DynamoDB.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    email TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS users_email ON users (email);
+CREATE TABLE IF NOT EXISTS retirement_data (
+    user_id TEXT PRIMARY KEY,
+    family_info_data TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS retirement_funds (
+    user_id TEXT NOT NULL,
+    fund_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    fund TEXT NOT NULL,
+    PRIMARY KEY (user_id, fund_id)
+);
+CREATE TABLE IF NOT EXISTS materialized_projections (
+    user_id TEXT PRIMARY KEY,
+    materialized TEXT NOT NULL
+);
+'''
+
+class SQLiteStorage(StorageBackend):
+    # Storage backend on one SQLite connection shared by the process's threads
+    def __init__(self, path=None):
+        self.path = path or SQLITE_DATABASE_PATH
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if self.path != ':memory:':
+            # WAL lets other processes (dev server workers, scripts) read while one writes
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute('PRAGMA busy_timeout=5000')
+        self._tables_verified = False
+
+    def _transaction(self):
+        return _Transaction(self)
+
+    def create_tables_if_not_exist(self):
+        if self._tables_verified:
+            return
+        with self._lock:
+            self._connection.executescript(SCHEMA)
+            self._tables_verified = True
+
+    def create_user_if_not_exists(self, user_id, email=None):
+        try:
+            now = datetime.now().isoformat()
+            with self._lock:
+                self._connection.execute(
+                    'INSERT OR IGNORE INTO users (user_id, email, created_at, updated_at) VALUES (?, ?, ?, ?)',
+                    (user_id, email or f'{user_id}@example.com', now, now)
+                )
+            return True
+        except sqlite3.Error:
+            return False
+
+    def get_user_id(self, email):
+        with self._lock:
+            row = self._connection.execute('SELECT user_id FROM users WHERE email = ? LIMIT 1', (email,)).fetchone()
+        return row[0] if row else None
+
+    def _read_funds(self, user_id):
+        rows = self._connection.execute(
+            'SELECT fund_id, version, fund FROM retirement_funds WHERE user_id = ? ORDER BY position', (user_id,)
+        ).fetchall()
+        return [{**json_loads(fund), 'id': fund_id, 'version': version} for fund_id, version, fund in rows]
+
+    def get_retirement_data(self, user_id):
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT family_info_data, updated_at, materialized FROM retirement_data '
+                'LEFT JOIN materialized_projections USING (user_id) WHERE user_id = ?', (user_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            funds = self._read_funds(user_id)
+
+        family_info_data, updated_at, materialized = row
+        document = {'user_id': user_id, 'updated_at': updated_at}
+        if family_info_data is not None:
+            document['family_info_data'] = json_loads(family_info_data)
+        document['retirement_fund_data'] = funds
+        if materialized is not None:
+            document[MATERIALIZED_PROJECTION_KEY] = json_loads(materialized)
+        return document
+
+    def get_retirement_fund_data(self, user_id):
+        with self._lock:
+            exists = self._connection.execute('SELECT 1 FROM retirement_data WHERE user_id = ?', (user_id,)).fetchone()
+            return self._read_funds(user_id) if exists else None
+
+    def update_retirement_fund_data(self, user_id, retirement_fund_data):
+        try:
+            with self._transaction() as connection:
+                # Versions come from the stored funds, never from the fund list: a fund keeps its
+                # stored version unless its body changed, and new funds start at version 1
+                stored = {
+                    fund_id: (version, json_loads(fund)) for fund_id, version, fund in connection.execute(
+                        'SELECT fund_id, version, fund FROM retirement_funds WHERE user_id = ?', (user_id,)
+                    )
+                }
+                rows = []
+                for position, fund in enumerate(retirement_fund_data):
+                    fund_id = fund.get('id') or str(uuid.uuid4())
+                    body = {k: v for k, v in fund.items() if k not in FUND_UPDATE_EXCLUDED_KEYS}
+                    version, stored_body = stored.get(fund_id, (0, None))
+                    if stored_body != body:
+                        version += 1
+                    rows.append((user_id, fund_id, position, version, json_dumps(body)))
+
+                self._touch(connection, user_id)
+                connection.execute('DELETE FROM retirement_funds WHERE user_id = ?', (user_id,))
+                connection.executemany(
+                    'INSERT INTO retirement_funds (user_id, fund_id, position, version, fund) VALUES (?, ?, ?, ?, ?)', rows
+                )
+            return True
+        except Exception:
+            return False
+
+    def get_family_info(self, user_id):
+        with self._lock:
+            row = self._connection.execute('SELECT family_info_data FROM retirement_data WHERE user_id = ?', (user_id,)).fetchone()
+        return json_loads(row[0]) if row and row[0] is not None else None
+
+    def update_family_info(self, user_id, family_info_data):
+        try:
+            with self._transaction() as connection:
+                self._touch(connection, user_id)
+                connection.execute(
+                    'UPDATE retirement_data SET family_info_data = ? WHERE user_id = ?', (json_dumps(family_info_data), user_id)
+                )
+            return True
+        except Exception:
+            return False
+
+    def update_single_fund(self, user_id, fund_id, fund_data, expected_version=None):
+        try:
+            with self._transaction() as connection:
+                row = connection.execute(
+                    'SELECT version, fund FROM retirement_funds WHERE user_id = ? AND fund_id = ?', (user_id, fund_id)
+                ).fetchone()
+                if row is None:
+                    return False
+
+                version, fund = row
+                if expected_version is not None and version != int(expected_version):
+                    raise FundVersionConflictError(f"Fund {fund_id} is at version {version}, expected {expected_version}")
+
+                fund = json_loads(fund)
+                fund.update((k, v) for k, v in fund_data.items() if k not in FUND_UPDATE_EXCLUDED_KEYS)
+                connection.execute(
+                    'UPDATE retirement_funds SET fund = ?, version = ? WHERE user_id = ? AND fund_id = ?',
+                    (json_dumps(fund), version + 1, user_id, fund_id)
+                )
+                self._touch(connection, user_id)
+            return True
+        except FundVersionConflictError:
+            raise
+        except Exception:
+            return False
+
+    def put_materialized_projection(self, user_id, materialized):
+        try:
+            with self._transaction() as connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO materialized_projections (user_id, materialized) VALUES (?, ?)',
+                    (user_id, json_dumps(materialized))
+                )
+            return True
+        except Exception:
+            return False
+
+    def iter_user_ids(self):
+        with self._lock:
+            rows = self._connection.execute('SELECT user_id FROM retirement_data ORDER BY user_id').fetchall()
+        for (user_id,) in rows:
+            yield user_id
+
+    def _touch(self, connection, user_id):
+        # Creates the user's retirement_data row on first write, like DynamoDB's update_item
+        connection.execute(
+            'INSERT INTO retirement_data (user_id, updated_at) VALUES (?, ?) '
+            'ON CONFLICT (user_id) DO UPDATE SET updated_at = excluded.updated_at',
+            (user_id, datetime.now().isoformat())
+        )
+
+class _Transaction:
+    # Holds the backend's lock for one write transaction; BEGIN IMMEDIATE also locks out other processes
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __enter__(self):
+        self.storage._lock.acquire()
+        try:
+            self.storage._connection.execute('BEGIN IMMEDIATE')
+        except Exception:
+            self.storage._lock.release()
+            raise
+        return self.storage._connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.storage._connection.execute('COMMIT' if exc_type is None else 'ROLLBACK')
+        finally:
+            self.storage._lock.release()
+        return False
@@ -0,0 +1,198 @@
+# Storage interface - the db_* operations behind one backend, selected by STORAGE_BACKEND
+import os
+import threading
+
+from utils.metrics import timed
+
+# Storage backends: DynamoDB (db/dynamodb.py) or an embedded SQLite database (db/sqlite.py)
+STORAGE_DYNAMODB = 'dynamodb'
+STORAGE_SQLITE = 'sqlite'
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', STORAGE_DYNAMODB)
+
+# Create the backend and its clients when a handler module loads (db_initialize), so Lambda
+# does it in the init phase instead of in the first request. Elsewhere (dev server, scripts)
+# backends load lazily on first use.
+STORAGE_INIT_CLIENTS = os.environ.get(
+    'STORAGE_INIT_CLIENTS', 'true' if 'AWS_LAMBDA_FUNCTION_NAME' in os.environ else 'false'
+).lower() == 'true'
+
+# Key of a user's materialized projection (services/materialization.py) in the document
+# db_get_retirement_data returns, so the GET reads data and projection together
+MATERIALIZED_PROJECTION_KEY = 'materialized_projection'
+
+class FundVersionConflictError(Exception):
+    # Raised when a fund update's expected version no longer matches the stored fund
+    pass
+
+class StorageBackend:
+    # Interface of a storage backend; every backend stores the same document shapes
+    def initialize(self):
+        """Create clients and connections up front (optional, backends otherwise create them on first use)"""
+        pass
+
+    def create_tables_if_not_exist(self):
+        """Create the backend's tables if they don't exist"""
+        raise NotImplementedError
+
+    def create_user_if_not_exists(self, user_id, email=None):
+        """Create user if they don't exist, returns False on failure"""
+        raise NotImplementedError
+
+    def get_user_id(self, email):
+        """Get user ID by email, or None if not found"""
+        raise NotImplementedError
+
+    def get_retirement_data(self, user_id):
+        """Get consolidated retirement data for a user, or None"""
+        raise NotImplementedError
+
+    def get_retirement_fund_data(self, user_id):
+        """Get retirement_fund_data portion, or None"""
+        raise NotImplementedError
+
+    def update_retirement_fund_data(self, user_id, retirement_fund_data):
+        """Replace retirement_fund_data, bumping the stored version of each changed fund, returns False on failure"""
+        raise NotImplementedError
+
+    def get_family_info(self, user_id):
+        """Get family_info_data portion, or None"""
+        raise NotImplementedError
+
+    def update_family_info(self, user_id, family_info_data):
+        """Replace family_info_data, returns False on failure"""
+        raise NotImplementedError
+
+    def update_single_fund(self, user_id, fund_id, fund_data, expected_version=None):
+        """Patch one fund, see db_update_single_fund"""
+        raise NotImplementedError
+
+    def put_materialized_projection(self, user_id, materialized):
+        """Store a user's materialized projection, returns False on failure (it's only read back with the user's data)"""
+        raise NotImplementedError
+
+    def iter_user_ids(self):
+        """Yield the ID of every user with retirement data"""
+        raise NotImplementedError
+
+# Process-wide backend, created on first use
+_storage = None
+_storage_lock = threading.Lock()
+
+def _create_storage(backend):
+    # Backends are imported here, so the SQLite backend never loads boto3
+    if backend == STORAGE_SQLITE:
+        from db.sqlite import SQLiteStorage
+        return SQLiteStorage()
+    if backend == STORAGE_DYNAMODB:
+        from db.dynamodb import DynamoDBStorage
+        return DynamoDBStorage()
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}', expected '{STORAGE_DYNAMODB}' or '{STORAGE_SQLITE}'")
+
+def db_get_storage():
+    """Get the configured storage backend, creating it on first use"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = _create_storage(STORAGE_BACKEND)
+    return _storage
+
+def db_initialize():
+    """Create the storage backend and its clients if STORAGE_INIT_CLIENTS is set (called at handler import)"""
+    if STORAGE_INIT_CLIENTS:
+        db_get_storage().initialize()
+
+def db_set_storage(storage):
+    """
+    Replace the storage backend of this process (e.g. an in-memory SQLiteStorage in benchmarks)
+
+    Args:
+        storage (StorageBackend): Backend to use, or None to create the configured one again
+    """
+    global _storage
+    with _storage_lock:
+        _storage = storage
+
+@timed('db_create_tables_if_not_exist')
+def db_create_tables_if_not_exist():
+    """Create tables if they don't exist (checked once per process)"""
+    return db_get_storage().create_tables_if_not_exist()
+
+@timed('db_create_user_if_not_exists')
+def db_create_user_if_not_exists(user_id, email=None):
+    """Create user if they don't exist"""
+    return db_get_storage().create_user_if_not_exists(user_id, email)
+
+@timed('db_get_user_id')
+def db_get_user_id(email):
+    """
+    Get user ID by email
+    Args:
+        email (str): User email
+    Returns:
+        str: User ID or None if not found
+    """
+    return db_get_storage().get_user_id(email)
+
+@timed('db_get_retirement_data')
+def db_get_retirement_data(user_id):
+    """Get consolidated retirement data for a user (with its materialized projection, if any)"""
+    return db_get_storage().get_retirement_data(user_id)
+
+@timed('db_get_retirement_fund_data')
+def db_get_retirement_fund_data(user_id):
+    """Get retirement_fund_data portion"""
+    return db_get_storage().get_retirement_fund_data(user_id)
+
+@timed('db_update_retirement_fund_data')
+def db_update_retirement_fund_data(user_id, retirement_fund_data):
+    """Update retirement_fund_data portion"""
+    return db_get_storage().update_retirement_fund_data(user_id, retirement_fund_data)
+
+@timed('db_get_family_info')
+def db_get_family_info(user_id):
+    """Get family_info_data portion"""
+    return db_get_storage().get_family_info(user_id)
+
+@timed('db_update_family_info')
+def db_update_family_info(user_id, family_info_data):
+    """Update family_info_data portion"""
+    return db_get_storage().update_family_info(user_id, family_info_data)
+
+@timed('db_update_single_fund')
+def db_update_single_fund(user_id, fund_id, fund_data, expected_version=None):
+    """
+    Update a specific fund
+
+    Each key of fund_data is set in place on the stored fund and the fund's version is
+    bumped in the same write. If expected_version is given, the write only succeeds
+    while the stored fund still has that version.
+
+    Args:
+        user_id (str): User ID
+        fund_id (str): Fund ID
+        fund_data (dict): Fund keys to update
+        expected_version (int): Version the stored fund must have (optional)
+    Returns:
+        bool: True on success, False if the user or fund was not found
+    Raises:
+        FundVersionConflictError: If the stored fund's version differs from expected_version
+    """
+    return db_get_storage().update_single_fund(user_id, fund_id, fund_data, expected_version)
+
+@timed('db_put_materialized_projection')
+def db_put_materialized_projection(user_id, materialized):
+    """
+    Store a user's materialized projection, replacing the previous one
+
+    Args:
+        user_id (str): User ID
+        materialized (dict): Materialized projection, see services/materialization.py
+    Returns:
+        bool: True on success, False on failure or if the user has no retirement data
+    """
+    return db_get_storage().put_materialized_projection(user_id, materialized)
+
+def db_iter_user_ids():
+    """Yield the ID of every user with retirement data"""
+    return db_get_storage().iter_user_ids()
@@ -0,0 +1,75 @@
+# Actuals store - a fund's actual_data indexed by year
+import numpy as np
+
+class ActualsStore:
+    # Recorded balances, contributions and growth of a fund, one entry per year
+    __slots__ = ('years', 'balance', 'contributions', 'growth')
+
+    def __init__(self, years, balance, contributions, growth):
+        self.years = years  # int array, ascending
+        self.balance = balance
+        self.contributions = contributions
+        self.growth = growth
+
+    @classmethod
+    def from_actual_data(cls, actual_data):
+        """
+        Index a fund's actual_data entries by year
+
+        Values are converted to float once here. Where several entries share a year, the
+        first one wins, like a scan of the list would.
+
+        Args:
+            actual_data (list): Entries with year, actual_balance, actual_contributions and actual_growth
+
+        Returns:
+            ActualsStore: Year-indexed actuals
+        """
+        by_year = {}
+        for entry in actual_data or []:
+            year = entry.get('year')
+            if year is not None:
+                by_year.setdefault(int(year), entry)
+
+        years = sorted(by_year)
+        entries = [by_year[year] for year in years]
+        return cls(
+            np.array(years, dtype=np.int64),
+            np.array([float(entry.get('actual_balance')) for entry in entries]),
+            np.array([float(entry.get('actual_contributions')) for entry in entries]),
+            np.array([float(entry.get('actual_growth')) for entry in entries]),
+        )
+
+    def __len__(self):
+        return len(self.years)
+
+    def window(self, start_year, num_years):
+        """
+        Lay the actuals out over a projection timeline
+
+        Args:
+            start_year (int): First year of the timeline
+            num_years (int): Number of years in the timeline
+
+        Returns:
+            dict: Per-year arrays has_actual, actual_balance, actual_contributions and actual_growth
+        """
+        has_actual = np.zeros(num_years, dtype=bool)
+        actual_balance = np.zeros(num_years)
+        actual_contributions = np.zeros(num_years)
+        actual_growth = np.zeros(num_years)
+        if len(self.years):
+            offsets = self.years - start_year
+            in_window = (offsets >= 0) & (offsets < num_years)
+            offsets = offsets[in_window]
+            has_actual[offsets] = True
+            actual_balance[offsets] = self.balance[in_window]
+            actual_contributions[offsets] = self.contributions[in_window]
+            actual_growth[offsets] = self.growth[in_window]
+
+        return {
+            'has_actual': has_actual,
+            'actual_balance': actual_balance,
+            'actual_contributions': actual_contributions,
+            'actual_growth': actual_growth,
+        }
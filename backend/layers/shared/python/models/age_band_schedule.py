@@ -0,0 +1,183 @@
+# Compiled age-band schedules - age-banded fund params resolved into dense age-indexed arrays
+import math
+
+# Ages a band may cover
+MIN_AGE = 0
+MAX_AGE = 150
+
+# Index of MIN_AGE in the dense arrays; one uncovered slot on each side catches out-of-range ages
+_AGE_OFFSET = MIN_AGE - 1
+_WIDTH = MAX_AGE - MIN_AGE + 3
+
+def _parse_bands(params, fields, strict, label):
+    """
+    Convert and check age bands, see AgeBandSchedule.from_params
+
+    Returns:
+        list: (start, stop, band_values) per band, the slice of the dense arrays it covers
+            and its (field, value) pairs, in list order
+    """
+    bands = []
+    for index, param in enumerate(params or []):
+        try:
+            from_age = math.ceil(float(param['from_age']))
+            to_age = math.floor(float(param['to_age']))
+            band_values = [(field, convert(param.get(field, missing))) for field, (convert, missing) in fields.items()]
+        except (KeyError, TypeError, ValueError, OverflowError):
+            if strict:
+                raise ValueError(f"{label} {index + 1} must have numeric from_age, to_age and {', '.join(fields)}")
+            continue
+
+        if strict:
+            if from_age > to_age:
+                raise ValueError(f"{label} {index + 1}: from_age must not be greater than to_age")
+            if from_age < MIN_AGE or to_age > MAX_AGE:
+                raise ValueError(f"{label} {index + 1}: ages must be between {MIN_AGE} and {MAX_AGE}")
+            if any(isinstance(value, float) and not math.isfinite(value) for _, value in band_values):
+                raise ValueError(f"{label} {index + 1}: values must be finite numbers")
+
+        start = max(from_age, MIN_AGE) - _AGE_OFFSET
+        stop = min(to_age, MAX_AGE) - _AGE_OFFSET + 1
+        if start < stop:
+            bands.append((start, stop, band_values))
+    return bands
+
+class AgeBandSchedule:
+    # Age bands resolved into one dense array per field, indexed by age - _AGE_OFFSET
+    __slots__ = ('covered', 'values', '_lists')
+
+    def __init__(self, covered, values):
+        self.covered = covered  # bool array, True where a band covers the age
+        self.values = values  # field -> array of the covering band's value (or the default) per age
+        self._lists = None  # values as Python lists for scalar lookups, built on the first lookup
+
+    @classmethod
+    def from_params(cls, params, fields, defaults, strict=False, label='Age band'):
+        """
+        Compile a list of age bands ({'from_age', 'to_age', <fields>...})
+
+        Bands are inclusive on both ends. Where bands overlap, the first band in list
+        order wins, like a linear scan of the list. Values are converted once here, so
+        lookups never convert per year.
+
+        Args:
+            params (list): Age bands, ages and values may be int, float, Decimal or str
+            fields (dict): Field name -> (converter, value when missing from a band, which
+                also sets the field's type)
+            defaults (dict): Field name -> value for ages no band covers
+            strict (bool): Raise on invalid bands instead of skipping or clipping them
+            label (str): Name of the bands in error messages
+
+        Returns:
+            AgeBandSchedule: Compiled schedule
+
+        Raises:
+            ValueError: If strict and a band is invalid
+        """
+        # numpy loads on the first compile, not when validation imports the module
+        import numpy as np
+        bands = _parse_bands(params, fields, strict, label)
+        covered = np.zeros(_WIDTH, dtype=bool)
+        # Each field's array takes the type of its missing value (float or int)
+        values = {field: np.full(_WIDTH, defaults[field], dtype=type(missing)) for field, (_, missing) in fields.items()}
+        # Assign in reverse so the first band in list order overwrites the later ones
+        for start, stop, band_values in reversed(bands):
+            covered[start:stop] = True
+            for field, value in band_values:
+                values[field][start:stop] = value
+
+        return cls(covered, values)
+
+    def lookup(self, age, field):
+        """
+        Get a field's value for one age in O(1)
+
+        Args:
+            age (int): Age to look up
+            field (str): Value field
+
+        Returns:
+            Value of the covering band or the default
+        """
+        if self._lists is None:
+            self._lists = {name: values.tolist() for name, values in self.values.items()}
+        return self._lists[field][min(max(age - _AGE_OFFSET, 0), _WIDTH - 1)]
+
+    def covers(self, ages):
+        """
+        Check which ages of an array a band covers
+
+        Args:
+            ages (numpy.ndarray): Integer ages
+
+        Returns:
+            numpy.ndarray: True where a band covers the age, False where the default applies
+        """
+        return self.covered.take(ages - _AGE_OFFSET, mode='clip')
+
+    def resolve(self, ages, field):
+        """
+        Get a field's value for every age of an array
+
+        Args:
+            ages (numpy.ndarray): Integer ages
+            field (str): Value field
+
+        Returns:
+            numpy.ndarray: Value per age
+        """
+        # Ages outside MIN_AGE..MAX_AGE clip to the uncovered slot at either end
+        return self.values[field].take(ages - _AGE_OFFSET, mode='clip')
+
+# Value fields of each kind of fund band: converter and value when missing from a band
+RETURN_RATE_FIELDS = {'return_rate': (lambda value: float(value) * 0.01, 0.0)}
+CONTRIBUTION_FIELDS = {'contribution_amount': (float, 0.0), 'contribution_frequency': (int, 12)}
+
+def covering_band_values(params, fields, label='Age band'):
+    """
+    Strictly check age bands and get the values of those that cover some age, without numpy
+
+    Where bands overlap the first band in list order wins, as in a compiled schedule, so a
+    band whose ages are all covered by earlier bands isn't returned.
+
+    Args:
+        params (list): Age bands ({'from_age', 'to_age', <fields>...})
+        fields (dict): Field name -> (converter, value when missing from a band)
+        label (str): Name of the bands in error messages
+
+    Returns:
+        list: Field -> value dict of each covering band
+
+    Raises:
+        ValueError: If a band is invalid
+    """
+    uncovered = [True] * _WIDTH
+    covering = []
+    for start, stop, band_values in _parse_bands(params, fields, True, label):
+        if any(uncovered[start:stop]):
+            uncovered[start:stop] = [False] * (stop - start)
+            covering.append(dict(band_values))
+    return covering
+
+def compile_return_rate_schedule(return_rate_params, default_return_rate=0.07, strict=False):
+    """Compile a fund's return_rate_params; return_rate is the annual rate as a fraction (default 7%)"""
+    return AgeBandSchedule.from_params(
+        return_rate_params, RETURN_RATE_FIELDS, {'return_rate': default_return_rate},
+        strict=strict, label='Return rate band'
+    )
+
+def compile_contribution_schedule(contribution_params, default_amount=0.0, default_frequency=12, strict=False):
+    """Compile a fund's contribution_params; uncovered ages take the fund's regular contribution and frequency"""
+    return AgeBandSchedule.from_params(
+        contribution_params, CONTRIBUTION_FIELDS,
+        {'contribution_amount': default_amount, 'contribution_frequency': default_frequency},
+        strict=strict, label='Contribution band'
+    )
+
+def check_return_rate_bands(return_rate_params):
+    """Strictly check a fund's return_rate_params, see covering_band_values"""
+    return covering_band_values(return_rate_params, RETURN_RATE_FIELDS, label='Return rate band')
+
+def check_contribution_bands(contribution_params):
+    """Strictly check a fund's contribution_params, see covering_band_values"""
+    return covering_band_values(contribution_params, CONTRIBUTION_FIELDS, label='Contribution band')
@@ -1,4 +1,5 @@
 # Data model for retirement fund info
+from models.age_band_schedule import check_return_rate_bands, check_contribution_bands
 
 class RetirementFundData:
     # Model for retirement fund info parameters
@@ -37,6 +38,19 @@ class RetirementFundData:
                     param['contribution_amount'] = float(param.get('contribution_amount', 0.0))
                     param['contribution_frequency'] = int(param.get('contribution_frequency', 12))
             
+            # Check the age bands the way the calculator will resolve them, without loading numpy
+            try:
+                check_return_rate_bands(return_rate_params)
+                contribution_bands = check_contribution_bands(contribution_params)
+            except ValueError as e:
+                return False, str(e)
+            
+            if any(band['contribution_frequency'] <= 0 for band in contribution_bands):
+                return False, "Contribution band frequency must be greater than 0"
+            
+            if any(band['contribution_amount'] < 0 for band in contribution_bands):
+                return False, "Contribution band amount must be non-negative"
+            
             # Validate and convert actual_data if present
             actual_data = fund.get('actual_data', [])
             if actual_data:
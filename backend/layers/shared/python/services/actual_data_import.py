@@ -0,0 +1,295 @@
+# Actual data import - streaming CSV/OFX parsing of brokerage exports into per-year actual_data
+import csv
+import io
+import re
+from datetime import datetime
+from functools import lru_cache
+
+# Supported upload formats
+IMPORT_FORMAT_CSV = 'csv'
+IMPORT_FORMAT_OFX = 'ofx'
+
+# CSV header aliases (compared lowercased with spaces, dashes and underscores removed)
+CSV_COLUMN_ALIASES = {
+    'date': ('date', 'asof', 'asofdate', 'tradedate', 'posted', 'posteddate', 'settlementdate'),
+    'year': ('year',),
+    'balance': ('balance', 'actualbalance', 'endingbalance', 'closingbalance', 'marketvalue', 'value', 'totalvalue'),
+    'contributions': ('contribution', 'contributions', 'actualcontributions', 'deposit', 'deposits', 'amount'),
+    'growth': ('growth', 'actualgrowth', 'gain', 'gainloss', 'changeinvalue', 'return', 'earnings'),
+}
+
+# OFX transaction types counted as growth; every other type is a (signed) contribution
+OFX_GROWTH_TYPES = frozenset(['INT', 'DIV', 'FEE', 'SRVCHG'])
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d.%m.%Y', '%Y/%m/%d', '%Y%m%d')
+
+_OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+class ActualDataImportError(ValueError):
+    # Invalid upload, with the line it was found on when known
+    def __init__(self, message, line=None):
+        super().__init__(f"Line {line}: {message}" if line else message)
+        self.line = line
+
+def _normalize_header(header):
+    return re.sub(r'[\s_\-/]', '', header.strip().lower())
+
+def _parse_amount(text, line):
+    """Parse an amount like '1,234.50', '$1234.5' or '(12.00)'; empty means no value"""
+    text = (text or '').strip().replace(',', '').replace('$', '')
+    if not text:
+        return None
+    negative = text.startswith('(') and text.endswith(')')
+    try:
+        value = float(text.strip('()'))
+    except ValueError:
+        raise ActualDataImportError(f"'{text}' is not a number", line)
+    return -value if negative else value
+
+@lru_cache(maxsize=4096)
+def _date_from_text(text):
+    # Statements repeat the same dates row after row, so parsed dates are cached (bounded)
+    if len(text) >= 8 and text[:8].isdigit():
+        return datetime(int(text[:4]), int(text[4:6]), int(text[6:8])).date()
+    if len(text) == 10 and text[4] == '-' and text[7] == '-':
+        return datetime(int(text[:4]), int(text[5:7]), int(text[8:10])).date()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(text)
+
+def _parse_date(text, line):
+    """Parse a date in one of DATE_FORMATS; OFX timestamps (20240131120000[-5:EST]) use their date part"""
+    text = (text or '').strip()
+    try:
+        return _date_from_text(text)
+    except ValueError:
+        raise ActualDataImportError(f"'{text}' is not a date", line)
+
+def open_upload(body):
+    """
+    Wrap an upload body in a line iterator without copying it
+
+    Args:
+        body (str or bytes): Request body
+
+    Returns:
+        Text stream iterating over the body line by line
+    """
+    if isinstance(body, (bytes, bytearray)):
+        return io.TextIOWrapper(io.BytesIO(body), encoding='utf-8-sig', newline='')
+    return io.StringIO(body.lstrip('\ufeff'), newline='')
+
+def _invalid_utf8_line(body):
+    """Line of the first byte of body that isn't UTF-8, searched again only on the error path"""
+    if not isinstance(body, (bytes, bytearray)):
+        return None
+    try:
+        bytes(body).decode('utf-8')
+    except UnicodeDecodeError as e:
+        return body.count(b'\n', 0, e.start) + 1
+    return None
+
+def detect_import_format(content_type, stream):
+    """
+    Detect the upload format from the Content-Type, or failing that, the first bytes
+
+    Args:
+        content_type (str): Request Content-Type (optional)
+        stream: Seekable text stream from open_upload
+
+    Returns:
+        str: IMPORT_FORMAT_CSV or IMPORT_FORMAT_OFX
+    """
+    content_type = (content_type or '').lower()
+    if 'ofx' in content_type:
+        return IMPORT_FORMAT_OFX
+    if 'csv' in content_type:
+        return IMPORT_FORMAT_CSV
+
+    start = stream.read(512)
+    stream.seek(0)
+    if 'OFXHEADER' in start.upper() or '<OFX>' in start.upper():
+        return IMPORT_FORMAT_OFX
+    return IMPORT_FORMAT_CSV
+
+def iter_csv_records(stream):
+    """
+    Parse CSV rows one at a time
+
+    The header row names the columns (see CSV_COLUMN_ALIASES): a date or year, and at
+    least a balance, contributions or growth column.
+
+    Args:
+        stream: Text stream from open_upload
+
+    Yields:
+        tuple: (line, date or None, year, balance, contributions, growth), values None when empty
+    """
+    reader = csv.reader(stream)
+    rows = _iter_csv_rows(reader)
+    header = next(rows, None)
+    if header is None:
+        raise ActualDataImportError("The file is empty")
+
+    columns = {}
+    for index, name in enumerate(header):
+        normalized = _normalize_header(name)
+        for field, aliases in CSV_COLUMN_ALIASES.items():
+            if normalized in aliases:
+                columns.setdefault(field, index)
+    if 'date' not in columns and 'year' not in columns:
+        raise ActualDataImportError("The header must have a date or year column", 1)
+    if not {'balance', 'contributions', 'growth'} & set(columns):
+        raise ActualDataImportError("The header must have a balance, contributions or growth column", 1)
+
+    def cell(row, field):
+        index = columns.get(field)
+        return row[index] if index is not None and index < len(row) else ''
+
+    for row in rows:
+        line = reader.line_num
+        if not any(value.strip() for value in row):
+            continue
+        if 'date' in columns and cell(row, 'date').strip():
+            date = _parse_date(cell(row, 'date'), line)
+            year = date.year
+        else:
+            date = None
+            try:
+                year = int(cell(row, 'year'))
+            except ValueError:
+                raise ActualDataImportError(f"'{cell(row, 'year')}' is not a year", line)
+        yield (
+            line, date, year,
+            _parse_amount(cell(row, 'balance'), line),
+            _parse_amount(cell(row, 'contributions'), line),
+            _parse_amount(cell(row, 'growth'), line),
+        )
+
+def _iter_csv_rows(reader):
+    """Iterate a csv.reader, reporting rows it can't parse as import errors"""
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            raise ActualDataImportError(f"Invalid CSV: {e}", reader.line_num)
+        yield row
+
+def iter_ofx_records(stream):
+    """
+    Parse an OFX (SGML or XML) statement one tag at a time
+
+    Each <STMTTRN> becomes a contribution, or growth for OFX_GROWTH_TYPES, dated by its
+    DTPOSTED. Each <LEDGERBAL> becomes a balance dated by its DTASOF.
+
+    Args:
+        stream: Text stream from open_upload
+
+    Yields:
+        tuple: (line, date, year, balance, contributions, growth), values None when absent
+    """
+    block = None
+    fields = {}
+    for line, text in enumerate(stream, start=1):
+        for closing, tag, value in _OFX_TAG.findall(text):
+            tag = tag.upper()
+            if tag in ('STMTTRN', 'LEDGERBAL'):
+                if not closing:
+                    block, fields = tag, {}
+                    continue
+                if block == 'STMTTRN':
+                    date = _parse_date(fields.get('DTPOSTED'), line)
+                    amount = _parse_amount(fields.get('TRNAMT'), line) or 0.0
+                    if fields.get('TRNTYPE', '').upper() in OFX_GROWTH_TYPES:
+                        yield line, date, date.year, None, None, amount
+                    else:
+                        yield line, date, date.year, None, amount, None
+                elif block == 'LEDGERBAL':
+                    date = _parse_date(fields.get('DTASOF'), line)
+                    yield line, date, date.year, _parse_amount(fields.get('BALAMT'), line), None, None
+                block = None
+            elif block is not None and not closing:
+                fields[tag] = value.strip()
+
+def aggregate_actual_data(records):
+    """
+    Aggregate dated records to one actual_data entry per year
+
+    A year's balance is the balance with the latest date in that year (the last one in
+    the file for equal or missing dates); contributions and growth are summed. Memory
+    is bounded by the number of years, not of records.
+
+    Args:
+        records (iterable): Records from iter_csv_records or iter_ofx_records
+
+    Returns:
+        tuple: (actual_data entries sorted by year, number of records)
+    """
+    years = {}
+    num_records = 0
+    for line, date, year, balance, contributions, growth in records:
+        num_records += 1
+        totals = years.setdefault(year, {'balance': None, 'balance_date': None, 'contributions': 0.0, 'growth': 0.0})
+        if balance is not None and (totals['balance_date'] is None or date is None or date >= totals['balance_date']):
+            totals['balance'] = balance
+            totals['balance_date'] = date
+        totals['contributions'] += contributions or 0.0
+        totals['growth'] += growth or 0.0
+
+    actual_data = []
+    for year in sorted(years):
+        totals = years[year]
+        if totals['balance'] is None:
+            raise ActualDataImportError(f"Year {year} has no balance")
+        actual_data.append({
+            'year': year,
+            'actual_balance': round(totals['balance'], 2),
+            'actual_contributions': round(totals['contributions'], 2),
+            'actual_growth': round(totals['growth'], 2),
+        })
+    return actual_data, num_records
+
+def parse_actual_data_import(body, import_format=None, content_type=None):
+    """
+    Stream-parse an upload into per-year actual_data
+
+    Args:
+        body (str or bytes): Uploaded file
+        import_format (str): IMPORT_FORMAT_CSV or IMPORT_FORMAT_OFX, detected if None
+        content_type (str): Request Content-Type, used for detection (optional)
+
+    Returns:
+        tuple: (actual_data entries sorted by year, number of records)
+
+    Raises:
+        ActualDataImportError: If the upload can't be parsed
+    """
+    stream = open_upload(body)
+    try:
+        import_format = import_format or detect_import_format(content_type, stream)
+        if import_format == IMPORT_FORMAT_OFX:
+            return aggregate_actual_data(iter_ofx_records(stream))
+        return aggregate_actual_data(iter_csv_records(stream))
+    except UnicodeDecodeError:
+        raise ActualDataImportError("The file is not UTF-8 text", _invalid_utf8_line(body))
+
+def merge_actual_data(existing_actual_data, imported_actual_data):
+    """
+    Merge imported years into a fund's actual_data; imported years replace stored ones
+
+    Args:
+        existing_actual_data (list): Stored actual_data entries
+        imported_actual_data (list): Entries from parse_actual_data_import
+
+    Returns:
+        list: Merged entries sorted by year
+    """
+    by_year = {int(entry['year']): entry for entry in existing_actual_data or [] if entry.get('year') is not None}
+    for entry in imported_actual_data:
+        by_year[entry['year']] = entry
+    return [by_year[year] for year in sorted(by_year)]
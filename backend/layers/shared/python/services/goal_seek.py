@@ -0,0 +1,467 @@
+# Goal-seek solver - finds the contribution, retirement age or return that reaches a target balance at retirement
+import math
+from datetime import datetime
+import numpy as np
+
+from services.retirement_calculator import compile_household_schedules, MONTE_CARLO_VOLATILITY, MONTE_CARLO_SEED
+from utils.metrics import timed
+from utils.validators import validate_numeric_range
+
+# Inputs the solver can find
+SOLVE_CONTRIBUTION = 'contribution'  # minimum regular_contribution of one fund, applied like the calculator
+SOLVE_RETIREMENT_AGE = 'retirement_age'  # earliest retirement age of one family member
+SOLVE_RETURN_RATE = 'return_rate'  # minimum annual return of the funds, from this year on
+SOLVE_FOR = (SOLVE_CONTRIBUTION, SOLVE_RETIREMENT_AGE, SOLVE_RETURN_RATE)
+
+# Retirement ages the family info model accepts
+MIN_RETIREMENT_AGE = 50
+MAX_RETIREMENT_AGE = 80
+
+# Search bounds: contribution per period, annual return rate (0.05 = 5%)
+MAX_CONTRIBUTION = 10 ** 7
+MIN_RETURN_RATE = -0.5
+MAX_RETURN_RATE = 0.5
+CONTRIBUTION_TOLERANCE = 0.01
+RETURN_RATE_TOLERANCE = 1e-5
+
+# Monte Carlo paths when a target probability is given, fewer than the GET default since
+# solving for a return simulates them again on every step
+GOAL_SEEK_PATHS = 2000
+
+class GoalSeekError(ValueError):
+    # Request the solver can't answer, e.g. an unknown fund or a member past retirement
+    pass
+
+def parse_goal_seek_request(data):
+    """
+    Validate a goal-seek request body
+
+    Args:
+        data (dict): Request body, e.g. {"solve_for": "contribution", "target_balance": 1000000,
+            "fund_id": "...", "target_probability": 0.9}
+    Returns:
+        dict: Normalized request for solve_goal
+    Raises:
+        GoalSeekError: If a field is missing or invalid
+    """
+    solve_for = data.get('solve_for')
+    if solve_for not in SOLVE_FOR:
+        raise GoalSeekError(f"solve_for must be one of {', '.join(SOLVE_FOR)}")
+    if data.get('target_balance') is None:
+        raise GoalSeekError("target_balance is required")
+
+    # Optional Monte Carlo target, e.g. "target_probability": 0.9 with paths, volatility and seed as in the GET
+    values = {
+        'target_balance': data['target_balance'],
+        'target_probability': data.get('target_probability'),
+        'paths': data.get('paths', GOAL_SEEK_PATHS),
+        'volatility': data.get('volatility', MONTE_CARLO_VOLATILITY),
+        'seed': data.get('seed', MONTE_CARLO_SEED),
+    }
+    ranges = [('target_balance', 0, None)]
+    if values['target_probability'] is not None:
+        ranges += [('target_probability', 0.01, 0.99), ('paths', 1, 100000), ('volatility', 0, 1), ('seed', 0, None)]
+    for name, min_value, max_value in ranges:
+        is_valid, error_message = validate_numeric_range(values[name], min_value, max_value, name)
+        if not is_valid:
+            raise GoalSeekError(error_message)
+
+    return {
+        'solve_for': solve_for,
+        'target_balance': float(values['target_balance']),
+        'target_probability': None if values['target_probability'] is None else float(values['target_probability']),
+        'family_member_id': data.get('family_member_id'),
+        'fund_id': data.get('fund_id'),
+        'paths': int(float(values['paths'])),
+        'volatility': float(values['volatility']),
+        'seed': int(float(values['seed'])),
+    }
+
+@timed('solve_goal')
+def solve_goal(retirement_data, request, now=None):
+    """
+    Find the input that makes the balance at retirement reach a target
+
+    The balance at retirement is the sum, over the funds in scope (one family member's
+    funds, or the household's), of each fund's balance when its owner retires. With a
+    target_probability, the target is reached when that share of Monte Carlo paths
+    (drawn like simulate_retirement_projection, the same paths for every evaluation)
+    ends at or above the target balance.
+
+    A contribution is solved as the fund's regular_contribution, which the calculator
+    applies to every year no contribution band covers, so saving the value reproduces
+    the balance. The balance is affine in it, so one pass prices every contribution; one
+    pass over the years gives the balance at every retirement age; the return rate is
+    bracketed by _solve_increasing, one closed-form evaluation per step.
+
+    Args:
+        retirement_data (dict): Retirement data, as returned by db_get_retirement_data
+        request (dict): Request from parse_goal_seek_request
+        now (datetime): Reference date for age calculations (optional, defaults to now)
+    Returns:
+        dict: The solved value (None if the target can't be reached within the search
+            bounds), the stored input, and the balance or probability with each
+    Raises:
+        GoalSeekError: If the scope has no fund or year to solve for
+    """
+    now = now or datetime.now()
+    solve_for = request['solve_for']
+    scope = _compile_scope(retirement_data, request, now)
+    stack = _stack_scope(scope, solve_for, now)
+    if solve_for == SOLVE_CONTRIBUTION and not stack['window']['solved'].any():
+        raise GoalSeekError("Contribution bands cover every year to retirement, regular_contribution doesn't change the balance")
+
+    shocks = None
+    if request['target_probability'] is not None:
+        # Drawn like simulate_retirement_projection: one shock per path and calendar year, shared by the funds
+        first_year = min(schedule['start_year'] for schedule in scope['schedules'])
+        last_year = max(schedule['start_year'] + len(schedule['ages']) - 1 for schedule in scope['schedules'])
+        draws = np.random.default_rng(request['seed']).standard_normal((request['paths'], last_year - first_year + 1))
+        shocks = _gather_shocks(draws, first_year, stack if solve_for == SOLVE_RETIREMENT_AGE else stack['window'])
+
+    def surplus(totals):
+        # totals: (candidate x path) balances at retirement. How far above the target (log
+        # scale, balances compound) the path deciding the target probability ends: the share
+        # of paths reaching the target is at least p exactly when the ceil(p * paths)-th
+        # largest balance reaches it
+        if shocks is None:
+            deciding = totals[:, 0]
+        else:
+            num_paths = totals.shape[1]
+            rank = num_paths - math.ceil(round(request['target_probability'] * num_paths, 9))
+            deciding = np.partition(totals, rank, axis=1)[:, rank]
+        return np.log1p(np.maximum(deciding, 0.0)) - math.log1p(request['target_balance'])
+
+    def metric(totals):
+        # Balance at retirement, or the share of paths reaching the target
+        if shocks is None:
+            return float(round(totals[0, 0], 2))
+        return float((totals[0] >= request['target_balance']).mean())
+
+    def balance_at_retirement(**kwargs):
+        balance, unit_balance = _balance_at_retirement(stack['window'], shocks=shocks, volatility=request['volatility'], **kwargs)
+        return balance.sum(axis=0), unit_balance.sum(axis=0)
+
+    if solve_for == SOLVE_CONTRIBUTION:
+        current_value = int(scope['fund']['regular_contribution'])
+        current = metric(balance_at_retirement()[0])
+        fixed, unit = balance_at_retirement(solve_contribution=True)
+        value, evaluations = _solve_increasing(
+            lambda contribution: surplus(fixed + contribution * unit)[0], 0, MAX_CONTRIBUTION, CONTRIBUTION_TOLERANCE
+        )
+        if value is not None:
+            # Whole amounts, like the stored regular_contribution
+            value = int(math.ceil(value))
+            achieved = metric(fixed + value * unit)
+    elif solve_for == SOLVE_RETIREMENT_AGE:
+        # The earliest age whose balance reaches the target, not a search: a bad year can
+        # make a later age fall short again
+        ages = np.arange(scope['min_age'], MAX_RETIREMENT_AGE + 1)
+        balances_by_age = _balances_by_retirement_age(stack, scope, ages, shocks, request['volatility'])
+        current_value = int(scope['member']['retirement_age'])
+        current = metric(balances_by_age[current_value - ages[0]][None]) if current_value >= ages[0] else None
+        reached = surplus(balances_by_age) >= 0
+        evaluations = len(ages)
+        value = int(ages[np.argmax(reached)]) if reached.any() else None
+        if value is not None:
+            achieved = metric(balances_by_age[value - ages[0]][None])
+    else:
+        current_value = None
+        current = metric(balance_at_retirement()[0])
+        value, evaluations = _solve_increasing(
+            lambda rate: surplus(balance_at_retirement(return_rate=np.array([rate]))[0])[0],
+            MIN_RETURN_RATE, MAX_RETURN_RATE, RETURN_RATE_TOLERANCE
+        )
+        if value is not None:
+            # Percent like return_rate_params, rounded up so the reported rate still reaches the target
+            value = math.ceil(round(value * 10000, 6)) / 100
+            achieved = metric(balance_at_retirement(return_rate=np.array([value * 0.01]))[0])
+
+    return {
+        'solve_for': solve_for,
+        'target_balance': request['target_balance'],
+        'target_probability': request['target_probability'],
+        'family_member_id': scope['member']['id'] if scope['member'] else None,
+        'fund_id': scope['fund']['id'] if scope['fund'] else None,
+        'value': value,
+        'reachable': value is not None,
+        'current_value': current_value,
+        'current': current,
+        'achieved': achieved if value is not None else None,
+        'evaluations': evaluations,
+    }
+
+def _compile_scope(retirement_data, request, now):
+    """Resolve the funds and member a request is about and compile their schedules"""
+    solve_for = request['solve_for']
+    family_info_data = retirement_data.get('family_info_data', [])
+    funds = retirement_data.get('retirement_fund_data', [])
+    members_by_id = {member['id']: member for member in family_info_data}
+
+    fund = None
+    if request['fund_id'] is not None:
+        fund = next((fund for fund in funds if fund.get('id') == request['fund_id']), None)
+        if fund is None:
+            raise GoalSeekError("Fund not found")
+    member_id = request['family_member_id'] or (fund and fund.get('family_member_id'))
+    if member_id is not None and member_id not in members_by_id:
+        raise GoalSeekError("Family member not found")
+
+    # The target is on the balance of one member's funds, or of the household's
+    scope_funds = [fund for fund in funds if member_id is None or fund.get('family_member_id') == member_id]
+    if solve_for == SOLVE_CONTRIBUTION and fund is None:
+        if len(scope_funds) != 1:
+            raise GoalSeekError("fund_id is required to solve for a contribution")
+        fund = scope_funds[0]
+    if solve_for == SOLVE_RETIREMENT_AGE and member_id is None:
+        if len(family_info_data) != 1:
+            raise GoalSeekError("family_member_id is required to solve for a retirement age")
+        member_id = family_info_data[0]['id']
+    member = members_by_id.get(member_id)
+
+    # Solving for the age projects the member's funds up to the latest age, and reads the
+    # balance at every candidate age along the way
+    if solve_for == SOLVE_RETIREMENT_AGE:
+        family_info_data = [
+            {**m, 'retirement_age': MAX_RETIREMENT_AGE} if m['id'] == member_id else m for m in family_info_data
+        ]
+    # Copies, compile_household_schedules sets an empty projection on funds without a member
+    compiled_funds, schedules = compile_household_schedules(
+        {'retirement_fund_data': [dict(fund) for fund in scope_funds]}, {'family_info_data': family_info_data}, now
+    )
+
+    retirement_ages = {m['id']: int(m['retirement_age']) for m in family_info_data}
+    scope = {'fund': fund, 'member': member, 'funds': [], 'schedules': [], 'retirement_offsets': []}
+    for compiled_fund, schedule in zip(compiled_funds, schedules):
+        # Funds whose owner retired before this year have a balance at retirement nothing can change
+        offset = retirement_ages[compiled_fund['family_member_id']] - int(schedule['ages'][0])
+        if offset < 0 or schedule['start_year'] + offset < now.year:
+            continue
+        scope['funds'].append(compiled_fund)
+        scope['schedules'].append(schedule)
+        scope['retirement_offsets'].append(offset)
+
+    if fund is not None and solve_for == SOLVE_CONTRIBUTION and fund.get('id') not in {f.get('id') for f in scope['funds']}:
+        raise GoalSeekError("The fund's owner is past retirement")
+    if solve_for == SOLVE_RETIREMENT_AGE:
+        dob = datetime.strptime(member['date_of_birth'], '%Y-%m-%d')
+        scope['min_age'] = max(MIN_RETIREMENT_AGE, (now - dob).days // 365)
+        if scope['min_age'] > MAX_RETIREMENT_AGE:
+            raise GoalSeekError(f"The family member is past the latest retirement age of {MAX_RETIREMENT_AGE}")
+    if not scope['schedules']:
+        raise GoalSeekError("No fund to solve for, every fund in scope is past retirement")
+    return scope
+
+def _stack_scope(scope, solve_for, now):
+    """
+    Stack the schedules of the scope up to each fund's retirement into padded (fund x year) arrays
+
+    Actual data re-anchors the balance, so a fund's balance at retirement only depends on
+    its last actual balance before retirement and the years stepped after it. Those years
+    are also stacked on their own, right-aligned at retirement, in stack['window'].
+    """
+    schedules = scope['schedules']
+    fields = ('return_rate', 'contribution_amount', 'contribution_frequency', 'has_actual', 'actual_balance')
+    width = max(scope['retirement_offsets'])
+    stack = _padded_arrays(len(schedules), width, fields + ('active', 'solved', 'year'))
+    start_balance = np.zeros(len(schedules))
+    stepped_ranges = []
+    for row, (fund, schedule, offset) in enumerate(zip(scope['funds'], schedules, scope['retirement_offsets'])):
+        for name in fields:
+            stack[name][row, :offset] = schedule[name][:offset]
+        years = schedule['start_year'] + np.arange(offset)
+        stack['year'][row, :offset] = years
+        stack['active'][row, :offset] = True
+        # The solved contribution applies where the calculator uses the solved fund's
+        # regular_contribution, the solved return from this year on to every fund in scope
+        if solve_for == SOLVE_CONTRIBUTION:
+            if fund.get('id') == scope['fund'].get('id'):
+                stack['solved'][row, :offset] = schedule['regular_contribution_years'][:offset]
+        elif scope['fund'] is None or fund.get('id') == scope['fund'].get('id'):
+            stack['solved'][row, :offset] = years >= now.year
+
+        anchors = np.flatnonzero(schedule['has_actual'][:offset])
+        start_balance[row] = schedule['actual_balance'][anchors[-1]] if len(anchors) else schedule['initial_investment']
+        stepped_ranges.append((anchors[-1] + 1 if len(anchors) else 0, offset))
+    stack['initial_investment'] = np.array([schedule['initial_investment'] for schedule in schedules], dtype=float)
+
+    window_width = max(end - start for start, end in stepped_ranges)
+    window = _padded_arrays(len(schedules), window_width, ('return_rate', 'contribution_amount', 'contribution_frequency', 'solved', 'active', 'year'))
+    for row, (start, end) in enumerate(stepped_ranges):
+        for name in ('return_rate', 'contribution_amount', 'contribution_frequency', 'solved', 'active', 'year'):
+            window[name][row, window_width - (end - start):] = stack[name][row, start:end]
+    window['start_balance'] = start_balance
+    stack['window'] = window
+
+    # Padding reads the shocks of a year in range, and never moves a balance
+    for arrays in (stack, window):
+        if arrays['active'].any():
+            arrays['year'][~arrays['active']] = arrays['year'][arrays['active']].min()
+    return stack
+
+def _padded_arrays(num_funds, width, names):
+    """(fund x year) arrays a padded year leaves a balance unchanged in: no return and no contribution"""
+    fills = {'contribution_frequency': 1, 'active': False, 'solved': False, 'has_actual': False, 'year': 0}
+    return {name: np.full((num_funds, width), fills.get(name, 0.0), dtype=type(fills.get(name, 0.0))) for name in names}
+
+def _gather_shocks(draws, first_year, arrays):
+    """
+    Shocks of the stacked years, from (path x calendar year) draws
+
+    Returns:
+        ndarray: (fund x 1 x path x year) shocks, zero in padding
+    """
+    shocks = draws[:, arrays['year'] - first_year].transpose(1, 0, 2)
+    shocks *= arrays['active'][:, None, :]
+    return shocks[:, None]
+
+def _compound(rate, frequency):
+    """
+    Growth of a balance and of one contribution per period over a year
+
+    Same closed form as compile_fund_schedule: balance * g + contribution * (1 + i) * (g - 1) / i,
+    with i = rate / frequency and g = (1 + i) ** frequency.
+
+    Returns:
+        tuple: (growth factor, growth of one contribution per period)
+    """
+    periodic_rate = rate / frequency
+    growth_factor = (1 + periodic_rate) ** frequency
+    with np.errstate(divide='ignore', invalid='ignore'):
+        unit_growth = np.where(periodic_rate == 0, frequency, (1 + periodic_rate) * (growth_factor - 1) / periodic_rate)
+    return growth_factor, unit_growth
+
+def _yearly_rates(arrays, return_rate=None, shocks=None, volatility=0.0):
+    """Annual return of each (fund x candidate x path x year), shocked when shocks are given"""
+    rate = arrays['return_rate'][:, None, None, :]
+    if return_rate is not None:
+        rate = np.where(arrays['solved'][:, None, None, :], return_rate[None, :, None, None], rate)
+    if shocks is not None:
+        rate = np.maximum(rate + volatility * shocks, -1.0)
+    return rate
+
+def _balance_at_retirement(window, return_rate=None, solve_contribution=False, shocks=None, volatility=0.0):
+    """
+    Balance of each fund when its owner retires, in closed form over the year axis
+
+    The balance is the start balance grown over every stepped year, plus each year's
+    contributions grown over the years after it: suffix products of the growth
+    factors, with no loop over years.
+
+    Args:
+        window (dict): stack['window'] from _stack_scope
+        return_rate (ndarray): Candidate annual rates for the solved years (optional)
+        solve_contribution (bool): Leave the contributions of the solved years out of the
+            balance and also return the balance one contribution per period in them adds
+        shocks (ndarray): Shocks of the window from _gather_shocks (optional)
+        volatility (float): Standard deviation of annual returns
+    Returns:
+        tuple: (fund x candidate x path) balances, and the balance per unit of solved
+            contribution (zeros unless solve_contribution)
+    """
+    growth_factor, unit_growth = _compound(
+        _yearly_rates(window, return_rate, shocks, volatility), window['contribution_frequency'][:, None, None, :]
+    )
+    # Growth from the start of each year to retirement, and from its end
+    remaining_growth = np.cumprod(growth_factor[..., ::-1], axis=-1)[..., ::-1]
+    contribution_weight = unit_growth
+    contribution_weight[..., :-1] *= remaining_growth[..., 1:]
+
+    contribution_amount = window['contribution_amount'][:, None, None, :]
+    unit_balance = np.zeros(contribution_weight.shape[:-1])
+    if solve_contribution:
+        solved = window['solved'][:, None, None, :]
+        contribution_amount = np.where(solved, 0.0, contribution_amount)
+        unit_balance = (contribution_weight * solved).sum(axis=-1)
+    balance = window['start_balance'][:, None, None] * remaining_growth[..., 0] + (contribution_weight * contribution_amount).sum(axis=-1)
+    return balance, unit_balance
+
+def _balances_by_retirement_age(stack, scope, ages, shocks=None, volatility=0.0):
+    """
+    Balance at retirement for every candidate retirement age of the member
+
+    The member's funds are stacked up to MAX_RETIREMENT_AGE; their balance at the start
+    of each year is the balance at retirement for that year's age, so one pass over the
+    years gives every candidate.
+
+    Returns:
+        ndarray: (age x path) balances
+    """
+    growth_factor, unit_growth = _compound(
+        _yearly_rates(stack, shocks=shocks, volatility=volatility)[:, 0], stack['contribution_frequency'][:, None, :]
+    )
+    contribution_growth = stack['contribution_amount'][:, None, :] * unit_growth
+    num_funds, width = stack['active'].shape
+    balance = np.broadcast_to(stack['initial_investment'][:, None], (num_funds, growth_factor.shape[1])).copy()
+    # (fund x year x path) balances at the start of each year, and after the last one
+    begin_balances = np.empty((num_funds, width + 1, growth_factor.shape[1]))
+    for year in range(width):
+        begin_balances[:, year] = balance
+        active = stack['active'][:, year, None]
+        balance = np.where(active, balance * growth_factor[..., year] + contribution_growth[..., year], balance)
+        anchored = active & stack['has_actual'][:, year, None]
+        balance = np.where(anchored, stack['actual_balance'][:, year, None], balance)
+    begin_balances[:, width] = balance
+
+    member_id = scope['member']['id']
+    totals = np.zeros((len(ages), begin_balances.shape[-1]))
+    for row, (fund, schedule) in enumerate(zip(scope['funds'], scope['schedules'])):
+        if fund['family_member_id'] != member_id:
+            # Other members keep their retirement age
+            totals += balance[row]
+            continue
+        # Retiring before the fund starts leaves it nothing at retirement
+        offsets = ages - int(schedule['ages'][0])
+        started = offsets >= 0
+        totals[started] += begin_balances[row, offsets[started]]
+    return totals
+
+def _solve_increasing(surplus, low, high, tolerance):
+    """
+    Smallest value in [low, high] with a non-negative surplus, to within tolerance
+
+    Regula falsi with the Illinois modification: keeps a bracket around the root like
+    bisection, but steps to where the line between its ends crosses zero, so a smooth
+    surplus converges in a few evaluations (about three for an affine one). A step that
+    doesn't halve the bracket is followed by a bisection step. Assumes the surplus grows
+    with the value.
+
+    Args:
+        surplus (callable): value -> float, non-negative where the target is reached
+        low (float): Lower bound of the search
+        high (float): Upper bound of the search
+        tolerance (float): Width of the final bracket
+    Returns:
+        tuple: (value or None if high falls short of the target, number of evaluations)
+    """
+    surplus_low, surplus_high = surplus(low), surplus(high)
+    evaluations = 2
+    if surplus_high < 0:
+        return None, evaluations
+    if surplus_low >= 0:
+        return float(low), evaluations
+
+    side = 0
+    bisect = False
+    while high - low > tolerance:
+        width = high - low
+        if bisect:
+            value = (low + high) / 2
+        else:
+            value = high - surplus_high * width / (surplus_high - surplus_low)
+        # Stay inside the bracket, so every step shrinks it
+        value = min(max(value, low + tolerance / 2), high - tolerance / 2)
+        value_surplus = surplus(value)
+        evaluations += 1
+        if value_surplus >= 0:
+            high, surplus_high = value, value_surplus
+            if side == 1:
+                surplus_low /= 2
+            side = 1
+        else:
+            low, surplus_low = value, value_surplus
+            if side == -1:
+                surplus_high /= 2
+            side = -1
+        bisect = not bisect and high - low > width / 2
+    return float(high), evaluations
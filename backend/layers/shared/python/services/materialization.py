@@ -0,0 +1,347 @@
+# Projection materialization - GET responses computed after each write by a worker and stored with the data
+import base64
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import date, datetime, timedelta
+from urllib.parse import quote, unquote
+
+from db import storage
+from services.projection_cache import PROJECTION_OUTPUT_KEYS
+from services.projection_result import RESULT_ROWS, projection_json_default
+from utils.metrics import timed
+from utils.response import GZIP_LEVEL, etag_for, json_dumps_bytes
+
+logger = logging.getLogger(__name__)
+
+# Queue of recompute jobs, one job per user whose data changed:
+# 'none' turns materialization off (every GET computes inline), 'inline' runs jobs on a thread
+# of the writing process (dev server, tests), 'file' leaves one job file per user in
+# MATERIALIZATION_QUEUE_DIR for scripts/materialize.py, 'sqs' sends them to the SQS queue
+# MATERIALIZATION_QUEUE_URL that the materialize-projections function consumes
+QUEUE_NONE = 'none'
+QUEUE_INLINE = 'inline'
+QUEUE_FILE = 'file'
+QUEUE_SQS = 'sqs'
+MATERIALIZATION_QUEUE = os.environ.get('MATERIALIZATION_QUEUE', QUEUE_NONE)
+MATERIALIZATION_QUEUE_DIR = os.environ.get('MATERIALIZATION_QUEUE_DIR', 'materialization-queue')
+MATERIALIZATION_QUEUE_URL = os.environ.get('MATERIALIZATION_QUEUE_URL')
+
+# Larger responses are left to the GET (DynamoDB items are limited to 400 KB): the
+# materialized projection is stored without a body, so the GET projects inline but doesn't
+# queue the recompute again until the data changes or the projection expires
+MATERIALIZED_MAX_BYTES = int(os.environ.get('MATERIALIZED_MAX_BYTES', 300 * 1024))
+
+# Users read and projected together by materialize_all_users
+BULK_BATCH_SIZE = 100
+
+def projection_source_version(retirement_data):
+    """
+    Version of the stored inputs a projection is computed from
+
+    Args:
+        retirement_data (dict): Retirement data, as returned by db_get_retirement_data
+    Returns:
+        str: Quoted hash of the family info and the funds without their computed outputs
+    """
+    funds = [
+        {k: v for k, v in fund.items() if k not in PROJECTION_OUTPUT_KEYS}
+        for fund in retirement_data.get('retirement_fund_data', [])
+    ]
+    return etag_for(retirement_data.get('family_info_data', []), funds)
+
+def projection_valid_until(family_info_data, now):
+    """
+    First day a projection computed at now changes without a write
+
+    Ages are computed as whole 365-day years since the date of birth, and the projection
+    starts at the current year, so it changes on the next such "birthday" or on New Year's Day.
+
+    Args:
+        family_info_data (list): Family members
+        now (datetime): Date the projection was computed at
+    Returns:
+        date: First day the projection is stale
+    """
+    valid_until = date(now.year + 1, 1, 1)
+    for member in family_info_data:
+        dob = datetime.strptime(member['date_of_birth'], '%Y-%m-%d')
+        age = (now - dob).days // 365
+        valid_until = min(valid_until, (dob + timedelta(days=365 * (age + 1))).date())
+    return valid_until
+
+def is_fresh(materialized, source_version, today):
+    """
+    Check whether a materialized projection is current
+
+    A current projection without a body (the response was over MATERIALIZED_MAX_BYTES)
+    can't answer the GET, but recomputing it wouldn't store one either.
+
+    Args:
+        materialized (dict): Materialized projection stored with the data, or None
+        source_version (str): projection_source_version of the data it was read with
+        today (date): Date of the request
+    Returns:
+        bool: True if it was computed from this data and is still valid today
+    """
+    return (
+        materialized is not None
+        and materialized.get('source_version') == source_version
+        and today.isoformat() < materialized.get('valid_until', '')
+    )
+
+def build_materialization(retirement_data, now=None):
+    """
+    Project retirement data and build its materialized GET response
+
+    The body is the rows-format response of get-retirement-data, serialized and gzip
+    compressed. The projection is set on the document's funds.
+
+    Args:
+        retirement_data (dict): Retirement data without a materialized projection
+        now (datetime): Date the projection is computed at (optional, defaults to now)
+    Returns:
+        dict: Materialized projection, with a body of None if the response is over MATERIALIZED_MAX_BYTES
+    """
+    from services.retirement_calculator import calculate_retirement_projection
+
+    now = now or datetime.now()
+    source_version = projection_source_version(retirement_data)
+    calculate_retirement_projection(retirement_data, retirement_data, result_format=RESULT_ROWS)
+    return _pack(retirement_data, source_version, now)
+
+def _pack(retirement_data, source_version, now):
+    # Same body as the rows-format response of get-retirement-data
+    response_data = {
+        'retirement_fund_data': retirement_data.get('retirement_fund_data', []),
+        'family_info_data': retirement_data.get('family_info_data', [])
+    }
+    body = gzip.compress(json_dumps_bytes(response_data, default=projection_json_default), compresslevel=GZIP_LEVEL, mtime=0)
+    body = base64.b64encode(body).decode('ascii')
+    if len(body) > MATERIALIZED_MAX_BYTES:
+        body = None
+    return {
+        'source_version': source_version,
+        'valid_until': projection_valid_until(retirement_data.get('family_info_data', []), now).isoformat(),
+        'materialized_at': now.isoformat(),
+        'body': body,
+    }
+
+@timed('materialize_user')
+def materialize_user(user_id):
+    """
+    Recompute and store a user's materialized projection (the job of the queue workers)
+
+    Args:
+        user_id (str): User ID
+    Returns:
+        bool: True if stored, False if the user has no data or the write failed
+    """
+    retirement_data = storage.db_get_retirement_data(user_id)
+    if not retirement_data:
+        return False
+    retirement_data.pop(storage.MATERIALIZED_PROJECTION_KEY, None)
+
+    materialized = build_materialization(retirement_data)
+    return storage.db_put_materialized_projection(user_id, materialized)
+
+def materialize_all_users(batch_size=BULK_BATCH_SIZE):
+    """
+    Re-materialize every user, e.g. when the year rolls over and every projection goes stale
+
+    Users are projected batch_size at a time with one vectorized pass per batch.
+
+    Args:
+        batch_size (int): Users per batch
+    Returns:
+        int: Number of users materialized
+    """
+    count = 0
+    now = datetime.now()
+    batch = []
+    for user_id in storage.db_iter_user_ids():
+        retirement_data = storage.db_get_retirement_data(user_id)
+        if not retirement_data:
+            continue
+        retirement_data.pop(storage.MATERIALIZED_PROJECTION_KEY, None)
+        # Versioned before the projection adds its outputs to the funds
+        retirement_data['_source_version'] = projection_source_version(retirement_data)
+        batch.append(retirement_data)
+        if len(batch) >= batch_size:
+            count += _materialize_batch(batch, now)
+            batch = []
+    if batch:
+        count += _materialize_batch(batch, now)
+    return count
+
+def _materialize_batch(batch, now):
+    from services.retirement_calculator import calculate_retirement_projection, calculate_retirement_projections_batch
+
+    try:
+        projected = list(calculate_retirement_projections_batch(batch, batch_size=len(batch)))
+    except Exception as e:
+        # One user's data failing to project fails the whole pass, so project them one by one
+        logger.warning(f"Error materializing a batch of {len(batch)} users, retrying them one by one: {str(e)}")
+        projected = []
+        for retirement_data in batch:
+            try:
+                calculate_retirement_projection(retirement_data, retirement_data, result_format=RESULT_ROWS)
+                projected.append(retirement_data)
+            except Exception as e:
+                logger.error(f"Error materializing projection of {retirement_data.get('user_id')}: {str(e)}", exc_info=True)
+
+    count = 0
+    for retirement_data in projected:
+        materialized = _pack(retirement_data, retirement_data.pop('_source_version'), now)
+        if storage.db_put_materialized_projection(retirement_data['user_id'], materialized):
+            count += 1
+    return count
+
+class MaterializationQueue:
+    # Interface of a recompute job queue
+    def enqueue(self, user_id):
+        """Queue a recompute of a user's materialized projection"""
+        raise NotImplementedError
+
+class NullQueue(MaterializationQueue):
+    # Materialization turned off
+    def enqueue(self, user_id):
+        pass
+
+class InProcessQueue(MaterializationQueue):
+    # Jobs run on a daemon thread of this process; a user queued twice is recomputed once
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def enqueue(self, user_id):
+        with self._lock:
+            if user_id in self._pending:
+                return
+            self._pending.add(user_id)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='materialization', daemon=True)
+                self._thread.start()
+        self._queue.put(user_id)
+
+    def _run(self):
+        while True:
+            user_id = self._queue.get()
+            with self._lock:
+                self._pending.discard(user_id)
+            try:
+                materialize_user(user_id)
+            except Exception as e:
+                logger.error(f"Error materializing projection of {user_id}: {str(e)}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def join(self):
+        """Wait until every queued job has run"""
+        self._queue.join()
+
+class FileQueue(MaterializationQueue):
+    # One job file per user in a directory, shared by every local process; drained by scripts/materialize.py
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def enqueue(self, user_id):
+        # Write and rename so the drain never reads a partial file; a pending job for the user is just replaced
+        path = os.path.join(self.directory, f'{quote(user_id, safe="")}.job')
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(user_id)
+        os.replace(temp_path, path)
+
+    def drain(self):
+        """
+        Run every queued job
+
+        Each job file is claimed by renaming it first, so several drains can run at once.
+
+        Returns:
+            int: Number of jobs run
+        """
+        count = 0
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith('.job'):
+                continue
+            path = os.path.join(self.directory, name)
+            claimed_path = f'{path}.{os.getpid()}.claimed'
+            try:
+                os.rename(path, claimed_path)
+            except FileNotFoundError:
+                continue  # claimed by another drain
+            try:
+                materialize_user(unquote(name[:-len('.job')]))
+                count += 1
+            finally:
+                os.remove(claimed_path)
+        return count
+
+class SQSQueue(MaterializationQueue):
+    # Jobs sent to an SQS queue, consumed by the materialize-projections function
+    def __init__(self, queue_url):
+        self.queue_url = queue_url
+        self._client = None
+
+    def enqueue(self, user_id):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('sqs')
+        self._client.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps({'user_id': user_id}))
+
+# Process-wide queue, created on first use
+_queue = None
+_queue_lock = threading.Lock()
+
+def _create_queue(name):
+    if name == QUEUE_NONE:
+        return NullQueue()
+    if name == QUEUE_INLINE:
+        return InProcessQueue()
+    if name == QUEUE_FILE:
+        return FileQueue(MATERIALIZATION_QUEUE_DIR)
+    if name == QUEUE_SQS:
+        return SQSQueue(MATERIALIZATION_QUEUE_URL)
+    raise ValueError(f"Unknown MATERIALIZATION_QUEUE '{name}', expected one of {QUEUE_NONE}, {QUEUE_INLINE}, {QUEUE_FILE}, {QUEUE_SQS}")
+
+def get_materialization_queue():
+    """Get the configured queue, creating it on first use"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = _create_queue(MATERIALIZATION_QUEUE)
+    return _queue
+
+def set_materialization_queue(materialization_queue):
+    """Replace the queue of this process (e.g. an InProcessQueue in benchmarks), None to create the configured one again"""
+    global _queue
+    with _queue_lock:
+        _queue = materialization_queue
+
+def enqueue_materialization(user_id):
+    """
+    Queue a recompute of a user's materialized projection after a write
+
+    A failed enqueue is logged, not raised: the write already succeeded, and the GET
+    computes inline until the projection is materialized again.
+
+    Args:
+        user_id (str): User whose data changed
+    Returns:
+        bool: True if queued (or materialization is off)
+    """
+    try:
+        get_materialization_queue().enqueue(user_id)
+        return True
+    except Exception as e:
+        logger.error(f"Error queueing materialization of {user_id}: {str(e)}", exc_info=True)
+        return False
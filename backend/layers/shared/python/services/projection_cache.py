@@ -0,0 +1,229 @@
+# Projection cache - content-addressed cache of per-fund retirement projections
+#
+# Entries are never invalidated: the key hashes every projection input, so an edit to a
+# fund or its family member changes the key and the stale entry simply ages out of the
+# LRU. That is the consistency guarantee across Lambda processes, which don't share
+# their in-process caches and can't evict each other's entries.
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from services.projection_result import FundProjection, RESULT_ROWS, RESULT_COLUMNS, projection_json_default
+from utils.metrics import record, timed
+
+# Keys that are computed outputs rather than projection inputs
+PROJECTION_OUTPUT_KEYS = ('retirement_projection', 'retirement_simulation')
+
+# Fund keys that don't change the projection (outputs and the storage version)
+NON_PROJECTION_FUND_KEYS = PROJECTION_OUTPUT_KEYS + ('version',)
+
+class FileProjectionStore:
+    # Persisted cache tier, one JSON file per cache key
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'r') as f:
+                projection = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Columnar projections are stored in their JSON shape
+        if isinstance(projection, dict):
+            return FundProjection.from_columns(projection)
+        return projection
+
+    def put(self, key, projection):
+        # Write to a temp file and rename so readers never see a partial file
+        temp_path = f'{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(projection, f, default=projection_json_default)
+        os.replace(temp_path, self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+class ProjectionCache:
+    # In-process LRU of fund projections with an optional persisted tier behind it
+    def __init__(self, max_entries=1024, store=None, max_checkpoint_users=256):
+        self.max_entries = max_entries
+        self.store = store
+        self.max_checkpoint_users = max_checkpoint_users
+        self._entries = OrderedDict()
+        self._checkpoints = OrderedDict()  # user_id -> projection checkpoints, in-process only
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get a cached projection
+
+        Args:
+            key (str): Cache key from projection_cache_key
+
+        Returns:
+            list: Cached projection rows (or FundProjection) or None on a miss
+        """
+        with self._lock:
+            projection = self._entries.get(key)
+            if projection is not None:
+                self._entries.move_to_end(key)
+                return projection
+
+        if self.store is None:
+            return None
+
+        projection = self.store.get(key)
+        if projection is not None:
+            self._put_local(key, projection)
+        return projection
+
+    def put(self, key, projection):
+        """
+        Cache a projection
+
+        Args:
+            key (str): Cache key from projection_cache_key
+            projection (list): Projection rows or FundProjection
+        """
+        self._put_local(key, projection)
+        if self.store is not None:
+            self.store.put(key, projection)
+
+    def _put_local(self, key, projection):
+        with self._lock:
+            self._entries[key] = projection
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_checkpoints(self, user_id):
+        """Get the checkpoints of a user's last projected funds (see calculate_projection_checkpoints), or None"""
+        with self._lock:
+            checkpoints = self._checkpoints.get(user_id)
+            if checkpoints is not None:
+                self._checkpoints.move_to_end(user_id)
+            return checkpoints
+
+    def put_checkpoints(self, user_id, checkpoints):
+        """Keep a user's projection checkpoints, replacing the previous ones"""
+        with self._lock:
+            self._checkpoints[user_id] = checkpoints
+            self._checkpoints.move_to_end(user_id)
+            while len(self._checkpoints) > self.max_checkpoint_users:
+                self._checkpoints.popitem(last=False)
+
+    def clear(self):
+        """Drop every in-process entry (the persisted tier is left as is)"""
+        with self._lock:
+            self._entries.clear()
+            self._checkpoints.clear()
+
+def stable_hash(obj):
+    """Hash a JSON-like document independently of key order (Decimals hash by their string form)"""
+    encoded = json.dumps(obj, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def projection_cache_key(fund, family_member, latest_retirement_year, now):
+    """
+    Build the cache key of a fund projection
+
+    The projection depends on the fund, its family member, the household's latest
+    retirement year (which sets the end of the projection) and the date the ages are
+    computed from, reduced to the current year and the member's current age.
+
+    Args:
+        fund (dict): Retirement fund data
+        family_member (dict): Family member the fund belongs to
+        latest_retirement_year (int): Latest retirement year across the family
+        now (datetime): Reference date for age calculations
+
+    Returns:
+        str: Hex digest identifying the projection
+    """
+    fund_inputs = {k: v for k, v in fund.items() if k not in NON_PROJECTION_FUND_KEYS}
+    dob = datetime.strptime(family_member['date_of_birth'], '%Y-%m-%d')
+    age = (now - dob).days // 365
+    return stable_hash([fund_inputs, family_member, latest_retirement_year, now.year, age])
+
+def _create_default_cache():
+    cache_dir = os.environ.get('PROJECTION_CACHE_DIR')
+    return ProjectionCache(
+        max_entries=int(os.environ.get('PROJECTION_CACHE_SIZE', 1024)),
+        store=FileProjectionStore(cache_dir) if cache_dir else None
+    )
+
+# Module-level cache so entries survive warm Lambda invocations
+projection_cache = _create_default_cache()
+
+@timed('calculate_retirement_projection_cached')
+def calculate_retirement_projection_cached(retirement_fund_info, family_info, user_id=None, cache=None, result_format=RESULT_ROWS):
+    """
+    Calculate retirement projection, reusing cached projections of unchanged funds.
+
+    Only funds that miss the cache are projected. With a user_id, rows-format misses are
+    replayed from the user's checkpoints (update_retirement_projection), so an edited
+    fund is only recomputed from the first year its inputs changed. Cached rows are
+    shared between requests and must be treated as read-only.
+
+    Args:
+        retirement_fund_info (dict): Dictionary containing retirement fund data
+        family_info (dict): Dictionary containing family information data
+        user_id (str): Owner of the funds, used to replay from their checkpoints (optional)
+        cache (ProjectionCache): Cache to use, defaults to the module-level cache
+        result_format (str): RESULT_ROWS (default) or RESULT_COLUMNS
+    """
+    # The calculator (numpy) loads on first projection, not when this module is imported
+    from services.retirement_calculator import (
+        calculate_retirement_projection, calculate_projection_checkpoints, get_latest_retirement_year, update_retirement_projection
+    )
+
+    cache = cache if cache is not None else projection_cache
+    now = datetime.now()
+    family_info_data = family_info.get('family_info_data', [])
+    latest_retirement_year = get_latest_retirement_year(family_info_data, now)
+
+    missed_funds = []
+    missed_keys = []
+    for fund in retirement_fund_info.get('retirement_fund_data', []):
+        family_member = next((member for member in family_info_data if member['id'] == fund['family_member_id']), None)
+        if not family_member:
+            fund['retirement_projection'] = FundProjection.empty() if result_format == RESULT_COLUMNS else []
+            continue
+
+        key = projection_cache_key(fund, family_member, latest_retirement_year, now)
+        if result_format == RESULT_COLUMNS:
+            key = f'{key}-{RESULT_COLUMNS}'
+        projection = cache.get(key)
+        if projection is None:
+            missed_funds.append(fund)
+            missed_keys.append(key)
+        else:
+            fund['retirement_projection'] = projection
+
+    record('ProjectionCacheMisses', len(missed_funds))
+    if not missed_funds:
+        return
+
+    missed = {'retirement_fund_data': missed_funds}
+    fund_ids = [fund.get('id') for fund in missed_funds]
+    if result_format == RESULT_ROWS and user_id is not None and None not in fund_ids and len(set(fund_ids)) == len(fund_ids):
+        checkpoints = cache.get_checkpoints(user_id)
+        if checkpoints is None:
+            checkpoints = calculate_projection_checkpoints(missed, family_info)
+        else:
+            checkpoints = update_retirement_projection(missed, family_info, checkpoints, {fund_id: {} for fund_id in fund_ids})
+        cache.put_checkpoints(user_id, checkpoints)
+    else:
+        calculate_retirement_projection(missed, family_info, result_format=result_format)
+    for fund, key in zip(missed_funds, missed_keys):
+        cache.put(key, fund['retirement_projection'])
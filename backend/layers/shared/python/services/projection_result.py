@@ -0,0 +1,99 @@
+# Projection result - compact columnar representation of a fund's retirement projection
+# (numpy is imported where arrays are built, so the result constants load without it)
+from utils.response import json_default
+
+# Projection result formats
+RESULT_ROWS = 'rows'  # list of one dict per year (original shape)
+RESULT_COLUMNS = 'columns'  # one list per field
+
+# Row fields, in the order of the original projection dicts
+PROJECTION_FIELDS = (
+    'year', 'age', 'annual_return_rate', 'begin_amount', 'contribution', 'growth', 'end_amount', 'is_actual_balance',
+)
+AMOUNT_FIELDS = ('begin_amount', 'contribution', 'growth', 'end_amount')
+
+class FundProjection:
+    # One fund's projection, holding one array per field instead of a dict per year
+    __slots__ = PROJECTION_FIELDS
+
+    def __init__(self, year, age, annual_return_rate, begin_amount, contribution, growth, end_amount, is_actual_balance):
+        self.year = year
+        self.age = age
+        self.annual_return_rate = annual_return_rate
+        self.begin_amount = begin_amount
+        self.contribution = contribution
+        self.growth = growth
+        self.end_amount = end_amount
+        self.is_actual_balance = is_actual_balance
+
+    def __len__(self):
+        return len(self.year)
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Build a projection from its columnar JSON shape
+
+        Args:
+            columns (dict): Field -> list of values, as returned by to_columns
+
+        Returns:
+            FundProjection: Projection backed by arrays
+        """
+        import numpy as np
+        return cls(
+            year=np.asarray(columns['year'], dtype=np.int64),
+            age=np.asarray(columns['age'], dtype=np.int64),
+            annual_return_rate=np.asarray(columns['annual_return_rate'], dtype=float),
+            begin_amount=np.asarray(columns['begin_amount'], dtype=float),
+            contribution=np.asarray(columns['contribution'], dtype=float),
+            growth=np.asarray(columns['growth'], dtype=float),
+            end_amount=np.asarray(columns['end_amount'], dtype=float),
+            is_actual_balance=np.asarray(columns['is_actual_balance'], dtype=bool),
+        )
+
+    @classmethod
+    def empty(cls):
+        """Projection of a fund that isn't projected (no matching family member)"""
+        return cls.from_columns({field: [] for field in PROJECTION_FIELDS})
+
+    def to_arrays(self):
+        """
+        Columnar shape backed by arrays, amounts rounded to cents (serialized natively by orjson)
+
+        Returns:
+            dict: Field -> numpy array
+        """
+        import numpy as np
+        columns = {field: getattr(self, field) for field in PROJECTION_FIELDS}
+        for field in AMOUNT_FIELDS:
+            columns[field] = np.round(columns[field], 2)
+        return columns
+
+    def to_columns(self):
+        """
+        Convert to the columnar JSON shape, amounts rounded to cents
+
+        Returns:
+            dict: Field -> list of values
+        """
+        return {field: values.tolist() for field, values in self.to_arrays().items()}
+
+    def to_rows(self):
+        """
+        Convert to the original list of one dict per year
+
+        Returns:
+            list: Retirement projection data by year
+        """
+        columns = {field: getattr(self, field).tolist() for field in PROJECTION_FIELDS}
+        # Python's round() on Python floats keeps the rows identical to the reference engine
+        for field in AMOUNT_FIELDS:
+            columns[field] = [float(round(value, 2)) for value in columns[field]]
+        return [dict(zip(PROJECTION_FIELDS, values)) for values in zip(*(columns[field] for field in PROJECTION_FIELDS))]
+
+def projection_json_default(obj):
+    """JSON default that writes FundProjection columnar and anything else like utils.response.json_default"""
+    if isinstance(obj, FundProjection):
+        return obj.to_arrays()
+    return json_default(obj)
@@ -1,6 +1,28 @@
 # Retirement calculator service - contains business logic for retirement calculations
 from decimal import Decimal
 from datetime import datetime
+import numpy as np
+
+from models.actuals_store import ActualsStore
+from models.age_band_schedule import compile_return_rate_schedule, compile_contribution_schedule
+from services.projection_cache import stable_hash
+from services.projection_result import FundProjection, RESULT_ROWS, RESULT_COLUMNS
+from utils.metrics import timed
+
+# Projection engines
+ENGINE_VECTORIZED = 'vectorized'  # array-based engine, compounding in closed form
+ENGINE_REFERENCE = 'reference'  # original year-by-year / period-by-period loop
+
+# The vectorized engine compounds a year in closed form instead of period by period, so its
+# unrounded amounts differ from the reference loop's by float error, at most this fraction of
+# the row's amounts. Rounded to the cent, an amount that close to a half-cent boundary can
+# land on the neighbouring cent; every other row is identical.
+VECTORIZED_RELATIVE_ERROR = 1e-9
+
+# Monte Carlo simulation defaults
+MONTE_CARLO_PATHS = 10000
+MONTE_CARLO_VOLATILITY = 0.15  # Standard deviation of annual returns
+MONTE_CARLO_SEED = 0
         
 def get_return_rate_for_age(age, return_rate_params):
     for param in return_rate_params:
@@ -16,10 +38,652 @@ def get_contribution_for_age(age, contribution_params, default_contribution, def
         
     return default_contribution, default_frequency  # Use fund's defaults if no matching range
 
-def calculate_retirement_projection(retirement_fund_info, family_info):
+def get_latest_retirement_year(family_info_data, now):
+    """
+    Find the latest retirement year across all family members
+    
+    Args:
+        family_info_data (list): List of family members
+        now (datetime): Reference date for age calculations
+
+    Returns:
+        int: Latest retirement year (0 if there are no family members)
+    """
+    latest_retirement_year = 0
+    for member in family_info_data:
+        member_dob = datetime.strptime(member['date_of_birth'], '%Y-%m-%d')
+        member_age = (now - member_dob).days // 365
+        member_retirement_year = now.year + (int(member['retirement_age']) - member_age)
+        latest_retirement_year = max(latest_retirement_year, member_retirement_year)
+    
+    return latest_retirement_year
+
+def compile_fund_schedule(fund, family_member, latest_retirement_year, now):
+    """
+    Compile a fund's age-banded params and actual data into per-year arrays
+    
+    Args:
+        fund (dict): Retirement fund data
+        family_member (dict): Family member the fund belongs to
+        latest_retirement_year (int): Latest retirement year across the family
+        now (datetime): Reference date for age calculations
+
+    Returns:
+        dict: Per-year arrays (one entry per projected year) and the fund's timeline
+    """
+    # Calculate age from date of birth
+    dob = datetime.strptime(family_member['date_of_birth'], '%Y-%m-%d')
+    age = (now - dob).days // 365
+    retirement_age = int(family_member['retirement_age'])
+    
+    # Calculate end age - continue until latest family member retires + 5 years
+    end_year = latest_retirement_year + 5
+    end_age = age + (end_year - now.year)
+    
+    # Get fund start date or default to current year
+    start_date = fund.get('start_date')
+    if start_date:
+        start_year = datetime.strptime(start_date, '%Y-%m-%d').year
+        start_age = age + (start_year - now.year)
+    else:
+        start_year = now.year
+        start_age = age
+    
+    ages = np.arange(start_age, end_age + 1)
+    num_years = len(ages)
+    
+    # Resolve age bands through the compiled schedules (the first matching band wins, same as the linear scan)
+    return_rate_schedule = compile_return_rate_schedule(fund.get('return_rate_params', []))  # Default 7% if no matching range
+    return_rate = return_rate_schedule.resolve(ages, 'return_rate')
+    
+    contribution_schedule = compile_contribution_schedule(
+        fund.get('contribution_params', []), int(fund['regular_contribution']), int(fund['contribution_frequency'])
+    )
+    contribution_amount = contribution_schedule.resolve(ages, 'contribution_amount')
+    contribution_frequency = contribution_schedule.resolve(ages, 'contribution_frequency')
+    # Years regular_contribution applies to, no contribution band covers them
+    regular_contribution_years = ~contribution_schedule.covers(ages)
+    
+    # Closed form of n periods of (balance + contribution) * (1 + rate / n):
+    # balance * g + contribution * (1 + i) * (g - 1) / i, with i = rate / n and g = (1 + i) ** n
+    periodic_rate = return_rate / contribution_frequency
+    growth_factor = (1 + periodic_rate) ** contribution_frequency
+    with np.errstate(divide='ignore', invalid='ignore'):
+        contribution_growth = np.where(
+            periodic_rate == 0,
+            contribution_amount * contribution_frequency,
+            contribution_amount * (1 + periodic_rate) * (growth_factor - 1) / periodic_rate
+        )
+    
+    # Actual data re-anchors the balance at its year (first entry for a year wins)
+    actuals = ActualsStore.from_actual_data(fund.get('actual_data', [])).window(start_year, num_years)
+    
+    return {
+        'start_year': start_year,
+        'ages': ages,
+        'initial_investment': int(fund['initial_investment']),
+        'return_rate': return_rate,
+        'contribution_amount': contribution_amount,
+        'contribution_frequency': contribution_frequency,
+        'regular_contribution_years': regular_contribution_years,
+        'annual_contribution': contribution_amount * contribution_frequency,
+        'growth_factor': growth_factor,
+        'contribution_growth': contribution_growth,
+        'accumulating': ages < retirement_age,
+        'retirement_start': ages == retirement_age,
+        'has_actual': actuals['has_actual'],
+        'actual_balance': actuals['actual_balance'],
+        'actual_contributions': actuals['actual_contributions'],
+        'actual_growth': actuals['actual_growth'],
+    }
+
+def _stack_schedule_field(schedules, field, width, fill=0.0, dtype=float):
+    """Stack one per-year field of many schedules into a padded (fund x year) array"""
+    stacked = np.full((len(schedules), width), fill, dtype=dtype)
+    for row, schedule in enumerate(schedules):
+        values = schedule[field]
+        stacked[row, :len(values)] = values
+    
+    return stacked
+
+def project_schedules(schedules):
+    """
+    Project balances for many compiled fund schedules in one vectorized pass
+    
+    Funds are stacked into padded (fund x year) arrays and the balance recurrence is
+    stepped across the year axis for all funds at once. Padding past the end of a
+    fund's timeline is never read back.
+    
+    Args:
+        schedules (list): Schedules returned by compile_fund_schedule
+
+    Returns:
+        dict: (fund x year) arrays for begin_amount, begin_retirement_amount, contribution,
+            growth and end_amount, plus the per-fund retirement_amount the balance flatlines at
+    """
+    width = max((len(schedule['ages']) for schedule in schedules), default=0)
+    growth_factor = _stack_schedule_field(schedules, 'growth_factor', width)
+    contribution_growth = _stack_schedule_field(schedules, 'contribution_growth', width)
+    annual_contribution = _stack_schedule_field(schedules, 'annual_contribution', width)
+    accumulating = _stack_schedule_field(schedules, 'accumulating', width, False, bool)
+    retirement_start = _stack_schedule_field(schedules, 'retirement_start', width, False, bool)
+    has_actual = _stack_schedule_field(schedules, 'has_actual', width, False, bool)
+    actual_balance = _stack_schedule_field(schedules, 'actual_balance', width)
+    # After the latest actual of every fund in the batch there is nothing left to re-anchor
+    anchor_years = np.flatnonzero(has_actual.any(axis=0))
+    last_anchor_year = anchor_years[-1] if len(anchor_years) else -1
+    
+    begin_amount = np.empty((len(schedules), width))
+    begin_retirement_amount = np.empty((len(schedules), width))
+    projected_amount = np.empty((len(schedules), width))
+    end_amount = np.empty((len(schedules), width))
+    
+    balance = np.array([schedule['initial_investment'] for schedule in schedules], dtype=float)
+    # Amount at retirement to maintain (non-zero only when replaying from a checkpoint)
+    retirement_amount = np.array([schedule.get('initial_retirement_amount', 0.0) for schedule in schedules])
+    for year in range(width):
+        begin_amount[:, year] = balance
+        begin_retirement_amount[:, year] = retirement_amount
+        retirement_amount = np.where(retirement_start[:, year], balance, retirement_amount)
+        # Accumulation phase grows the balance, retirement phase flatlines at the retirement amount
+        balance = np.where(
+            accumulating[:, year],
+            balance * growth_factor[:, year] + contribution_growth[:, year],
+            retirement_amount
+        )
+        projected_amount[:, year] = balance
+        if year <= last_anchor_year:
+            # Reconcile - re-anchor funds with an actual balance this year
+            balance = np.where(has_actual[:, year], actual_balance[:, year], balance)
+        end_amount[:, year] = balance
+    
+    contribution = np.where(accumulating, annual_contribution, 0.0)
+    growth = np.where(accumulating, projected_amount - begin_amount - contribution, 0.0)
+    if last_anchor_year >= 0:
+        # Reconcile - years with actuals report the recorded contributions and growth
+        contribution = np.where(has_actual, _stack_schedule_field(schedules, 'actual_contributions', width), contribution)
+        growth = np.where(has_actual, _stack_schedule_field(schedules, 'actual_growth', width), growth)
+    
+    return {
+        'begin_amount': begin_amount,
+        'begin_retirement_amount': begin_retirement_amount,
+        'contribution': contribution,
+        'growth': growth,
+        'end_amount': end_amount,
+        'retirement_amount': retirement_amount,
+    }
+
+def build_projection_rows(schedule, projection, row):
+    """
+    Build the retirement_projection rows for one fund of a projected batch
+    
+    Args:
+        schedule (dict): Schedule returned by compile_fund_schedule
+        projection (dict): Arrays returned by project_schedules
+        row (int): Row of the fund in the batch
+
+    Returns:
+        list: Retirement projection data by year
+    """
+    num_years = len(schedule['ages'])
+    begin_amounts = projection['begin_amount'][row, :num_years].tolist()
+    contributions = projection['contribution'][row, :num_years].tolist()
+    growths = projection['growth'][row, :num_years].tolist()
+    end_amounts = projection['end_amount'][row, :num_years].tolist()
+    # Python's round() on Python floats rounds like the reference engine (see VECTORIZED_RELATIVE_ERROR)
+    return [
+        {
+            "year": schedule['start_year'] + offset,
+            "age": age,
+            "annual_return_rate": annual_return_rate,
+            "begin_amount": float(round(begin_amounts[offset], 2)),
+            "contribution": float(round(contributions[offset], 2)),
+            "growth": float(round(growths[offset], 2)),
+            "end_amount": float(round(end_amounts[offset], 2)),
+            "is_actual_balance": is_actual_balance,
+        }
+        for offset, (age, annual_return_rate, is_actual_balance) in enumerate(zip(
+            schedule['ages'].tolist(), schedule['return_rate'].tolist(), schedule['has_actual'].tolist()
+        ))
+    ]
+
+def build_projection_columns(schedule, projection, row):
+    """
+    Build the columnar projection of one fund of a projected batch
+    
+    Args:
+        schedule (dict): Schedule returned by compile_fund_schedule
+        projection (dict): Arrays returned by project_schedules
+        row (int): Row of the fund in the batch
+
+    Returns:
+        FundProjection: One array per field, unrounded
+    """
+    num_years = len(schedule['ages'])
+    # Copies, so the fund doesn't keep the whole batch's arrays alive
+    return FundProjection(
+        year=np.arange(schedule['start_year'], schedule['start_year'] + num_years),
+        age=schedule['ages'].copy(),
+        annual_return_rate=schedule['return_rate'].copy(),
+        begin_amount=projection['begin_amount'][row, :num_years].copy(),
+        contribution=projection['contribution'][row, :num_years].copy(),
+        growth=projection['growth'][row, :num_years].copy(),
+        end_amount=projection['end_amount'][row, :num_years].copy(),
+        is_actual_balance=schedule['has_actual'].copy(),
+    )
+
+@timed('calculate_retirement_projection')
+def calculate_retirement_projection(retirement_fund_info, family_info, engine=ENGINE_VECTORIZED, result_format=RESULT_ROWS):
     """
     Calculate retirement projection based on retirement fund info and family info.
     
+    Args:
+        retirement_fund_info (dict): Dictionary containing retirement fund data
+        family_info (dict): Dictionary containing family information data
+        engine (str): ENGINE_VECTORIZED (default) or ENGINE_REFERENCE
+        result_format (str): RESULT_ROWS (default, list of dicts by year) or
+            RESULT_COLUMNS (FundProjection, vectorized engine only)
+
+    Returns:
+        dict: Retirement projection data by year
+    """
+    if engine == ENGINE_REFERENCE:
+        return calculate_retirement_projection_reference(retirement_fund_info, family_info)
+    
+    funds, schedules = compile_household_schedules(retirement_fund_info, family_info, datetime.now())
+    if result_format == RESULT_COLUMNS:
+        for fund in retirement_fund_info.get('retirement_fund_data', []):
+            fund['retirement_projection'] = FundProjection.empty()
+    
+    if not schedules:
+        return
+    
+    build_projection = build_projection_columns if result_format == RESULT_COLUMNS else build_projection_rows
+    projection = project_schedules(schedules)
+    for row, fund in enumerate(funds):
+        fund['retirement_projection'] = build_projection(schedules[row], projection, row)
+
+def compile_household_schedules(retirement_fund_info, family_info, now):
+    """
+    Compile the schedules of every fund in a household
+    
+    Funds without a matching family member get an empty projection and no schedule.
+    
+    Args:
+        retirement_fund_info (dict): Dictionary containing retirement fund data
+        family_info (dict): Dictionary containing family information data
+        now (datetime): Reference date for age calculations
+
+    Returns:
+        tuple: (funds, schedules) with one schedule per projected fund
+    """
+    family_info_data = family_info.get('family_info_data', [])
+    latest_retirement_year = get_latest_retirement_year(family_info_data, now)
+    
+    funds = []
+    schedules = []
+    for fund in retirement_fund_info.get('retirement_fund_data', []):
+        # get family member data from family_info
+        family_member = next((member for member in family_info_data if member['id'] == fund['family_member_id']), None)
+        
+        if not family_member:
+            fund['retirement_projection'] = []
+            continue
+        
+        funds.append(fund)
+        schedules.append(compile_fund_schedule(fund, family_member, latest_retirement_year, now))
+    
+    return funds, schedules
+
+def calculate_retirement_projections_batch(user_documents, batch_size=1000, result_format=RESULT_ROWS):
+    """
+    Calculate retirement projections for many users with one vectorized pass per batch.
+    
+    The funds of every user in a batch are stacked into a single padded (fund x year)
+    array and projected together. Documents are consumed lazily, so the whole user
+    base never has to be held in memory at once.
+    
+    Args:
+        user_documents (iterable): Retirement data items holding both retirement_fund_data
+            and family_info_data, as returned by db_get_retirement_data
+        batch_size (int): Number of users stacked into one pass
+        result_format (str): RESULT_ROWS (default) or RESULT_COLUMNS
+
+    Yields:
+        dict: Each user document, in input order, with retirement_projection set on its funds
+    """
+    now = datetime.now()
+    batch = []
+    for user_document in user_documents:
+        batch.append(user_document)
+        if len(batch) >= batch_size:
+            yield from _project_user_batch(batch, now, result_format)
+            batch = []
+    
+    if batch:
+        yield from _project_user_batch(batch, now, result_format)
+
+def _project_user_batch(user_documents, now, result_format=RESULT_ROWS):
+    """Project every fund of a batch of users together and return the documents"""
+    funds = []
+    schedules = []
+    for user_document in user_documents:
+        user_funds, user_schedules = compile_household_schedules(user_document, user_document, now)
+        if result_format == RESULT_COLUMNS:
+            for fund in user_document.get('retirement_fund_data', []):
+                fund['retirement_projection'] = FundProjection.empty()
+        funds.extend(user_funds)
+        schedules.extend(user_schedules)
+    
+    if schedules:
+        build_projection = build_projection_columns if result_format == RESULT_COLUMNS else build_projection_rows
+        projection = project_schedules(schedules)
+        for row, fund in enumerate(funds):
+            fund['retirement_projection'] = build_projection(schedules[row], projection, row)
+    
+    return user_documents
+
+# Per-year schedule fields that feed the balance recurrence or the projection rows
+_SCHEDULE_YEAR_FIELDS = (
+    'return_rate', 'annual_contribution', 'growth_factor', 'contribution_growth', 'accumulating',
+    'retirement_start', 'has_actual', 'actual_balance', 'actual_contributions', 'actual_growth',
+)
+
+def calculate_projection_checkpoints(retirement_fund_info, family_info):
+    """
+    Calculate retirement projection and keep per-fund checkpoints for incremental updates.
+    
+    Sets fund['retirement_projection'] like calculate_retirement_projection. The returned
+    checkpoints hold each fund's compiled schedule, its rows and its unrounded balance and
+    retirement amount at every year boundary, so update_retirement_projection can
+    replay a fund from the first year an edit touches.
+    
+    Args:
+        retirement_fund_info (dict): Dictionary containing retirement fund data
+        family_info (dict): Dictionary containing family information data
+
+    Returns:
+        dict: Checkpoints to pass to update_retirement_projection
+    """
+    now = datetime.now()
+    family_info_data = family_info.get('family_info_data', [])
+    funds, schedules = compile_household_schedules(retirement_fund_info, family_info, now)
+    checkpoints = {
+        'year': now.year,
+        'latest_retirement_year': get_latest_retirement_year(family_info_data, now),
+        'family_hash': stable_hash(family_info_data),
+        'funds': {},
+    }
+    if schedules:
+        _replay_funds(checkpoints, funds, schedules, [0] * len(funds))
+    
+    return checkpoints
+
+def update_retirement_projection(retirement_fund_info, family_info, checkpoints, fund_changes):
+    """
+    Apply fund edits to a previous projection, recomputing only what the edits affect.
+    
+    Each changed fund is recompiled and compared year by year with its checkpointed
+    schedule; the fund is replayed from the first year that differs, keeping the
+    checkpointed rows before it. A fund without a checkpoint (a fund added since) is
+    projected in full. Funds without changes are not recomputed. Any family edit and a
+    new calendar year fall back to a full recompute of retirement_fund_info.
+    
+    Args:
+        retirement_fund_info (dict): Retirement fund data, holding every changed fund
+        family_info (dict): Dictionary containing family information data
+        checkpoints (dict): Checkpoints from calculate_projection_checkpoints or a previous update,
+            left unchanged
+        fund_changes (dict): fund_id -> partial fund data merged into the fund, as in db_update_single_fund
+
+    Returns:
+        dict: Updated checkpoints
+
+    Raises:
+        ValueError: If a changed fund isn't in retirement_fund_info
+    """
+    now = datetime.now()
+    family_info_data = family_info.get('family_info_data', [])
+    latest_retirement_year = get_latest_retirement_year(family_info_data, now)
+    
+    funds_by_id = {fund.get('id'): fund for fund in retirement_fund_info.get('retirement_fund_data', [])}
+    unknown_fund_ids = [fund_id for fund_id in fund_changes if fund_id not in funds_by_id]
+    if unknown_fund_ids:
+        raise ValueError(f"Changed funds not in retirement_fund_data: {', '.join(map(str, unknown_fund_ids))}")
+    for fund_id, changes in fund_changes.items():
+        funds_by_id[fund_id].update(changes)
+    
+    if (checkpoints['year'] != now.year
+            or checkpoints['latest_retirement_year'] != latest_retirement_year
+            or checkpoints['family_hash'] != stable_hash(family_info_data)):
+        return calculate_projection_checkpoints(retirement_fund_info, family_info)
+    
+    checkpoints = {**checkpoints, 'funds': dict(checkpoints['funds'])}
+    funds = []
+    schedules = []
+    first_changed_years = []
+    for fund_id in fund_changes:
+        fund = funds_by_id[fund_id]
+        family_member = next((member for member in family_info_data if member['id'] == fund['family_member_id']), None)
+        if not family_member:
+            fund['retirement_projection'] = []
+            checkpoints['funds'].pop(fund_id, None)
+            continue
+        
+        schedule = compile_fund_schedule(fund, family_member, latest_retirement_year, now)
+        fund_checkpoint = checkpoints['funds'].get(fund_id)
+        first_changed_year = 0 if fund_checkpoint is None else _first_changed_year(fund_checkpoint['schedule'], schedule)
+        if first_changed_year is None:
+            fund['retirement_projection'] = fund_checkpoint['rows']
+            continue
+        
+        funds.append(fund)
+        schedules.append(schedule)
+        first_changed_years.append(first_changed_year)
+    
+    if schedules:
+        _replay_funds(checkpoints, funds, schedules, first_changed_years)
+    
+    return checkpoints
+
+def _first_changed_year(previous_schedule, schedule):
+    """Offset of the first year whose inputs differ between two schedules of a fund, None if identical"""
+    if (previous_schedule['start_year'] != schedule['start_year']
+            or len(previous_schedule['ages']) != len(schedule['ages'])
+            or not np.array_equal(previous_schedule['ages'], schedule['ages'])
+            or previous_schedule['initial_investment'] != schedule['initial_investment']):
+        return 0
+    
+    changed = np.zeros(len(schedule['ages']), dtype=bool)
+    for field in _SCHEDULE_YEAR_FIELDS:
+        changed |= previous_schedule[field] != schedule[field]
+    
+    changed_years = np.flatnonzero(changed)
+    return int(changed_years[0]) if len(changed_years) else None
+
+def _slice_schedule(schedule, offset, balance, retirement_amount):
+    """Schedule of the years from offset onward, starting from checkpointed balances"""
+    sliced = {field: schedule[field][offset:] for field in _SCHEDULE_YEAR_FIELDS}
+    sliced.update({
+        'start_year': schedule['start_year'] + offset,
+        'ages': schedule['ages'][offset:],
+        'contribution_amount': schedule['contribution_amount'][offset:],
+        'contribution_frequency': schedule['contribution_frequency'][offset:],
+        'initial_investment': balance,
+        'initial_retirement_amount': retirement_amount,
+    })
+    return sliced
+
+def _replay_funds(checkpoints, funds, schedules, first_changed_years):
+    """Project funds from their first changed year onward in one pass and update their checkpoints"""
+    replayed = []
+    for fund, schedule, offset in zip(funds, schedules, first_changed_years):
+        fund_checkpoint = checkpoints['funds'].get(fund.get('id'))
+        if offset == 0 or fund_checkpoint is None:
+            replayed.append(schedule)
+        else:
+            replayed.append(_slice_schedule(
+                schedule, offset, fund_checkpoint['begin_amount'][offset], fund_checkpoint['begin_retirement_amount'][offset]
+            ))
+    
+    projection = project_schedules(replayed)
+    for row, (fund, schedule, offset) in enumerate(zip(funds, schedules, first_changed_years)):
+        num_years = len(replayed[row]['ages'])
+        begin_amount = projection['begin_amount'][row, :num_years]
+        begin_retirement_amount = projection['begin_retirement_amount'][row, :num_years]
+        rows = build_projection_rows(replayed[row], projection, row)
+        
+        fund_checkpoint = checkpoints['funds'].get(fund.get('id'))
+        if offset > 0 and fund_checkpoint is not None:
+            begin_amount = np.concatenate([fund_checkpoint['begin_amount'][:offset], begin_amount])
+            begin_retirement_amount = np.concatenate([fund_checkpoint['begin_retirement_amount'][:offset], begin_retirement_amount])
+            rows = fund_checkpoint['rows'][:offset] + rows
+        
+        fund['retirement_projection'] = rows
+        checkpoints['funds'][fund.get('id')] = {
+            'schedule': schedule,
+            'rows': rows,
+            'begin_amount': begin_amount,
+            'begin_retirement_amount': begin_retirement_amount,
+        }
+
+@timed('simulate_retirement_projection')
+def simulate_retirement_projection(retirement_fund_info, family_info, num_paths=MONTE_CARLO_PATHS,
+                                   volatility=MONTE_CARLO_VOLATILITY, seed=MONTE_CARLO_SEED):
+    """
+    Simulate retirement projections over random return paths (Monte Carlo).
+    
+    Each year's return is drawn as the fund's deterministic rate for that age plus
+    volatility times a standard normal shock. Shocks are drawn once per calendar year
+    and path and shared by all funds of the household, so funds move with the market
+    together. During retirement each fund withdraws what the deterministic projection
+    sustains (its retirement amount times the expected return), so with zero volatility
+    the balance flatlines like calculate_retirement_projection. A path runs out
+    of money when a fund with withdrawals reaches a zero balance.
+    
+    Sets fund['retirement_simulation'] to the fund's p10/p50/p90 end balances by year.
+    
+    Args:
+        retirement_fund_info (dict): Dictionary containing retirement fund data
+        family_info (dict): Dictionary containing family information data
+        num_paths (int): Number of simulated return paths
+        volatility (float): Standard deviation of annual returns (0.15 = 15%)
+        seed (int): Random seed, the same seed reproduces the same paths
+
+    Returns:
+        dict: Household p10/p50/p90 total balances by year and probability of running out of money
+    """
+    for fund in retirement_fund_info.get('retirement_fund_data', []):
+        fund['retirement_simulation'] = {'p10': [], 'p50': [], 'p90': [], 'probability_of_depletion': 0.0}
+    
+    funds, schedules = compile_household_schedules(retirement_fund_info, family_info, datetime.now())
+    summary = {'num_paths': num_paths, 'volatility': volatility, 'seed': seed}
+    if not schedules:
+        return {**summary, 'years': [], 'p10': [], 'p50': [], 'p90': [], 'probability_of_depletion': 0.0}
+    
+    retirement_amounts = project_schedules(schedules)['retirement_amount']
+    first_year = min(schedule['start_year'] for schedule in schedules)
+    last_year = max(schedule['start_year'] + len(schedule['ages']) - 1 for schedule in schedules)
+    
+    # One (paths x calendar year) matrix of shocks for the whole household. Balances are
+    # kept year-major so each year's paths are contiguous for the percentile reduction
+    shocks = np.random.default_rng(seed).standard_normal((num_paths, last_year - first_year + 1))
+    household_balances = np.zeros((last_year - first_year + 1, num_paths))
+    household_depleted = np.zeros(num_paths, dtype=bool)
+    
+    for row, (fund, schedule) in enumerate(zip(funds, schedules)):
+        offset = schedule['start_year'] - first_year
+        num_years = len(schedule['ages'])
+        balances, depleted = _simulate_schedule(
+            schedule, retirement_amounts[row], shocks[:, offset:offset + num_years], volatility
+        )
+        household_balances[offset:offset + num_years] += balances
+        household_depleted |= depleted
+        fund['retirement_simulation'] = {
+            **_percentile_bands(balances),
+            'probability_of_depletion': float(depleted.mean()),
+        }
+    
+    return {
+        **summary,
+        'years': list(range(first_year, last_year + 1)),
+        **_percentile_bands(household_balances),
+        'probability_of_depletion': float(household_depleted.mean()),
+    }
+
+def _simulate_schedule(schedule, retirement_amount, shocks, volatility):
+    """
+    Step one compiled fund schedule across all paths at once
+    
+    Returns:
+        tuple: ((year x paths) end balances, per-path flag for running out of money)
+    """
+    num_paths, num_years = shocks.shape
+    balances = np.empty((num_years, num_paths))
+    balance = np.full(num_paths, float(schedule['initial_investment']))
+    depleted = np.zeros(num_paths, dtype=bool)
+    
+    for year in range(num_years):
+        expected_return_rate = schedule['return_rate'][year]
+        annual_return_rate = np.maximum(expected_return_rate + volatility * shocks[:, year], -1.0)
+        
+        if schedule['accumulating'][year]:
+            # Same closed-form compounding as compile_fund_schedule, with a return per path
+            frequency = schedule['contribution_frequency'][year]
+            contribution_amount = schedule['contribution_amount'][year]
+            periodic_rate = annual_return_rate / frequency
+            growth_factor = (1 + periodic_rate) ** frequency
+            with np.errstate(divide='ignore', invalid='ignore'):
+                contribution_growth = np.where(
+                    periodic_rate == 0,
+                    contribution_amount * frequency,
+                    contribution_amount * (1 + periodic_rate) * (growth_factor - 1) / periodic_rate
+                )
+            balance = balance * growth_factor + contribution_growth
+        else:
+            withdrawal = retirement_amount * expected_return_rate
+            balance = balance * (1 + annual_return_rate) - withdrawal
+            if withdrawal > 0:
+                depleted |= balance <= 0
+            balance = np.maximum(balance, 0.0)
+        
+        if schedule['has_actual'][year]:
+            balance = np.full(num_paths, schedule['actual_balance'][year])
+        
+        balances[year] = balance
+    
+    return balances, depleted
+
+def _percentile_bands(balances):
+    """
+    Reduce (year x paths) balances to p10/p50/p90 lists by year
+    
+    Sorts balances in place; a full sort of each year beats np.percentile's partition
+    here because many paths share a balance (actual data years, depleted paths).
+    Interpolates linearly between ranks, like np.percentile's default method.
+    """
+    balances.sort(axis=1)
+    last_rank = balances.shape[1] - 1
+    bands = {}
+    for name, percentile in (('p10', 10), ('p50', 50), ('p90', 90)):
+        position = percentile / 100 * last_rank
+        lower = int(position)
+        upper = min(lower + 1, last_rank)
+        fraction = position - lower
+        band = balances[:, lower] * (1 - fraction) + balances[:, upper] * fraction
+        bands[name] = band.round(2).tolist()
+    
+    return bands
+
+def calculate_retirement_projection_reference(retirement_fund_info, family_info):
+    """
+    Calculate retirement projection by stepping every contribution period of every year.
+    
+    Reference implementation kept for parity checks against the vectorized engine: it scans
+    the age bands with get_return_rate_for_age / get_contribution_for_age and actual_data
+    for each year rather than sharing the engine's compiled lookup tables and ActualsStore,
+    so a bug in those shows up as a mismatch.
+    
     Args:
         retirement_fund_info (dict): Dictionary containing retirement fund data
         family_info (dict): Dictionary containing family information data
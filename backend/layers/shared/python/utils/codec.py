@@ -0,0 +1,133 @@
+# Fast DynamoDB codec - converts between DynamoDB wire-format attribute values and native Python values
+import math
+from decimal import Decimal
+
+# Field schema of retirement data: numeric fields decode to these types wherever they appear
+INT_FIELDS = frozenset([
+    'year', 'from_age', 'to_age', 'contribution_frequency', 'retirement_age', 'life_expectancy',
+    'version', 'position',
+])
+FLOAT_FIELDS = frozenset([
+    'initial_investment', 'regular_contribution', 'return_rate', 'contribution_amount',
+    'actual_balance', 'actual_contributions', 'actual_growth',
+])
+
+def _decode_number(text, field):
+    """Decode a DynamoDB number string to int or float, following the field schema"""
+    if field in FLOAT_FIELDS:
+        return float(text)
+    if field in INT_FIELDS or not any(c in text for c in '.eE'):
+        try:
+            return int(text)
+        except ValueError:
+            return int(float(text))
+    return float(text)
+
+def decode_value(value, field=None):
+    """
+    Decode one wire-format attribute value ({'N': '1.5'}, {'M': {...}}, ...) to native Python
+
+    Numbers become int or float (never Decimal), typed by the field they are stored under.
+
+    Args:
+        value (dict): Wire-format attribute value
+        field (str): Name of the attribute holding the value (optional)
+
+    Returns:
+        Native Python value
+    """
+    (type_code, data), = value.items()
+    if type_code == 'S':
+        return data
+    if type_code == 'N':
+        return _decode_number(data, field)
+    if type_code == 'M':
+        return {key: decode_value(item, key) for key, item in data.items()}
+    if type_code == 'L':
+        return [decode_value(item, field) for item in data]
+    if type_code == 'BOOL':
+        return data
+    if type_code == 'NULL':
+        return None
+    if type_code == 'SS':
+        return set(data)
+    if type_code == 'NS':
+        return set(_decode_number(item, field) for item in data)
+    if type_code == 'B':
+        return data
+    if type_code == 'BS':
+        return set(data)
+    raise ValueError(f"Unsupported DynamoDB type: {type_code}")
+
+def decode_item(item):
+    """
+    Decode a wire-format item to a dict of native Python values
+
+    Args:
+        item (dict): Item as returned by the low-level client, or None
+
+    Returns:
+        dict: Decoded item or None
+    """
+    if item is None:
+        return None
+    return {key: decode_value(value, key) for key, value in item.items()}
+
+def _encode_number(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f"Cannot store non-finite number: {value}")
+    return {'N': repr(value) if isinstance(value, float) else str(value)}
+
+def _encode_map(value):
+    return {'M': {key: encode_value(item) for key, item in value.items()}}
+
+def _encode_list(value):
+    return {'L': [encode_value(item) for item in value]}
+
+# Encoder per exact type, so the common types skip the isinstance chain
+_ENCODERS = {
+    str: lambda value: {'S': value},
+    bool: lambda value: {'BOOL': value},
+    int: _encode_number,
+    float: _encode_number,
+    Decimal: _encode_number,
+    type(None): lambda value: {'NULL': True},
+    dict: _encode_map,
+    list: _encode_list,
+    tuple: _encode_list,
+}
+
+def encode_value(value):
+    """
+    Encode a native Python value to a wire-format attribute value in a single pass
+
+    Floats are written directly as numbers, without going through Decimal.
+
+    Args:
+        value: str, bool, int, float, Decimal, None, dict, list or tuple
+
+    Returns:
+        dict: Wire-format attribute value
+    """
+    encoder = _ENCODERS.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+
+    # Subclasses (e.g. numpy floats) resolve once and are cached by their type
+    for base_type, base_encoder in list(_ENCODERS.items()):
+        if isinstance(value, base_type):
+            _ENCODERS[type(value)] = base_encoder
+            return base_encoder(value)
+    raise ValueError(f"Unsupported type for DynamoDB: {type(value).__name__}")
+
+def encode_item(item):
+    """
+    Encode a dict to a wire-format item
+
+    Args:
+        item (dict): Item of native Python values
+
+    Returns:
+        dict: Wire-format item for the low-level client
+    """
+    return {key: encode_value(value) for key, value in item.items()}
@@ -0,0 +1,179 @@
+# Request metrics - per-stage timings and payload sizes, logged as CloudWatch Embedded Metric Format
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# Read once at import: when disabled, timed() and instrument_handler() return the functions
+# unwrapped and span() a shared no-op, so instrumented code runs as if it wasn't
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() == 'true'
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'RetirementPortfolio')
+
+UNIT_MILLISECONDS = 'Milliseconds'
+UNIT_BYTES = 'Bytes'
+UNIT_COUNT = 'Count'
+
+# The first invocation of a process is its cold start
+_cold_start = True
+_cold_start_lock = threading.Lock()
+
+# Metrics of the request running on this thread (dev server and ASGI threads run requests concurrently)
+_local = threading.local()
+
+class RequestMetrics:
+    # Timings and counters of one request, logged as one EMF record
+    def __init__(self, function_name, cold_start):
+        self.function_name = function_name
+        self.cold_start = cold_start
+        self.values = {}
+        self.units = {}
+        self.properties = {}
+
+    def add(self, name, value, unit):
+        # Stages that run several times in a request (e.g. one query per page) add up
+        self.values[name] = self.values.get(name, 0) + value
+        self.units[name] = unit
+
+    def to_emf(self):
+        """Build the EMF record: metric values as top-level keys, declared under _aws"""
+        record = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [['FunctionName'], ['FunctionName', 'ColdStart']],
+                    'Metrics': [{'Name': name, 'Unit': unit} for name, unit in self.units.items()],
+                }],
+            },
+            'FunctionName': self.function_name,
+            'ColdStart': 'true' if self.cold_start else 'false',
+        }
+        record.update(self.properties)
+        record.update((name, round(value, 3)) for name, value in self.values.items())
+        return record
+
+def current_request():
+    """Metrics of the request running on this thread, or None outside an instrumented handler"""
+    return getattr(_local, 'request', None)
+
+def record(name, value, unit=UNIT_COUNT):
+    """
+    Add a value to the current request's metric
+
+    Args:
+        name (str): Metric name
+        value (float): Value, added to the metric's value so far in this request
+        unit (str): CloudWatch unit (UNIT_COUNT, UNIT_BYTES or UNIT_MILLISECONDS)
+    """
+    if METRICS_ENABLED:
+        request = current_request()
+        if request is not None:
+            request.add(name, value, unit)
+
+class _Span:
+    # Times a block and records it on the current request
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record(self.name, (time.perf_counter() - self.start) * 1000, UNIT_MILLISECONDS)
+        return False
+
+class _NullSpan:
+    # Span of a disabled metrics layer
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name):
+    """
+    Time a block as a stage of the current request
+
+        with span('validate'):
+            ...
+
+    Args:
+        name (str): Metric name
+    """
+    return _Span(name) if METRICS_ENABLED else _NULL_SPAN
+
+def timed(name):
+    """
+    Decorator timing every call of a function as a stage of the current request
+
+    Args:
+        name (str): Metric name
+    """
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, (time.perf_counter() - start) * 1000, UNIT_MILLISECONDS)
+        return wrapper
+    return decorator
+
+def _emit(request):
+    # Lambda sends stdout to CloudWatch Logs, which extracts the metrics from EMF lines
+    sys.stdout.write(json.dumps(request.to_emf(), separators=(',', ':')) + '\n')
+    sys.stdout.flush()
+
+def instrument_handler(function_name):
+    """
+    Decorator for a lambda_handler: collects the metrics of each invocation and logs them as one EMF record
+
+    Besides the stages timed during the request, the record has the total duration,
+    request and response body sizes, the status code and whether it was a cold start.
+
+    Args:
+        function_name (str): Function name, the FunctionName dimension
+    """
+    def decorator(handler):
+        if not METRICS_ENABLED:
+            return handler
+
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            global _cold_start
+            with _cold_start_lock:
+                cold_start, _cold_start = _cold_start, False
+
+            request = RequestMetrics(function_name, cold_start)
+            request_id = getattr(context, 'aws_request_id', None)
+            if request_id:
+                request.properties['RequestId'] = request_id
+            request.add('RequestBytes', len((event or {}).get('body') or ''), UNIT_BYTES)
+
+            _local.request = request
+            start = time.perf_counter()
+            try:
+                response = handler(event, context)
+                if isinstance(response, dict):
+                    request.properties['StatusCode'] = response.get('statusCode')
+                    request.add('ResponseBytes', len(response.get('body') or ''), UNIT_BYTES)
+                return response
+            finally:
+                request.add('Duration', (time.perf_counter() - start) * 1000, UNIT_MILLISECONDS)
+                _local.request = None
+                _emit(request)
+        return wrapper
+    return decorator
@@ -0,0 +1,328 @@
+# Response helpers - fast JSON serialization and API Gateway response building for the Lambda handlers
+import base64
+import gzip
+import hashlib
+import sys
+
+import orjson
+
+from utils.metrics import timed
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Headers of every JSON response, built once per process
+JSON_HEADERS = {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+
+# numpy arrays and scalars (projection arrays) are written natively
+JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+# Bodies smaller than this aren't worth compressing
+COMPRESSION_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Encodings the handlers can produce, most preferred first
+ENCODINGS = ('br', 'gzip')
+SUPPORTED_ENCODINGS = ENCODINGS if brotli is not None else ('gzip',)
+
+def json_default(obj):
+    """
+    Serialize values orjson doesn't handle natively
+
+    numpy arrays that orjson can't write natively become lists. Anything else, including
+    Decimals (as returned by the boto3 resource), falls back to its string form, the
+    format the handlers' json.dumps(default=str) always sent to the frontend.
+
+    Args:
+        obj: Value to serialize
+
+    Returns:
+        JSON-serializable value
+    """
+    # numpy is only imported by the projection code, objects can't be arrays before that
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(obj, numpy.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+def json_dumps_bytes(obj, default=json_default):
+    """
+    Serialize to UTF-8 JSON bytes
+
+    Args:
+        obj: Value to serialize
+        default (callable): Serializer for types orjson doesn't handle (optional)
+
+    Returns:
+        bytes: Compact JSON
+    """
+    return orjson.dumps(obj, default=default, option=JSON_OPTIONS)
+
+def json_dumps(obj, default=json_default):
+    """
+    Serialize to a JSON string, as API Gateway expects for the response body
+
+    Args:
+        obj: Value to serialize
+        default (callable): Serializer for types orjson doesn't handle (optional)
+
+    Returns:
+        str: Compact JSON
+    """
+    return orjson.dumps(obj, default=default, option=JSON_OPTIONS).decode('utf-8')
+
+def json_loads(body):
+    """
+    Parse a JSON request body
+
+    Args:
+        body (str or bytes): JSON document
+
+    Returns:
+        Parsed value
+
+    Raises:
+        json.JSONDecodeError: If the body is not valid JSON
+    """
+    return orjson.loads(body)
+
+@timed('json_response')
+def json_response(status_code, data, default=json_default, etag=None):
+    """
+    Build an API Gateway proxy response with a JSON body
+
+    Args:
+        status_code (int): HTTP status code
+        data: Value to serialize as the body
+        default (callable): Serializer for types orjson doesn't handle (optional)
+        etag (str): Entity tag from etag_for, clients then revalidate with If-None-Match (optional)
+
+    Returns:
+        dict: Lambda proxy response
+    """
+    headers = dict(JSON_HEADERS)
+    if etag is not None:
+        headers['ETag'] = etag
+        headers['Cache-Control'] = 'no-cache'
+    return {
+        'statusCode': status_code,
+        'headers': headers,
+        'body': json_dumps(data, default=default)
+    }
+
+def not_modified_response(etag):
+    """
+    Build a 304 response for a conditional GET whose entity tag still matches
+
+    Args:
+        etag (str): Entity tag the client sent, from matching_etag (the plain tag or its
+            encoding variant)
+
+    Returns:
+        dict: Lambda proxy response with an empty body
+    """
+    return {
+        'statusCode': 304,
+        'headers': {'Access-Control-Allow-Origin': '*', 'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'},
+        'body': ''
+    }
+
+def error_response(status_code, message):
+    """
+    Build an error response in the handlers' {"message", "status": "error"} shape
+
+    Args:
+        status_code (int): HTTP status code
+        message (str): Error message
+
+    Returns:
+        dict: Lambda proxy response
+    """
+    return json_response(status_code, {"message": message, "status": "error"})
+
+def get_header(event, name):
+    """
+    Get a request header, ignoring case (API Gateway keeps the client's casing)
+
+    Args:
+        event (dict): Lambda proxy event
+        name (str): Header name
+
+    Returns:
+        str: Header value or None
+    """
+    headers = event.get('headers') or {}
+    value = headers.get(name)
+    if value is not None:
+        return value
+    name = name.lower()
+    return next((value for key, value in headers.items() if key.lower() == name), None)
+
+def get_request_body(event):
+    """
+    Get the request body, decoding it when API Gateway passed it base64 encoded
+
+    Args:
+        event (dict): Lambda proxy event
+
+    Returns:
+        str or bytes: Request body or None
+    """
+    body = event.get('body')
+    if body is not None and event.get('isBase64Encoded'):
+        return base64.b64decode(body)
+    return body
+
+def etag_for(*parts):
+    """
+    Build a strong entity tag from the inputs a response is computed from
+
+    Args:
+        *parts: JSON-like values (key order doesn't matter)
+
+    Returns:
+        str: Quoted entity tag
+    """
+    encoded = orjson.dumps(parts, default=json_default, option=JSON_OPTIONS | orjson.OPT_SORT_KEYS)
+    return f'"{hashlib.sha256(encoded).hexdigest()[:32]}"'
+
+def matching_etag(event, etag):
+    """
+    Check an If-None-Match request header against an entity tag
+
+    Compressed responses carry the tag with an encoding suffix ("<tag>-gzip"), which
+    matches the same entity; the 304 must then carry that variant, the validator the
+    client and caches hold for the compressed representation.
+
+    Args:
+        event (dict): Lambda proxy event
+        etag (str): Entity tag from etag_for
+
+    Returns:
+        str: The matching entity tag (etag or one of its encoding variants), None when the
+            client doesn't have the current representation
+    """
+    if_none_match = get_header(event, 'If-None-Match')
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == '*':
+        return etag
+
+    opaque_tag = etag.strip('"')
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        if candidate == opaque_tag:
+            return etag
+        tag, _, encoding = candidate.rpartition('-')
+        if tag == opaque_tag and encoding in ENCODINGS:
+            return f'"{candidate}"'
+    return None
+
+def negotiate_encoding(accept_encoding, encodings=SUPPORTED_ENCODINGS):
+    """
+    Pick the response encoding from an Accept-Encoding header
+
+    Args:
+        accept_encoding (str): Accept-Encoding request header, e.g. "gzip, deflate, br;q=0.9"
+        encodings (tuple): Encodings to choose from, most preferred first (optional)
+
+    Returns:
+        str: 'br', 'gzip' or None for identity
+    """
+    if not accept_encoding:
+        return None
+
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best_encoding = None
+    best_quality = 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best_encoding = encoding
+            best_quality = quality
+    return best_encoding
+
+@timed('compress_response')
+def compress_response(event, response):
+    """
+    Compress a response body for the client, negotiated from its Accept-Encoding header
+
+    The body is returned base64 encoded, as API Gateway expects for binary bodies. Small
+    bodies and clients that don't accept gzip or brotli get the response unchanged.
+
+    Args:
+        event (dict): Lambda proxy event
+        response (dict): Lambda proxy response with a str body
+
+    Returns:
+        dict: The same response, compressed when worthwhile
+    """
+    body = response.get('body')
+    if not body or response.get('isBase64Encoded'):
+        return response
+
+    headers = response.setdefault('headers', {})
+    headers['Vary'] = 'Accept-Encoding'
+    encoding = negotiate_encoding(get_header(event, 'Accept-Encoding'))
+    raw_body = body.encode('utf-8')
+    if encoding is None or len(raw_body) < COMPRESSION_MIN_SIZE:
+        return response
+
+    if encoding == 'br':
+        compressed_body = brotli.compress(raw_body, quality=BROTLI_QUALITY)
+    else:
+        compressed_body = gzip.compress(raw_body, compresslevel=GZIP_LEVEL, mtime=0)
+
+    headers['Content-Encoding'] = encoding
+    # The compressed representation gets its own strong tag
+    if 'ETag' in headers:
+        headers['ETag'] = f'{headers["ETag"][:-1]}-{encoding}"'
+    response['body'] = base64.b64encode(compressed_body).decode('ascii')
+    response['isBase64Encoded'] = True
+    return response
+
+def precompressed_response(event, gzip_body, etag=None):
+    """
+    Build a 200 JSON response from a body that was gzip compressed ahead of time
+
+    Clients that accept gzip get the stored bytes as they are, with no serialization or
+    compression in the request; others get the decompressed body.
+
+    Args:
+        event (dict): Lambda proxy event
+        gzip_body (str): Base64 of the gzip-compressed JSON body
+        etag (str): Entity tag from etag_for (optional)
+
+    Returns:
+        dict: Lambda proxy response
+    """
+    headers = dict(JSON_HEADERS)
+    headers['Vary'] = 'Accept-Encoding'
+    if etag is not None:
+        headers['ETag'] = etag
+        headers['Cache-Control'] = 'no-cache'
+
+    if negotiate_encoding(get_header(event, 'Accept-Encoding'), ('gzip',)) == 'gzip':
+        headers['Content-Encoding'] = 'gzip'
+        if etag is not None:
+            headers['ETag'] = f'{etag[:-1]}-gzip"'
+        return {'statusCode': 200, 'headers': headers, 'body': gzip_body, 'isBase64Encoded': True}
+
+    return {'statusCode': 200, 'headers': headers, 'body': gzip.decompress(base64.b64decode(gzip_body)).decode('utf-8')}
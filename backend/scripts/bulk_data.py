@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""Bulk export and import of the users and retirement data tables as NDJSON
+
+export runs a parallel segmented Scan of each table and streams every item as one line
+of newline-delimited JSON, {"table": ..., "Item": {...}}, with the item in DynamoDB JSON
+(wire format), so numbers and sets round-trip exactly. import reads such a file and
+writes it back with BatchWriteItem (25 items per request) from a pool of threads,
+retrying unprocessed items and throttled requests with exponential backoff.
+
+export defaults to every table of the app that exists (users, retirement_data and
+retirement_projections, and once the items layout is in use, retirement_items); import
+creates the tables named in the file that don't exist yet.
+
+Both stream, so memory stays flat however many users there are, and both work against
+DynamoDB Local (set DYNAMODB_ENDPOINT_URL):
+
+    python scripts/bulk_data.py export --output backup.ndjson.gz --segments 8
+    python scripts/bulk_data.py import --input backup.ndjson.gz --threads 16 [--rate 5000]
+
+Files ending in .gz are compressed; '-' (the default) is stdout / stdin.
+"""
+
+import argparse
+import gzip
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+from botocore.exceptions import ClientError
+
+# Add layers to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'shared', 'python'))
+
+from db import dynamodb
+
+# Tables export defaults to, those of them that exist: a document layout deployment has no
+# retirement_items, one migrated to the items layout keeps its retirement_data documents
+DEFAULT_TABLES = (
+    dynamodb.USERS_TABLE, dynamodb.RETIREMENT_DATA_TABLE, dynamodb.RETIREMENT_PROJECTIONS_TABLE, dynamodb.RETIREMENT_ITEMS_TABLE
+)
+
+# BatchWriteItem limit
+BATCH_SIZE = 25
+
+# Retries of unprocessed items and throttled requests, with exponential backoff and full jitter
+MAX_ATTEMPTS = 10
+BACKOFF_BASE = 0.05
+BACKOFF_MAX = 5.0
+RETRYABLE_ERRORS = (
+    'ProvisionedThroughputExceededException', 'ThrottlingException',
+    'RequestLimitExceeded', 'InternalServerError',
+)
+
+class RateLimiter:
+    # Token bucket shared by the writer threads, limiting items written per second
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, count):
+        """Block until count items may be written"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= count:
+                    self.tokens -= count
+                    return
+                wait = (count - self.tokens) / self.rate
+            time.sleep(wait)
+
+def open_output(path):
+    if path == '-':
+        return sys.stdout.buffer
+    return gzip.open(path, 'wb') if path.endswith('.gz') else open(path, 'wb')
+
+def open_input(path):
+    if path == '-':
+        return sys.stdin.buffer
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+def backoff(attempt):
+    """Sleep before retry number attempt (1-based)"""
+    time.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
+
+def scan_segment(table_name, segment, total_segments, lines, page_size):
+    """
+    Scan one segment of a table, putting one encoded NDJSON line per item on the queue
+
+    Args:
+        table_name (str): Table to scan
+        segment (int): Segment number
+        total_segments (int): Number of segments the table is split into
+        lines (queue.Queue): Bounded queue drained by the writer
+        page_size (int): Scan page Limit (optional)
+
+    Returns:
+        int: Number of items scanned
+    """
+    client = dynamodb.db_get_low_level_client()
+    scan = {'TableName': table_name, 'Segment': segment, 'TotalSegments': total_segments}
+    if page_size:
+        scan['Limit'] = page_size
+    count = 0
+    attempt = 0
+    while True:
+        try:
+            response = client.scan(**scan)
+        except ClientError as e:
+            attempt += 1
+            if e.response['Error']['Code'] not in RETRYABLE_ERRORS or attempt >= MAX_ATTEMPTS:
+                raise
+            backoff(attempt)
+            continue
+        attempt = 0
+        for item in response.get('Items', []):
+            lines.put(orjson.dumps({'table': table_name, 'Item': item}) + b'\n')
+        count += len(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return count
+        scan['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def export_tables(args):
+    """Export the tables with a parallel segmented Scan"""
+    lines = queue.Queue(maxsize=10000)
+    done = object()
+    output = open_output(args.output)
+    errors = []
+
+    def write_lines():
+        # Keeps draining after a write error so the scanning threads never block
+        while True:
+            line = lines.get()
+            if line is done:
+                return
+            if not errors:
+                try:
+                    output.write(line)
+                except Exception as e:
+                    errors.append(e)
+
+    tables = args.tables
+    if tables is None:
+        existing_tables = dynamodb.db_existing_tables()
+        tables = [table_name for table_name in DEFAULT_TABLES if table_name in existing_tables]
+
+    writer = threading.Thread(target=write_lines)
+    writer.start()
+    counts = {}
+    start = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=args.segments) as executor:
+            for table_name in tables:
+                futures = [
+                    executor.submit(scan_segment, table_name, segment, args.segments, lines, args.page_size)
+                    for segment in range(args.segments)
+                ]
+                counts[table_name] = sum(future.result() for future in futures)
+    finally:
+        lines.put(done)
+        writer.join()
+        if output is not sys.stdout.buffer:
+            output.close()
+        else:
+            output.flush()
+    if errors:
+        raise errors[0]
+
+    elapsed = time.monotonic() - start
+    total = sum(counts.values())
+    summary = ', '.join(f"{table_name}: {count}" for table_name, count in counts.items())
+    print(f"Exported {total} items ({summary}) in {elapsed:.1f}s, {total / max(elapsed, 1e-9):.0f} items/s", file=sys.stderr)
+
+def write_batch(table_name, items, limiter):
+    """
+    Write up to BATCH_SIZE items with BatchWriteItem, retrying unprocessed items
+
+    Args:
+        table_name (str): Table to write to
+        items (list): Items in DynamoDB JSON
+        limiter (RateLimiter): Shared rate limit (optional)
+
+    Returns:
+        int: Number of items written
+
+    Raises:
+        RuntimeError: If items are still unprocessed after MAX_ATTEMPTS attempts
+    """
+    client = dynamodb.db_get_low_level_client()
+    if limiter is not None:
+        limiter.acquire(len(items))
+    request_items = {table_name: [{'PutRequest': {'Item': item}} for item in items]}
+    attempt = 0
+    while request_items:
+        try:
+            response = client.batch_write_item(RequestItems=request_items)
+            request_items = response.get('UnprocessedItems') or {}
+        except ClientError as e:
+            if e.response['Error']['Code'] not in RETRYABLE_ERRORS:
+                raise
+        if request_items:
+            attempt += 1
+            if attempt >= MAX_ATTEMPTS:
+                unprocessed = sum(len(requests) for requests in request_items.values())
+                raise RuntimeError(f"{unprocessed} items of {table_name} still unprocessed after {MAX_ATTEMPTS} attempts")
+            backoff(attempt)
+    return len(items)
+
+def read_batches(stream, tables):
+    """Yield (table, items) batches of up to BATCH_SIZE items from an NDJSON stream"""
+    batches = {}
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+            table_name, item = record['table'], record['Item']
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            raise ValueError(f"Line {line_number}: expected {{\"table\": ..., \"Item\": ...}}")
+        if tables and table_name not in tables:
+            continue
+        batch = batches.setdefault(table_name, [])
+        batch.append(item)
+        if len(batch) == BATCH_SIZE:
+            yield table_name, batch
+            batches[table_name] = []
+    for table_name, batch in batches.items():
+        if batch:
+            yield table_name, batch
+
+def import_tables(args):
+    """Import an NDJSON export with BatchWriteItem from a pool of threads"""
+    limiter = RateLimiter(args.rate) if args.rate else None
+    # Bound the batches in flight so the reader doesn't run ahead of the writers
+    in_flight = threading.BoundedSemaphore(args.threads * 4)
+    counts = {}
+    counts_lock = threading.Lock()
+    errors = []
+    # Tables named in the file are created on their first batch, whatever the layout setting
+    created_tables = set()
+
+    def write(table_name, items):
+        try:
+            written = write_batch(table_name, items, limiter)
+            with counts_lock:
+                counts[table_name] = counts.get(table_name, 0) + written
+        except Exception as e:
+            errors.append(e)
+        finally:
+            in_flight.release()
+
+    start = time.monotonic()
+    stream = open_input(args.input)
+    try:
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            for table_name, items in read_batches(stream, set(args.tables) if args.tables else None):
+                if errors:
+                    break
+                if table_name not in created_tables:
+                    if table_name in DEFAULT_TABLES:
+                        dynamodb.db_create_tables([table_name])
+                    created_tables.add(table_name)
+                in_flight.acquire()
+                executor.submit(write, table_name, items)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+    if errors:
+        raise errors[0]
+
+    elapsed = time.monotonic() - start
+    total = sum(counts.values())
+    summary = ', '.join(f"{table_name}: {count}" for table_name, count in counts.items())
+    print(f"Imported {total} items ({summary}) in {elapsed:.1f}s, {total / max(elapsed, 1e-9):.0f} items/s", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='scan the tables to NDJSON')
+    export_parser.add_argument('--output', default='-', help="NDJSON file, .gz to compress (default: stdout)")
+    export_parser.add_argument('--tables', nargs='+', default=None, help="tables to export (default: the app's tables that exist)")
+    export_parser.add_argument('--segments', type=int, default=4, help='parallel Scan segments (and threads) per table')
+    export_parser.add_argument('--page-size', type=int, default=None, help='Scan page Limit, to spread read capacity')
+
+    import_parser = subparsers.add_parser('import', help='write an NDJSON export with BatchWriteItem')
+    import_parser.add_argument('--input', default='-', help="NDJSON file, .gz if compressed (default: stdin)")
+    import_parser.add_argument('--tables', nargs='+', default=None, help='only import these tables')
+    import_parser.add_argument('--threads', type=int, default=8, help='concurrent BatchWriteItem requests')
+    import_parser.add_argument('--rate', type=int, default=None, help='maximum items written per second, across threads')
+
+    args = parser.parse_args()
+    # Each thread gets its own pooled client (see db_get_low_level_client)
+    if args.command == 'export':
+        export_tables(args)
+    else:
+        import_tables(args)
+
+if __name__ == '__main__':
+    main()
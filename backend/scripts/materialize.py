@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Run materialization jobs outside the request path
+
+With MATERIALIZATION_QUEUE=file the writing functions leave one job file per user in
+MATERIALIZATION_QUEUE_DIR; --drain runs them. --all re-materializes every user (e.g.
+after New Year's Day, when every stored projection goes stale) and --user one user.
+
+    python scripts/materialize.py --drain [--watch SECONDS]
+    python scripts/materialize.py --all
+    python scripts/materialize.py --user USER_ID
+
+Uses the storage backend configured with STORAGE_BACKEND, like the functions.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add layers to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'shared', 'python'))
+
+from db.storage import db_create_tables_if_not_exist
+from services.materialization import FileQueue, MATERIALIZATION_QUEUE_DIR, materialize_all_users, materialize_user
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--drain', action='store_true', help=f'run the jobs queued in MATERIALIZATION_QUEUE_DIR ({MATERIALIZATION_QUEUE_DIR})')
+    group.add_argument('--all', action='store_true', help='re-materialize every user')
+    group.add_argument('--user', help='re-materialize one user')
+    parser.add_argument('--watch', type=float, metavar='SECONDS', help='with --drain, keep draining at this interval')
+    args = parser.parse_args()
+
+    db_create_tables_if_not_exist()
+
+    if args.user:
+        print(f"{'Materialized' if materialize_user(args.user) else 'Could not materialize'} {args.user}")
+    elif args.all:
+        print(f"Materialized {materialize_all_users()} users")
+    else:
+        file_queue = FileQueue(MATERIALIZATION_QUEUE_DIR)
+        while True:
+            count = file_queue.drain()
+            if count or not args.watch:
+                print(f"Ran {count} jobs")
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Migrate retirement data documents to the per-fund items layout
+
+Streams every item of the retirement_data table with a paginated Scan and writes its
+family, fund and actual_data items to the retirement_items table in batches, one user
+at a time, so memory stays flat however many users there are. Re-running it overwrites
+the items of already migrated users with the same content.
+
+    python scripts/migrate_retirement_items.py [--dry-run]
+
+Afterwards set RETIREMENT_DATA_LAYOUT=items for the functions.
+"""
+
+import argparse
+import os
+import sys
+
+# Add layers to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'shared', 'python'))
+
+os.environ['RETIREMENT_DATA_LAYOUT'] = 'items'
+
+from db import dynamodb
+
+def scan_documents():
+    """Yield every retirement data document, following Scan pagination"""
+    table = dynamodb.db_get_table(dynamodb.RETIREMENT_DATA_TABLE)
+    scan = {}
+    while True:
+        response = table.scan(**scan)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dry-run', action='store_true', help='count the items without writing them')
+    args = parser.parse_args()
+
+    dynamodb.db_create_tables_if_not_exist()
+    table = dynamodb.db_get_table(dynamodb.RETIREMENT_ITEMS_TABLE)
+
+    users = 0
+    items_written = 0
+    with table.batch_writer(overwrite_by_pkeys=['user_id', 'sk']) as batch:
+        for document in scan_documents():
+            retirement_fund_data, family_info_data = dynamodb.db_document_retirement_data(document)
+            items = dynamodb.db_items_from_document(document['user_id'], retirement_fund_data, family_info_data)
+            if not args.dry_run:
+                for item in items:
+                    batch.put_item(Item={**item, 'updated_at': document.get('updated_at', '')})
+            users += 1
+            items_written += len(items)
+
+    print(f"{'Would migrate' if args.dry_run else 'Migrated'} {users} users into {items_written} items")
+
+if __name__ == '__main__':
+    main()
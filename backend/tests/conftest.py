@@ -0,0 +1,59 @@
+# Shared pytest setup - puts the shared layer on the path, as the Lambda runtime does
+import importlib.util
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'shared', 'python'))
+
+import pytest
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'slow: timing checks, deselect with -m "not slow"')
+
+@pytest.fixture
+def dynamodb_storage(monkeypatch):
+    """Factory of DynamoDB storage backends on moto, for a layout and codec"""
+    from moto import mock_aws
+    from db import dynamodb
+
+    monkeypatch.delenv('DYNAMODB_ENDPOINT_URL', raising=False)
+    monkeypatch.setattr(dynamodb, 'AWS_REGION', 'us-east-1')
+    mock = mock_aws()
+    mock.start()
+
+    def make_storage(layout=dynamodb.LAYOUT_DOCUMENT, codec=dynamodb.CODEC_DECIMAL):
+        monkeypatch.setattr(dynamodb, 'RETIREMENT_DATA_LAYOUT', layout)
+        monkeypatch.setattr(dynamodb, 'DYNAMODB_CODEC', codec)
+        dynamodb.db_reset_clients()
+        dynamodb.db_reset_bootstrap_state()
+        storage = dynamodb.DynamoDBStorage()
+        storage.create_tables_if_not_exist()
+        return storage
+
+    yield make_storage
+    dynamodb.db_reset_clients()
+    dynamodb.db_reset_bootstrap_state()
+    mock.stop()
+
+@pytest.fixture
+def load_handler():
+    """Loader of a function's handler module by its directory name, e.g. get-retirement-data"""
+    def load(function_name):
+        path = os.path.join(os.path.dirname(__file__), '..', 'functions', function_name, 'handler.py')
+        spec = importlib.util.spec_from_file_location(f"handler_{function_name.replace('-', '_')}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    return load
+
+@pytest.fixture
+def sqlite_storage():
+    """In-memory SQLite storage installed as the process's storage backend"""
+    from db import storage
+    from db.sqlite import SQLiteStorage
+
+    sqlite = SQLiteStorage(':memory:')
+    sqlite.create_tables_if_not_exist()
+    storage.db_set_storage(sqlite)
+    yield sqlite
+    storage.db_set_storage(None)
@@ -0,0 +1,97 @@
+# CSV and OFX statement imports into per-year actual_data
+import json
+
+import pytest
+
+from services.actual_data_import import (
+    ActualDataImportError, IMPORT_FORMAT_CSV, merge_actual_data, parse_actual_data_import
+)
+
+CSV_EXPORT = '\ufeff' + '''As Of Date,Market Value,Deposits,Gain/Loss
+2023-06-30,"10,500.00",500,$250.50
+12/31/2023,"11,000.00",500,(0.50)
+2023-03-31,10000,,
+2024-12-31,12500,1000,500
+'''
+
+OFX_EXPORT = '''OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20230115120000[-5:EST]<TRNAMT>300.00</STMTTRN>
+<STMTTRN><TRNTYPE>DIV<DTPOSTED>20230620<TRNAMT>42.10</STMTTRN>
+<STMTTRN><TRNTYPE>FEE<DTPOSTED>20231231<TRNAMT>-2.10</STMTTRN>
+</BANKTRANLIST>
+<LEDGERBAL><BALAMT>8040.00<DTASOF>20231231</LEDGERBAL>
+</STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+'''
+
+def test_csv_export_is_aggregated_by_year():
+    for body in (CSV_EXPORT, CSV_EXPORT.encode('utf-8')):
+        actual_data, num_records = parse_actual_data_import(body)
+        assert num_records == 4
+        # The balance with the latest date wins, whatever the row order
+        assert actual_data == [
+            {'year': 2023, 'actual_balance': 11000.0, 'actual_contributions': 1000.0, 'actual_growth': 250.0},
+            {'year': 2024, 'actual_balance': 12500.0, 'actual_contributions': 1000.0, 'actual_growth': 500.0},
+        ]
+
+def test_csv_with_a_year_column():
+    actual_data, _ = parse_actual_data_import('year,balance\n2021,100\n\n2022,200\n', IMPORT_FORMAT_CSV)
+    assert [(entry['year'], entry['actual_balance']) for entry in actual_data] == [(2021, 100.0), (2022, 200.0)]
+
+def test_ofx_statement():
+    actual_data, num_records = parse_actual_data_import(OFX_EXPORT)
+    assert num_records == 4
+    assert actual_data == [{'year': 2023, 'actual_balance': 8040.0, 'actual_contributions': 300.0, 'actual_growth': 40.0}]
+
+@pytest.mark.parametrize('body, line', [
+    ('', None),
+    ('date,name\n2023-01-01,x\n', 1),
+    ('date,balance\n2023-01-01,100\n2023-13-45,100\n', 3),
+    ('year,balance\n2023,1O0\n', 2),
+    ('year,balance\n2023,100\n2024,\n', None),
+    # Not UTF-8, and a field over the csv module's size limit
+    (b'year,balance\n2023,100\n2024,\xff100\n', 3),
+    ('year,balance\n2023,100\n2024,"' + 'x' * 200000 + '"\n', 3),
+], ids=['empty', 'no-amount-column', 'bad-date', 'bad-amount', 'year-without-balance', 'not-utf8', 'field-too-large'])
+def test_invalid_uploads_are_rejected_with_their_line(body, line):
+    with pytest.raises(ActualDataImportError) as error:
+        parse_actual_data_import(body)
+    assert error.value.line == line
+
+def test_imported_years_replace_stored_ones():
+    existing = [
+        {'year': 2022, 'actual_balance': 1, 'actual_contributions': 0, 'actual_growth': 0},
+        {'year': '2023', 'actual_balance': 2, 'actual_contributions': 0, 'actual_growth': 0},
+    ]
+    imported = [
+        {'year': 2023, 'actual_balance': 3.0, 'actual_contributions': 0.0, 'actual_growth': 0.0},
+        {'year': 2024, 'actual_balance': 4.0, 'actual_contributions': 0.0, 'actual_growth': 0.0},
+    ]
+    assert merge_actual_data(existing, imported) == [existing[0], *imported]
+    assert merge_actual_data(None, imported) == imported
+
+def test_handler(sqlite_storage, load_handler):
+    sqlite_storage.update_family_info('user-1', [{'id': 'member-1', 'date_of_birth': '1980-01-01', 'retirement_age': 65}])
+    sqlite_storage.update_retirement_fund_data('user-1', [{
+        'id': 'fund-1', 'name': 'Fund', 'family_member_id': 'member-1', 'initial_investment': 1000,
+        'regular_contribution': 100, 'contribution_frequency': 12, 'return_rate_params': [],
+        'contribution_params': [], 'actual_data': [],
+    }])
+    handler = load_handler('import-actual-data')
+
+    def upload(body, is_base64_encoded=False):
+        return handler.lambda_handler({
+            'pathParameters': {'user_id': 'user-1', 'fund_id': 'fund-1'}, 'headers': {'Content-Type': 'text/csv'},
+            'body': body, 'isBase64Encoded': is_base64_encoded,
+        }, None)
+
+    # '2024,\xff' base64 encoded, so the body isn't UTF-8
+    response = upload('eWVhcixiYWxhbmNlCjIwMjQs/w==', is_base64_encoded=True)
+    assert response['statusCode'] == 400
+    assert json.loads(response['body'])['message'].startswith('Line 2:')
+
+    assert upload(CSV_EXPORT)['statusCode'] == 200
+    [fund] = sqlite_storage.get_retirement_fund_data('user-1')
+    assert [entry['year'] for entry in fund['actual_data']] == [2023, 2024]
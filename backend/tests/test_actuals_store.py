@@ -0,0 +1,30 @@
+# Year-indexed actual_data laid out over projection timelines
+from decimal import Decimal
+
+from models.actuals_store import ActualsStore
+
+ACTUAL_DATA = [
+    {'year': 2022, 'actual_balance': Decimal('1500.25'), 'actual_contributions': 100, 'actual_growth': '50.5'},
+    {'year': '2020', 'actual_balance': 1000, 'actual_contributions': 90, 'actual_growth': 10},
+    # Same year again, the first entry wins as in a scan of the list
+    {'year': 2022, 'actual_balance': 9999, 'actual_contributions': 0, 'actual_growth': 0},
+    {'year': None, 'actual_balance': 1, 'actual_contributions': 1, 'actual_growth': 1},
+]
+
+def test_entries_are_indexed_by_year():
+    store = ActualsStore.from_actual_data(ACTUAL_DATA)
+    assert len(store) == 2
+    assert store.years.tolist() == [2020, 2022]
+    assert store.balance.tolist() == [1000.0, 1500.25]
+    assert store.growth.tolist() == [10.0, 50.5]
+
+def test_window_over_a_timeline():
+    window = ActualsStore.from_actual_data(ACTUAL_DATA).window(2021, 3)
+    assert window['has_actual'].tolist() == [False, True, False]
+    assert window['actual_balance'].tolist() == [0.0, 1500.25, 0.0]
+    assert window['actual_contributions'].tolist() == [0.0, 100.0, 0.0]
+    assert window['actual_growth'].tolist() == [0.0, 50.5, 0.0]
+
+    # Years outside the timeline are left out
+    assert not ActualsStore.from_actual_data(ACTUAL_DATA).window(2030, 5)['has_actual'].any()
+    assert ActualsStore.from_actual_data(None).window(2020, 4)['has_actual'].tolist() == [False] * 4
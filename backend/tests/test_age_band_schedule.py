@@ -0,0 +1,49 @@
+# Compiled age-band schedules against the linear scans of the reference engine
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from models.age_band_schedule import MAX_AGE, compile_contribution_schedule, compile_return_rate_schedule
+from services.retirement_calculator import get_contribution_for_age, get_return_rate_for_age
+
+AGES = np.arange(-5, MAX_AGE + 6)
+
+RETURN_RATE_PARAMS = [
+    {'from_age': 18, 'to_age': 40, 'return_rate': 8},
+    # Overlaps the first band, which wins on 30..40
+    {'from_age': 30, 'to_age': 55.5, 'return_rate': Decimal('5.5')},
+    {'from_age': 60.2, 'to_age': MAX_AGE, 'return_rate': '3'},
+]
+
+CONTRIBUTION_PARAMS = [
+    {'from_age': 25, 'to_age': 35, 'contribution_amount': 500, 'contribution_frequency': 26},
+    {'from_age': 36, 'to_age': 36, 'contribution_amount': Decimal('1000.5'), 'contribution_frequency': 1},
+    {'from_age': 20, 'to_age': 50, 'contribution_amount': '50', 'contribution_frequency': 52},
+]
+
+def test_return_rates_match_the_scan():
+    schedule = compile_return_rate_schedule(RETURN_RATE_PARAMS)
+    expected = [get_return_rate_for_age(int(age), RETURN_RATE_PARAMS) for age in AGES]
+    assert schedule.resolve(AGES, 'return_rate').tolist() == pytest.approx(expected, abs=1e-15)
+    assert [schedule.lookup(int(age), 'return_rate') for age in AGES] == pytest.approx(expected, abs=1e-15)
+
+def test_contributions_match_the_scan():
+    schedule = compile_contribution_schedule(CONTRIBUTION_PARAMS, 200, 12)
+    expected = [get_contribution_for_age(int(age), CONTRIBUTION_PARAMS, 200, 12) for age in AGES]
+    assert list(zip(
+        schedule.resolve(AGES, 'contribution_amount').tolist(), schedule.resolve(AGES, 'contribution_frequency').tolist()
+    )) == expected
+    assert schedule.resolve(AGES, 'contribution_frequency').dtype.kind == 'i'
+
+def test_covers_marks_banded_ages():
+    schedule = compile_contribution_schedule(CONTRIBUTION_PARAMS, 200, 12)
+    assert schedule.covers(AGES).tolist() == [20 <= age <= 50 for age in AGES]
+    assert not compile_contribution_schedule([], 200, 12).covers(AGES).any()
+
+def test_invalid_bands():
+    params = [{'from_age': 'x', 'to_age': 40, 'return_rate': 8}, {'from_age': 50, 'to_age': 40, 'return_rate': 6}]
+    # Skipped by the calculator, rejected when strict
+    assert compile_return_rate_schedule(params).resolve(AGES, 'return_rate').tolist() == [0.07] * len(AGES)
+    with pytest.raises(ValueError, match='Return rate band 1'):
+        compile_return_rate_schedule(params, strict=True)
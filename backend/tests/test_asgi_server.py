@@ -0,0 +1,162 @@
+# ASGI server routes and the async DynamoDB reads behind get-retirement-data
+import asyncio
+import json
+import os
+import sys
+import urllib.request
+from datetime import datetime
+
+import pytest
+
+from db import dynamodb, storage
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+NOW = datetime.now()
+
+FAMILY_INFO_DATA = [{'id': 'member-1', 'name': 'Alex', 'date_of_birth': f'{NOW.year - 40}-01-01', 'retirement_age': 65, 'life_expectancy': 90}]
+RETIREMENT_FUND_DATA = [{
+    'id': 'fund-1', 'name': 'Fund', 'family_member_id': 'member-1', 'initial_investment': 10000,
+    'regular_contribution': 500, 'contribution_frequency': 12, 'start_date': None,
+    'return_rate_params': [], 'contribution_params': [],
+    'actual_data': [{'year': NOW.year - 1, 'actual_balance': 9000.5, 'actual_contributions': 6000, 'actual_growth': 100}],
+}]
+
+@pytest.fixture
+def asgi_server(monkeypatch, sqlite_storage):
+    """The ASGI app on the in-memory SQLite backend, with the projection on a thread pool"""
+    # Importing the server defaults these to DynamoDB Local, keep that to this test
+    for name in ('DYNAMODB_ENDPOINT_URL', 'AWS_DEFAULT_REGION'):
+        monkeypatch.setenv(name, os.environ.get(name, ''))
+    import asgi_server
+
+    monkeypatch.setattr(storage, 'STORAGE_BACKEND', storage.STORAGE_SQLITE)
+    monkeypatch.setattr(asgi_server, 'ASGI_WORKER_POOL', asgi_server.WORKER_POOL_THREAD)
+    monkeypatch.setattr(asgi_server, 'ASGI_WORKERS', 2)
+    return asgi_server
+
+async def call(app, method, path, body=None, query_string=b''):
+    """Send one HTTP request through the ASGI app, returns (status, headers, body)"""
+    messages = [{'type': 'http.request', 'body': json.dumps(body).encode() if body is not None else b'', 'more_body': False}]
+    sent = []
+    async def receive():
+        return messages.pop(0)
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query_string, 'headers': [(b'accept', b'application/json')]}
+    await app(scope, receive, send)
+    return sent[0]['status'], dict(sent[0]['headers']), sent[1]['body']
+
+async def serve(asgi_server, requests):
+    """Run the app's lifespan around requests, returns their responses"""
+    lifespan = [{'type': 'lifespan.startup'}]
+    started, stopped = asyncio.Event(), asyncio.Event()
+    async def receive():
+        if lifespan:
+            return lifespan.pop(0)
+        await started.wait()
+        return {'type': 'lifespan.shutdown'}
+    async def send(message):
+        if message['type'] == 'lifespan.startup.complete':
+            ready.set_result(True)
+        elif message['type'] == 'lifespan.shutdown.complete':
+            stopped.set()
+
+    ready = asyncio.get_running_loop().create_future()
+    lifespan_task = asyncio.create_task(asgi_server.app({'type': 'lifespan'}, receive, send))
+    await ready
+    try:
+        return [await call(asgi_server.app, *request) for request in requests]
+    finally:
+        started.set()
+        await lifespan_task
+        assert stopped.is_set()
+
+def test_routes_run_the_handlers(asgi_server, load_handler):
+    responses = asyncio.run(serve(asgi_server, [
+        ('POST', '/api/update_family_info/user-1', {'family_info_data': FAMILY_INFO_DATA}),
+        ('POST', '/api/update_retirement_data/user-1', {'retirement_fund_data': RETIREMENT_FUND_DATA}),
+        ('GET', '/api/get_retirement_data/user-1'),
+        ('GET', '/api/get_retirement_data/user-1', None, b'format=columns'),
+        ('GET', '/api/health'),
+        ('OPTIONS', '/api/get_retirement_data/user-1'),
+        ('GET', '/api/nothing/here'),
+        ('POST', '/api/get_retirement_data/user-1'),
+    ]))
+    assert [status for status, _, _ in responses] == [200, 200, 200, 200, 200, 200, 404, 404]
+
+    # Same projection as the Lambda handler
+    lambda_response = load_handler('get-retirement-data').lambda_handler({'pathParameters': {'user_id': 'user-1'}, 'headers': {}}, None)
+    assert json.loads(responses[2][2]) == json.loads(lambda_response['body'])
+    assert int(responses[2][1][b'content-length']) == len(responses[2][2])
+    assert 'year' in json.loads(responses[3][2])['retirement_fund_data'][0]['retirement_projection']
+
+def test_user_check_and_read_run_concurrently(asgi_server, monkeypatch):
+    # Each call waits for the other one to start, so running them one after the other times out
+    started = {}
+    async def wait_for_the_other(name, result):
+        started[name].set()
+        other = 'read' if name == 'create_user' else 'create_user'
+        await asyncio.wait_for(started[other].wait(), timeout=5)
+        return result
+    async def create_user_if_not_exists(user_id):
+        return await wait_for_the_other('create_user', True)
+    async def get_retirement_data(user_id):
+        return await wait_for_the_other('read', {'user_id': user_id, 'family_info_data': FAMILY_INFO_DATA, 'retirement_fund_data': RETIREMENT_FUND_DATA})
+    monkeypatch.setattr(asgi_server, 'create_user_if_not_exists', create_user_if_not_exists)
+    monkeypatch.setattr(asgi_server, 'get_retirement_data', get_retirement_data)
+
+    async def run():
+        started.update(create_user=asyncio.Event(), read=asyncio.Event())
+        return await serve(asgi_server, [('GET', '/api/get_retirement_data/user-1')])
+    [(status, _, body)] = asyncio.run(run())
+    assert status == 200
+    assert json.loads(body)['retirement_fund_data'][0]['retirement_projection']
+
+@pytest.fixture(scope='module')
+def moto_server():
+    """A moto server on a free port: aiobotocore's requests bypass moto's in-process mock"""
+    from moto.server import ThreadedMotoServer
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f'http://{host}:{port}'
+    server.stop()
+
+@pytest.fixture(params=['document', 'document-native', 'items', 'items-native'])
+def dynamodb_endpoint_storage(request, monkeypatch, moto_server):
+    urllib.request.urlopen(urllib.request.Request(f'{moto_server}/moto-api/reset', method='POST')).close()
+    monkeypatch.setenv('DYNAMODB_ENDPOINT_URL', moto_server)
+    layout, _, codec = request.param.partition('-')
+    monkeypatch.setattr(dynamodb, 'RETIREMENT_DATA_LAYOUT', layout)
+    monkeypatch.setattr(dynamodb, 'DYNAMODB_CODEC', codec or dynamodb.CODEC_DECIMAL)
+    dynamodb.db_reset_clients()
+    dynamodb.db_reset_bootstrap_state()
+    dynamodb_storage = dynamodb.DynamoDBStorage()
+    dynamodb_storage.create_tables_if_not_exist()
+    yield dynamodb_storage
+    dynamodb.db_reset_clients()
+    dynamodb.db_reset_bootstrap_state()
+
+def test_async_reads_match_the_sync_reads(dynamodb_endpoint_storage):
+    from db import dynamodb_async
+
+    dynamodb_endpoint_storage.update_family_info('user-1', FAMILY_INFO_DATA)
+    dynamodb_endpoint_storage.update_retirement_fund_data('user-1', RETIREMENT_FUND_DATA)
+    dynamodb_endpoint_storage.put_materialized_projection('user-1', {'source_version': 'v1', 'body': None})
+
+    async def run():
+        try:
+            return await asyncio.gather(
+                dynamodb_async.db_async_get_retirement_data('user-1'),
+                dynamodb_async.db_async_get_retirement_data('nobody'),
+                dynamodb_async.db_async_create_user_if_not_exists('user-2', 'two@example.com'),
+            )
+        finally:
+            await dynamodb_async.db_async_close_client()
+
+    retirement_data, missing, created = asyncio.run(run())
+    assert retirement_data == dynamodb_endpoint_storage.get_retirement_data('user-1')
+    assert missing is None
+    assert created and dynamodb_endpoint_storage.get_user_id('two@example.com') == 'user-2'
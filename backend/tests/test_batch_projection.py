@@ -0,0 +1,66 @@
+# Batch projections of many users, against one calculate_retirement_projection per user
+import copy
+from datetime import datetime
+
+import pytest
+
+from services.projection_result import RESULT_COLUMNS, RESULT_ROWS
+from services.retirement_calculator import calculate_retirement_projection, calculate_retirement_projections_batch
+
+NOW = datetime.now()
+
+def make_user(index):
+    """A household whose size, horizon and fund mix depend on index"""
+    family_info_data = [
+        {'id': f'member-{member}', 'date_of_birth': f'{NOW.year - 30 - 7 * index - member}-05-01', 'retirement_age': 60 + member}
+        for member in range(1 + index % 3)
+    ]
+    retirement_fund_data = [
+        {
+            'id': f'fund-{fund}', 'family_member_id': f'member-{fund % len(family_info_data)}',
+            'initial_investment': 1000 * (index + fund + 1), 'regular_contribution': 100 + 10 * fund,
+            'contribution_frequency': (1, 12, 26, 52)[(index + fund) % 4], 'start_date': None,
+            'return_rate_params': [{'from_age': 18, 'to_age': 50 + index, 'return_rate': 4 + fund}],
+            'contribution_params': [], 'actual_data': [],
+        }
+        for fund in range(1 + index % 4)
+    ]
+    # A fund whose member was removed
+    retirement_fund_data.append({**retirement_fund_data[0], 'id': 'orphan', 'family_member_id': 'member-9'})
+    return {'user_id': f'user-{index}', 'retirement_fund_data': retirement_fund_data, 'family_info_data': family_info_data}
+
+def one_by_one(users, result_format):
+    projected = []
+    for user in copy.deepcopy(users):
+        calculate_retirement_projection(user, user, result_format=result_format)
+        projected.append(user)
+    return projected
+
+@pytest.mark.parametrize('result_format', [RESULT_ROWS, RESULT_COLUMNS])
+@pytest.mark.parametrize('batch_size', [1, 3, 1000])
+def test_batch_matches_one_projection_per_user(result_format, batch_size):
+    users = [make_user(index) for index in range(7)]
+    batched = list(calculate_retirement_projections_batch(copy.deepcopy(users), batch_size=batch_size, result_format=result_format))
+    expected = one_by_one(users, result_format)
+
+    assert [user['user_id'] for user in batched] == [user['user_id'] for user in users]
+    for batched_user, expected_user in zip(batched, expected):
+        for batched_fund, expected_fund in zip(batched_user['retirement_fund_data'], expected_user['retirement_fund_data']):
+            batched_projection, expected_projection = batched_fund['retirement_projection'], expected_fund['retirement_projection']
+            if result_format == RESULT_COLUMNS:
+                batched_projection, expected_projection = batched_projection.to_rows(), expected_projection.to_rows()
+            assert batched_projection == expected_projection
+        assert len(batched_user['retirement_fund_data'][-1]['retirement_projection']) == 0
+
+def test_documents_are_consumed_one_batch_at_a_time():
+    consumed = []
+    def user_documents():
+        for index in range(5):
+            consumed.append(index)
+            yield make_user(index)
+
+    batches = calculate_retirement_projections_batch(user_documents(), batch_size=2)
+    next(batches)
+    assert consumed == [0, 1]
+    assert len(list(batches)) == 4
+    assert consumed == [0, 1, 2, 3, 4]
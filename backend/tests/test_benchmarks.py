@@ -0,0 +1,67 @@
+# Benchmark suite regression check and synthetic households, see benchmarks/run_suite.py
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(__file__), '..', 'benchmarks')
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from run_suite import CASES, compare
+from synthetic import make_household
+
+def result(min_ms):
+    return {'min_ms': min_ms, 'median_ms': min_ms, 'repeat': 1}
+
+def test_compare_flags_slowdowns_over_the_threshold():
+    baseline = {'a': result(10.0), 'b': result(10.0), 'c': result(10.0)}
+    results = {'a': result(10.5), 'b': result(12.0), 'c': result(8.0)}
+    assert compare(results, baseline, 0.10) == [('b', 10.0, 12.0)]
+
+def test_compare_allows_exactly_the_threshold():
+    assert compare({'a': result(11.0)}, {'a': result(10.0)}, 0.10) == []
+    assert compare({'a': result(11.01)}, {'a': result(10.0)}, 0.10) == [('a', 10.0, 11.01)]
+
+def test_compare_ignores_benchmarks_missing_from_the_baseline():
+    assert compare({'new': result(100.0)}, {'old': result(1.0)}, 0.10) == []
+
+def test_compare_threshold_zero():
+    assert compare({'a': result(10.001)}, {'a': result(10.0)}, 0.0) == [('a', 10.0, 10.001)]
+
+@pytest.mark.parametrize('case', list(CASES))
+def test_make_household_is_seeded(case):
+    assert make_household(seed=1, **CASES[case]) == make_household(seed=1, **CASES[case])
+    assert make_household(seed=1, **CASES[case]) != make_household(seed=2, **CASES[case])
+
+def run_suite(tmp_path, *args):
+    return subprocess.run(
+        [sys.executable, os.path.join(BENCHMARKS_DIR, 'run_suite.py'),
+         '--filter', 'single-fund/codec.encode_fund', '--repeat', '1', *args],
+        cwd=tmp_path, capture_output=True, text=True, timeout=120
+    )
+
+def write_baseline(path, min_ms):
+    with open(path, 'w') as f:
+        json.dump({'results': {'single-fund/codec.encode_fund': result(min_ms)}}, f)
+
+@pytest.mark.slow
+def test_suite_fails_on_regression(tmp_path):
+    write_baseline(tmp_path / 'baseline.json', 1e-9)
+    completed = run_suite(tmp_path, '--output', 'results.json', '--baseline', 'baseline.json')
+    assert completed.returncode == 1, completed.stderr
+    assert 'REGRESSION single-fund/codec.encode_fund' in completed.stdout
+
+    with open(tmp_path / 'results.json') as f:
+        output = json.load(f)
+    assert list(output['results']) == ['single-fund/codec.encode_fund']
+    assert output['meta']['seed'] == 0
+
+@pytest.mark.slow
+def test_suite_passes_within_threshold(tmp_path):
+    write_baseline(tmp_path / 'baseline.json', 1e6)
+    completed = run_suite(tmp_path, '--output', 'results.json', '--baseline', 'baseline.json', '--threshold', '0.10')
+    assert completed.returncode == 0, completed.stderr
+    assert 'REGRESSION' not in completed.stdout
+    assert 'No regressions over 10%' in completed.stdout
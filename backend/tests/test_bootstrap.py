@@ -0,0 +1,45 @@
+# One-time table bootstrap and user creation per process
+from db import dynamodb
+
+def test_tables_are_checked_once_per_process(dynamodb_storage, monkeypatch):
+    storage = dynamodb_storage()
+    listed = []
+    existing_tables = dynamodb.db_existing_tables
+    monkeypatch.setattr(dynamodb, 'db_existing_tables', lambda: listed.append(1) or existing_tables())
+
+    for _ in range(3):
+        storage.create_tables_if_not_exist()
+    assert listed == []
+
+    dynamodb.db_reset_bootstrap_state()
+    for _ in range(3):
+        storage.create_tables_if_not_exist()
+    assert listed == [1]
+
+def test_users_are_created_once_and_never_overwritten(dynamodb_storage):
+    storage = dynamodb_storage()
+    users = dynamodb.db_get_table(dynamodb.USERS_TABLE)
+
+    assert storage.create_user_if_not_exists('user-1', 'one@example.com')
+    assert 'Item' in users.get_item(Key={'user_id': 'user-1'})
+
+    # A user known to the process costs no write at all
+    users.delete_item(Key={'user_id': 'user-1'})
+    assert storage.create_user_if_not_exists('user-1')
+    assert 'Item' not in users.get_item(Key={'user_id': 'user-1'})
+
+    # Another process writes once, conditionally, so an existing user is kept as is
+    dynamodb.db_reset_bootstrap_state()
+    assert storage.create_user_if_not_exists('user-1', 'one@example.com')
+    created = users.get_item(Key={'user_id': 'user-1'})['Item']
+    dynamodb.db_reset_bootstrap_state()
+    assert storage.create_user_if_not_exists('user-1', 'other@example.com')
+    assert users.get_item(Key={'user_id': 'user-1'})['Item'] == created
+
+def test_known_users_are_bounded(dynamodb_storage, monkeypatch):
+    storage = dynamodb_storage()
+    monkeypatch.setattr(dynamodb, 'KNOWN_USERS_MAX', 3)
+    for index in range(10):
+        storage.create_user_if_not_exists(f'user-{index}')
+        assert len(dynamodb._known_users) <= 3
+    assert 'user-9' in dynamodb._known_users
@@ -0,0 +1,45 @@
+# bulk_data export and import round trip on moto
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import bulk_data
+from db import dynamodb
+
+FUNDS = [{
+    'retirement_fund_id': 'fund-1', 'name': 'RRSP', 'family_member_id': 'member-1',
+    'initial_balance': 1000, 'actual_data': [{'year': 2024, 'balance': 1200}],
+}]
+FAMILY = [{'family_member_id': 'member-1', 'date_of_birth': '1980-01-01'}]
+
+def item_count(table_name):
+    return dynamodb.db_get_low_level_client().scan(TableName=table_name, Select='COUNT')['Count']
+
+def test_items_layout_round_trip(dynamodb_storage, tmp_path):
+    storage = dynamodb_storage(layout=dynamodb.LAYOUT_ITEMS)
+    storage.update_retirement_fund_data('user-1', FUNDS)
+    storage.update_family_info('user-1', FAMILY)
+    counts = {table_name: item_count(table_name) for table_name in dynamodb.db_existing_tables()}
+    assert counts[dynamodb.RETIREMENT_ITEMS_TABLE] > 0
+
+    export_path = str(tmp_path / 'export.ndjson.gz')
+    bulk_data.export_tables(argparse.Namespace(output=export_path, tables=None, segments=2, page_size=None))
+
+    # Import into an empty account whose layout setting doesn't name retirement_items
+    client = dynamodb.db_get_low_level_client()
+    for table_name in dynamodb.db_existing_tables():
+        client.delete_table(TableName=table_name)
+    dynamodb_storage(layout=dynamodb.LAYOUT_DOCUMENT)
+    for table_name in dynamodb.db_existing_tables():
+        client.delete_table(TableName=table_name)
+
+    bulk_data.import_tables(argparse.Namespace(input=export_path, tables=None, threads=2, rate=None))
+    assert dynamodb.db_existing_tables() == [dynamodb.RETIREMENT_ITEMS_TABLE]
+    assert item_count(dynamodb.RETIREMENT_ITEMS_TABLE) == counts[dynamodb.RETIREMENT_ITEMS_TABLE]
+
+    items_storage = dynamodb_storage(layout=dynamodb.LAYOUT_ITEMS)
+    retirement_data = items_storage.get_retirement_data('user-1')
+    assert [fund['retirement_fund_id'] for fund in retirement_data['retirement_fund_data']] == ['fund-1']
+    assert retirement_data['family_info_data'][0]['family_member_id'] == 'member-1'
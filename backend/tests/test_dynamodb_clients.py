@@ -0,0 +1,49 @@
+# Pooled DynamoDB resource, client and table handles
+import threading
+
+from db import dynamodb
+
+def test_handles_are_reused_across_calls(dynamodb_storage, monkeypatch):
+    storage = dynamodb_storage()
+    created = []
+    create_resource = dynamodb.db_create_dynamodb_client
+    monkeypatch.setattr(dynamodb, 'db_create_dynamodb_client', lambda: created.append(1) or create_resource())
+    dynamodb.db_reset_clients()
+
+    # A request's worth of calls builds one resource
+    storage.create_user_if_not_exists('user-1')
+    storage.update_family_info('user-1', [])
+    storage.get_retirement_data('user-1')
+    assert len(created) == 1
+
+    assert dynamodb.db_get_dynamodb_client() is dynamodb.db_get_dynamodb_client()
+    assert dynamodb.db_get_table(dynamodb.USERS_TABLE) is dynamodb.db_get_table(dynamodb.USERS_TABLE)
+    assert dynamodb.db_get_low_level_client() is dynamodb.db_get_low_level_client()
+
+def test_reset_drops_the_handles(dynamodb_storage):
+    dynamodb_storage()
+    resource = dynamodb.db_get_dynamodb_client()
+    table = dynamodb.db_get_table(dynamodb.USERS_TABLE)
+    client = dynamodb.db_get_low_level_client()
+
+    dynamodb.db_reset_clients()
+    assert dynamodb.db_get_dynamodb_client() is not resource
+    assert dynamodb.db_get_table(dynamodb.USERS_TABLE) is not table
+    assert dynamodb.db_get_low_level_client() is not client
+
+def test_each_thread_has_its_own_resource(dynamodb_storage):
+    dynamodb_storage()
+    resource = dynamodb.db_get_dynamodb_client()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(dynamodb.db_get_dynamodb_client()))
+    thread.start()
+    thread.join()
+    assert other[0] is not resource
+    assert dynamodb.db_get_dynamodb_client() is resource
+
+def test_connection_pool_settings(monkeypatch):
+    monkeypatch.delenv('DYNAMODB_ENDPOINT_URL', raising=False)
+    monkeypatch.setattr(dynamodb, 'DYNAMODB_MAX_POOL_CONNECTIONS', 32)
+    config = dynamodb._dynamodb_connection_args()['config']
+    assert config.max_pool_connections == 32
+    assert config.tcp_keepalive == dynamodb.DYNAMODB_TCP_KEEPALIVE
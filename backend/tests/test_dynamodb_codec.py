@@ -0,0 +1,74 @@
+# DYNAMODB_CODEC=native: every retirement data read and write goes through the native codec
+from decimal import Decimal
+
+import pytest
+
+from db import dynamodb
+from utils.converter import convert_floats_to_decimals
+
+USER_ID = 'user-1'
+
+FAMILY_INFO_DATA = [{'id': 'member-1', 'name': 'Member 1', 'date_of_birth': '1980-01-01', 'retirement_age': 65, 'life_expectancy': 90}]
+
+def make_funds():
+    # 30 actual years, so the items layout writes more than one batch
+    actual_data = [
+        {'year': year, 'actual_balance': 1000.1 + year, 'actual_contributions': 0.1, 'actual_growth': -2.5}
+        for year in range(1995, 2025)
+    ]
+    return [
+        {
+            'id': f'fund-{i}',
+            'name': f'Fund {i}',
+            'family_member_id': 'member-1',
+            'initial_investment': 10000.5,
+            'regular_contribution': 500,
+            'contribution_frequency': 12,
+            'return_rate_params': [{'from_age': 18, 'to_age': 100, 'return_rate': 6.3}],
+            'contribution_params': [],
+            'actual_data': actual_data,
+        }
+        for i in range(2)
+    ]
+
+def contains_decimal(value):
+    if isinstance(value, dict):
+        return any(contains_decimal(item) for item in value.values())
+    if isinstance(value, list):
+        return any(contains_decimal(item) for item in value)
+    return isinstance(value, Decimal)
+
+def write_user(storage):
+    assert storage.update_family_info(USER_ID, FAMILY_INFO_DATA)
+    assert storage.update_retirement_fund_data(USER_ID, make_funds())
+    assert storage.update_single_fund(USER_ID, 'fund-1', {'regular_contribution': 750.25, 'actual_data': make_funds()[0]['actual_data'][:5]})
+    assert storage.put_materialized_projection(USER_ID, {'source_version': 'v1', 'projection': '[]'})
+
+@pytest.mark.parametrize('layout', [dynamodb.LAYOUT_DOCUMENT, dynamodb.LAYOUT_ITEMS])
+def test_native_reads_have_no_decimals(dynamodb_storage, layout):
+    storage = dynamodb_storage(layout, dynamodb.CODEC_NATIVE)
+    write_user(storage)
+
+    document = storage.get_retirement_data(USER_ID)
+    for value in (document, storage.get_retirement_fund_data(USER_ID), storage.get_family_info(USER_ID)):
+        assert not contains_decimal(value)
+
+    funds = document['retirement_fund_data']
+    assert [fund['id'] for fund in funds] == ['fund-0', 'fund-1']
+    assert funds[1]['regular_contribution'] == 750.25
+    assert funds[1]['version'] == 2
+    assert len(funds[0]['actual_data']) == 30 and len(funds[1]['actual_data']) == 5
+    assert list(storage.iter_user_ids()) == [USER_ID]
+
+@pytest.mark.parametrize('layout', [dynamodb.LAYOUT_DOCUMENT, dynamodb.LAYOUT_ITEMS])
+def test_codecs_store_the_same_data(dynamodb_storage, layout):
+    # Written under one codec and read under the other, the data is the same
+    write_user(dynamodb_storage(layout, dynamodb.CODEC_DECIMAL))
+    native = dynamodb_storage(layout, dynamodb.CODEC_NATIVE).get_retirement_data(USER_ID)
+    decimal = dynamodb_storage(layout, dynamodb.CODEC_DECIMAL).get_retirement_data(USER_ID)
+    assert convert_floats_to_decimals(native) == decimal
+
+    # Rewriting unchanged funds under the other codec is not a change
+    storage = dynamodb_storage(layout, dynamodb.CODEC_NATIVE)
+    assert storage.update_retirement_fund_data(USER_ID, native['retirement_fund_data'])
+    assert [fund['version'] for fund in storage.get_retirement_fund_data(USER_ID)] == [1, 2]
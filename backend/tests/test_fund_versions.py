@@ -0,0 +1,79 @@
+# Fund versions of full fund list writes: taken from the stored funds, never from the payload
+import pytest
+
+from db import dynamodb
+from db.sqlite import SQLiteStorage
+from db.storage import FundVersionConflictError
+
+USER_ID = 'user-1'
+
+def make_fund(fund_id, regular_contribution=500, **fields):
+    return {
+        'id': fund_id,
+        'name': f'Fund {fund_id}',
+        'family_member_id': 'member-1',
+        'initial_investment': 10000,
+        'regular_contribution': regular_contribution,
+        'contribution_frequency': 12,
+        'return_rate_params': [],
+        'contribution_params': [],
+        'actual_data': [],
+        **fields,
+    }
+
+@pytest.fixture(params=['document', 'document-native', 'items', 'items-native', 'sqlite'])
+def storage(request, dynamodb_storage):
+    if request.param == 'sqlite':
+        storage = SQLiteStorage(':memory:')
+        storage.create_tables_if_not_exist()
+        return storage
+    layout, _, codec = request.param.partition('-')
+    return dynamodb_storage(layout, codec or dynamodb.CODEC_DECIMAL)
+
+def stored_versions(storage):
+    return {fund['id']: int(fund['version']) for fund in storage.get_retirement_fund_data(USER_ID)}
+
+def test_new_funds_start_at_version_one(storage):
+    assert storage.update_retirement_fund_data(USER_ID, [make_fund('fund-1', version=41), make_fund('fund-2')])
+    assert stored_versions(storage) == {'fund-1': 1, 'fund-2': 1}
+
+def test_only_changed_funds_are_bumped(storage):
+    storage.update_retirement_fund_data(USER_ID, [make_fund('fund-1'), make_fund('fund-2')])
+
+    storage.update_retirement_fund_data(USER_ID, [make_fund('fund-1'), make_fund('fund-2', regular_contribution=900)])
+    assert stored_versions(storage) == {'fund-1': 1, 'fund-2': 2}
+
+    actual_data = [{'year': 2020, 'actual_balance': 1.5, 'actual_contributions': 0.5, 'actual_growth': 0.25}]
+    storage.update_retirement_fund_data(USER_ID, [make_fund('fund-1', actual_data=actual_data), make_fund('fund-2', regular_contribution=900)])
+    assert stored_versions(storage) == {'fund-1': 2, 'fund-2': 2}
+
+@pytest.mark.parametrize('client_version', [None, 0, 1, 99])
+def test_client_version_cannot_move_stored_version(storage, client_version):
+    storage.update_retirement_fund_data(USER_ID, [make_fund('fund-1')])
+    for regular_contribution in (600, 700):
+        storage.update_single_fund(USER_ID, 'fund-1', {'regular_contribution': regular_contribution})
+    assert stored_versions(storage) == {'fund-1': 3}
+
+    # A stale (or missing) client version in a full list write, with or without changes
+    extra = {} if client_version is None else {'version': client_version}
+    storage.update_retirement_fund_data(USER_ID, [make_fund('fund-1', regular_contribution=700, **extra)])
+    assert stored_versions(storage) == {'fund-1': 3}
+    storage.update_retirement_fund_data(USER_ID, [make_fund('fund-1', regular_contribution=800, **extra)])
+    assert stored_versions(storage) == {'fund-1': 4}
+
+    # So a client still holding an older version keeps getting a conflict
+    for stale_version in (1, 2, 3):
+        with pytest.raises(FundVersionConflictError):
+            storage.update_single_fund(USER_ID, 'fund-1', {'regular_contribution': 100}, expected_version=stale_version)
+    assert storage.update_single_fund(USER_ID, 'fund-1', {'regular_contribution': 100}, expected_version=4)
+    assert stored_versions(storage) == {'fund-1': 5}
+
+def test_projection_outputs_are_never_stored(storage):
+    outputs = {'retirement_projection': [{'year': 2030, 'end_amount': 1.5}], 'retirement_simulation': {'p50': [1.5]}}
+    storage.update_retirement_fund_data(USER_ID, [make_fund('fund-1')])
+    storage.update_retirement_fund_data(USER_ID, [make_fund('fund-1', **outputs)])
+    storage.update_single_fund(USER_ID, 'fund-1', outputs)
+
+    [fund] = storage.get_retirement_fund_data(USER_ID)
+    assert not set(outputs) & set(fund)
+    assert int(fund['version']) == 2
@@ -0,0 +1,111 @@
+# Goal-seek solutions plugged back into the calculator
+import copy
+import json
+from datetime import datetime
+
+import pytest
+
+from services.goal_seek import GoalSeekError, parse_goal_seek_request, solve_goal
+from services.retirement_calculator import calculate_retirement_projection
+
+NOW = datetime.now()
+
+def make_retirement_data():
+    family_info_data = [
+        {'id': 'member-1', 'date_of_birth': f'{NOW.year - 40}-03-01', 'retirement_age': 65},
+        {'id': 'member-2', 'date_of_birth': f'{NOW.year - 38}-09-01', 'retirement_age': 60},
+    ]
+    retirement_fund_data = [
+        {
+            # Started in the past, with a contribution band and an actual balance last year
+            'id': 'fund-1', 'family_member_id': 'member-1', 'initial_investment': 50000,
+            'regular_contribution': 500, 'contribution_frequency': 12, 'start_date': f'{NOW.year - 6}-01-01',
+            'return_rate_params': [{'from_age': 18, 'to_age': 55, 'return_rate': 6}],
+            'contribution_params': [{'from_age': 45, 'to_age': 50, 'contribution_amount': 1500, 'contribution_frequency': 12}],
+            'actual_data': [{'year': NOW.year - 1, 'actual_balance': 90000, 'actual_contributions': 6000, 'actual_growth': 4000}],
+        },
+        {
+            'id': 'fund-2', 'family_member_id': 'member-1', 'initial_investment': 10000,
+            'regular_contribution': 100, 'contribution_frequency': 26, 'start_date': None,
+            'return_rate_params': [], 'contribution_params': [], 'actual_data': [],
+        },
+        {
+            'id': 'fund-3', 'family_member_id': 'member-2', 'initial_investment': 30000,
+            'regular_contribution': 300, 'contribution_frequency': 12, 'start_date': None,
+            'return_rate_params': [], 'contribution_params': [], 'actual_data': [],
+        },
+    ]
+    return {'retirement_fund_data': retirement_fund_data, 'family_info_data': family_info_data}
+
+def balance_at_retirement(retirement_data, member_id):
+    """Sum of the member's funds' balances at the start of the retirement year, from the calculator"""
+    retirement_data = copy.deepcopy(retirement_data)
+    calculate_retirement_projection(retirement_data, retirement_data)
+    member = next(member for member in retirement_data['family_info_data'] if member['id'] == member_id)
+    return sum(
+        next(row['begin_amount'] for row in fund['retirement_projection'] if row['age'] == member['retirement_age'])
+        for fund in retirement_data['retirement_fund_data'] if fund['family_member_id'] == member_id
+    )
+
+def with_fund(retirement_data, fund_id, **changes):
+    retirement_data = copy.deepcopy(retirement_data)
+    next(fund for fund in retirement_data['retirement_fund_data'] if fund['id'] == fund_id).update(changes)
+    return retirement_data
+
+def with_member(retirement_data, member_id, **changes):
+    retirement_data = copy.deepcopy(retirement_data)
+    next(member for member in retirement_data['family_info_data'] if member['id'] == member_id).update(changes)
+    return retirement_data
+
+@pytest.mark.parametrize('fund_id', ['fund-1', 'fund-2'])
+def test_solved_contribution_reaches_the_target_in_the_calculator(fund_id):
+    retirement_data = make_retirement_data()
+    target = 1500000
+    result = solve_goal(copy.deepcopy(retirement_data), parse_goal_seek_request(
+        {'solve_for': 'contribution', 'fund_id': fund_id, 'target_balance': target}
+    ), now=NOW)
+    value = result['value']
+
+    reached = balance_at_retirement(with_fund(retirement_data, fund_id, regular_contribution=value), 'member-1')
+    assert reached >= target
+    assert balance_at_retirement(with_fund(retirement_data, fund_id, regular_contribution=value - 1), 'member-1') < target
+    assert result['achieved'] == pytest.approx(reached, abs=0.05)
+    assert result['current'] == pytest.approx(balance_at_retirement(retirement_data, 'member-1'), abs=0.05)
+
+def test_contribution_bands_covering_every_year_are_rejected():
+    retirement_data = with_fund(
+        make_retirement_data(), 'fund-2',
+        contribution_params=[{'from_age': 18, 'to_age': 100, 'contribution_amount': 100, 'contribution_frequency': 12}]
+    )
+    with pytest.raises(GoalSeekError):
+        solve_goal(retirement_data, parse_goal_seek_request(
+            {'solve_for': 'contribution', 'fund_id': 'fund-2', 'target_balance': 1000000}
+        ), now=NOW)
+
+def test_solved_retirement_age_reaches_the_target_in_the_calculator():
+    retirement_data = make_retirement_data()
+    target = 1200000
+    result = solve_goal(copy.deepcopy(retirement_data), parse_goal_seek_request(
+        {'solve_for': 'retirement_age', 'family_member_id': 'member-1', 'target_balance': target}
+    ), now=NOW)
+    value = result['value']
+
+    assert balance_at_retirement(with_member(retirement_data, 'member-1', retirement_age=value), 'member-1') >= target
+    assert balance_at_retirement(with_member(retirement_data, 'member-1', retirement_age=value - 1), 'member-1') < target
+
+def test_handler(sqlite_storage, load_handler):
+    retirement_data = make_retirement_data()
+    sqlite_storage.update_family_info('user-1', retirement_data['family_info_data'])
+    sqlite_storage.update_retirement_fund_data('user-1', retirement_data['retirement_fund_data'])
+    handler = load_handler('goal-seek')
+
+    def post(body):
+        return handler.lambda_handler({'pathParameters': {'user_id': 'user-1'}, 'body': json.dumps(body), 'headers': {}}, None)
+
+    response = post({'solve_for': 'contribution', 'fund_id': 'fund-2', 'target_balance': 1500000})
+    assert response['statusCode'] == 200
+    value = json.loads(response['body'])['value']
+    assert balance_at_retirement(with_fund(retirement_data, 'fund-2', regular_contribution=value), 'member-1') >= 1500000
+
+    assert post({'solve_for': 'contribution', 'fund_id': 'missing', 'target_balance': 1})['statusCode'] == 400
+    assert post({'solve_for': 'salary', 'target_balance': 1})['statusCode'] == 400
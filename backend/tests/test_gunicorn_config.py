@@ -0,0 +1,72 @@
+# Production gunicorn settings (gunicorn.conf.py)
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+from db import dynamodb, storage
+from db.sqlite import SQLiteStorage
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..')
+CONFIG_PATH = os.path.join(BACKEND_DIR, 'gunicorn.conf.py')
+
+@pytest.fixture
+def load_config(monkeypatch):
+    """Loader of gunicorn.conf.py under a given environment, the environment defaults it sets are undone"""
+    def load(**environ):
+        for name in ('WEB_CONCURRENCY', 'ASGI_WORKERS', 'DYNAMODB_ENDPOINT_URL', 'MAX_REQUESTS'):
+            # setenv first so the original value (or its absence) is restored afterwards
+            monkeypatch.setenv(name, '')
+            monkeypatch.delenv(name)
+        for name, value in environ.items():
+            monkeypatch.setenv(name, value)
+        spec = importlib.util.spec_from_file_location('gunicorn_conf', CONFIG_PATH)
+        config = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(config)
+        return config
+    return load
+
+def test_settings(load_config, monkeypatch):
+    monkeypatch.setattr('multiprocessing.cpu_count', lambda: 8)
+    config = load_config(WEB_CONCURRENCY='4', MAX_REQUESTS='1000')
+    assert config.wsgi_app == 'asgi_server:app'
+    assert config.worker_class == 'uvicorn.workers.UvicornWorker'
+    assert config.preload_app is True
+    assert (config.workers, config.max_requests) == (4, 1000)
+    # The cores are split between the workers' projection pools
+    assert os.environ['ASGI_WORKERS'] == '2'
+    # Production talks to DynamoDB itself
+    assert os.environ['DYNAMODB_ENDPOINT_URL'] == ''
+
+    assert load_config(WEB_CONCURRENCY='16').workers == 16
+    assert os.environ['ASGI_WORKERS'] == '1'
+
+def test_post_fork_drops_everything_opened_before_the_fork(load_config, dynamodb_storage):
+    from db import dynamodb_async
+    config = load_config()
+
+    dynamodb_storage()
+    dynamodb.db_get_dynamodb_client()
+    dynamodb.db_create_tables_if_not_exist()
+    dynamodb._remember_user('user-1')
+    storage.db_set_storage(SQLiteStorage(':memory:'))
+    dynamodb_async._clients['loop'] = 'client'
+    try:
+        config.post_fork(None, None)
+        assert storage._storage is None
+        assert getattr(dynamodb._registry, 'dynamodb', None) is None
+        assert not dynamodb._tables_verified and not dynamodb._known_users
+        assert dynamodb_async._clients == {}
+    finally:
+        dynamodb_async._clients.pop('loop', None)
+        storage.db_set_storage(None)
+
+def test_gunicorn_accepts_the_config_and_preloads_the_app():
+    environ = {**os.environ, 'STORAGE_BACKEND': 'sqlite', 'SQLITE_DATABASE_PATH': ':memory:', 'WEB_CONCURRENCY': '2'}
+    result = subprocess.run(
+        [sys.executable, '-m', 'gunicorn', '-c', CONFIG_PATH, '--check-config'],
+        cwd=BACKEND_DIR, env=environ, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
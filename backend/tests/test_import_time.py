@@ -0,0 +1,28 @@
+# Import time of each Lambda function, see benchmarks/check_import_time.py
+import os
+import statistics
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from check_import_time import FUNCTION_BUDGETS, measure_function
+
+# Multiplies every budget, for hosts slower than a developer machine
+BUDGET_SCALE = float(os.environ.get('IMPORT_TIME_BUDGET_SCALE', '2'))
+RUNS = 3
+
+@pytest.mark.parametrize('function_name', list(FUNCTION_BUDGETS))
+def test_lazy_imports(function_name):
+    _, forbidden = FUNCTION_BUDGETS[function_name]
+    _, imports = measure_function(function_name)
+    imported = {name for name, _, _, _ in imports}
+    assert not imported & set(forbidden), f"{function_name} must load {', '.join(sorted(imported & set(forbidden)))} lazily"
+
+@pytest.mark.slow
+@pytest.mark.parametrize('function_name', list(FUNCTION_BUDGETS))
+def test_import_time_budget(function_name):
+    budget_ms, _ = FUNCTION_BUDGETS[function_name]
+    import_ms = statistics.median(measure_function(function_name)[0] for _ in range(RUNS))
+    assert import_ms <= budget_ms * BUDGET_SCALE, f"{function_name} imports in {import_ms:.1f} ms, budget {budget_ms * BUDGET_SCALE:.0f} ms"
@@ -0,0 +1,111 @@
+# Incremental projection updates from checkpoints, against a full recompute
+import copy
+from datetime import datetime
+
+import pytest
+
+from services.projection_cache import ProjectionCache, calculate_retirement_projection_cached
+from services.retirement_calculator import (
+    calculate_projection_checkpoints, calculate_retirement_projection, update_retirement_projection
+)
+from services import retirement_calculator
+
+NOW = datetime.now()
+
+def make_household():
+    family_info_data = [
+        {'id': 'member-1', 'date_of_birth': f'{NOW.year - 40}-03-01', 'retirement_age': 65},
+        {'id': 'member-2', 'date_of_birth': f'{NOW.year - 35}-07-15', 'retirement_age': 60},
+    ]
+    retirement_fund_data = [
+        {
+            'id': 'fund-1', 'family_member_id': 'member-1', 'initial_investment': 50000,
+            'regular_contribution': 500, 'contribution_frequency': 12, 'start_date': f'{NOW.year - 5}-01-01',
+            'return_rate_params': [{'from_age': 18, 'to_age': 50, 'return_rate': 6}],
+            'contribution_params': [{'from_age': 45, 'to_age': 55, 'contribution_amount': 800, 'contribution_frequency': 26}],
+            'actual_data': [{'year': NOW.year - 2, 'actual_balance': 61000, 'actual_contributions': 6000, 'actual_growth': 2500}],
+        },
+        {
+            'id': 'fund-2', 'family_member_id': 'member-2', 'initial_investment': 20000,
+            'regular_contribution': 200, 'contribution_frequency': 26, 'start_date': None,
+            'return_rate_params': [], 'contribution_params': [], 'actual_data': [],
+        },
+    ]
+    return {'retirement_fund_data': retirement_fund_data}, {'family_info_data': family_info_data}
+
+def full_projection(retirement_fund_info, family_info):
+    retirement_fund_info = copy.deepcopy(retirement_fund_info)
+    calculate_retirement_projection(retirement_fund_info, family_info)
+    return {fund['id']: fund['retirement_projection'] for fund in retirement_fund_info['retirement_fund_data']}
+
+def projections(retirement_fund_info):
+    return {fund['id']: fund['retirement_projection'] for fund in retirement_fund_info['retirement_fund_data']}
+
+@pytest.mark.parametrize('fund_changes', [
+    # Fund edits: a later year, the first year, and an actual_data row appended
+    {'fund-1': {'return_rate_params': [{'from_age': 18, 'to_age': 50, 'return_rate': 6}, {'from_age': 51, 'to_age': 70, 'return_rate': 4}]}},
+    {'fund-1': {'initial_investment': 55000}},
+    {'fund-2': {'actual_data': [{'year': NOW.year + 3, 'actual_balance': 40000, 'actual_contributions': 5200, 'actual_growth': 1800}]}},
+    # Member switch
+    {'fund-2': {'family_member_id': 'member-1'}},
+    # Both funds, one of them unchanged
+    {'fund-1': {'regular_contribution': 500}, 'fund-2': {'regular_contribution': 250}},
+])
+def test_fund_changes_match_full_recompute(fund_changes):
+    retirement_fund_info, family_info = make_household()
+    checkpoints = calculate_projection_checkpoints(retirement_fund_info, family_info)
+    update_retirement_projection(retirement_fund_info, family_info, checkpoints, copy.deepcopy(fund_changes))
+    assert projections(retirement_fund_info) == full_projection(retirement_fund_info, family_info)
+
+@pytest.mark.parametrize('member_changes', [
+    # Not the latest retirement year of the household, so only the family hash moves
+    {'retirement_age': 62},
+    {'date_of_birth': f'{NOW.year - 36}-07-15'},
+])
+def test_family_edits_recompute_in_full(member_changes):
+    retirement_fund_info, family_info = make_household()
+    checkpoints = calculate_projection_checkpoints(retirement_fund_info, family_info)
+    family_info['family_info_data'][1].update(member_changes)
+    update_retirement_projection(retirement_fund_info, family_info, checkpoints, {'fund-1': {'regular_contribution': 600}})
+    assert projections(retirement_fund_info) == full_projection(retirement_fund_info, family_info)
+
+def test_added_fund_is_projected_and_unknown_fund_is_rejected():
+    retirement_fund_info, family_info = make_household()
+    checkpoints = calculate_projection_checkpoints(
+        {'retirement_fund_data': retirement_fund_info['retirement_fund_data'][:1]}, family_info
+    )
+    checkpoints = update_retirement_projection(retirement_fund_info, family_info, checkpoints, {'fund-2': {}})
+    assert set(checkpoints['funds']) == {'fund-1', 'fund-2'}
+    assert projections(retirement_fund_info)['fund-2'] == full_projection(retirement_fund_info, family_info)['fund-2']
+
+    with pytest.raises(ValueError):
+        update_retirement_projection(retirement_fund_info, family_info, checkpoints, {'fund-3': {'initial_investment': 1}})
+
+def test_update_leaves_previous_checkpoints_unchanged():
+    retirement_fund_info, family_info = make_household()
+    checkpoints = calculate_projection_checkpoints(retirement_fund_info, family_info)
+    previous_rows = checkpoints['funds']['fund-1']['rows']
+    update_retirement_projection(retirement_fund_info, family_info, checkpoints, {'fund-1': {'initial_investment': 1}})
+    assert checkpoints['funds']['fund-1']['rows'] is previous_rows
+
+def test_cached_projection_replays_from_the_changed_year(monkeypatch):
+    cache = ProjectionCache()
+    retirement_fund_info, family_info = make_household()
+    calculate_retirement_projection_cached(copy.deepcopy(retirement_fund_info), family_info, user_id='user-1', cache=cache)
+
+    projected_widths = []
+    project_schedules = retirement_calculator.project_schedules
+    def record_widths(schedules):
+        projected_widths.extend(len(schedule['ages']) for schedule in schedules)
+        return project_schedules(schedules)
+    monkeypatch.setattr(retirement_calculator, 'project_schedules', record_widths)
+
+    # An actual balance five years out only replays the fund from that year
+    retirement_fund_info['retirement_fund_data'][1]['actual_data'] = [
+        {'year': NOW.year + 5, 'actual_balance': 40000, 'actual_contributions': 5200, 'actual_growth': 1800}
+    ]
+    calculate_retirement_projection_cached(retirement_fund_info, family_info, user_id='user-1', cache=cache)
+    monkeypatch.undo()
+    full = full_projection(retirement_fund_info, family_info)
+    assert projections(retirement_fund_info) == full
+    assert projected_widths == [len(full['fund-2']) - 5]
@@ -0,0 +1,70 @@
+# Items layout: user listing and single fund patches
+import pytest
+
+from db import dynamodb
+from db.storage import FundVersionConflictError
+
+def make_fund(fund_id, **fields):
+    return {
+        'id': fund_id, 'name': f'Fund {fund_id}', 'family_member_id': 'member-1', 'initial_investment': 10000,
+        'regular_contribution': 500, 'contribution_frequency': 12, 'return_rate_params': [],
+        'contribution_params': [], 'actual_data': [], **fields,
+    }
+
+def actual_data(*years):
+    return [{'year': year, 'actual_balance': year * 10.0, 'actual_contributions': 1.0, 'actual_growth': 2.0} for year in years]
+
+@pytest.fixture(params=[dynamodb.CODEC_DECIMAL, dynamodb.CODEC_NATIVE])
+def storage(request, dynamodb_storage):
+    return dynamodb_storage(dynamodb.LAYOUT_ITEMS, request.param)
+
+def stored_items(user_id):
+    return {item['sk']: item for item in dynamodb._db_items_query(user_id)}
+
+def test_every_user_is_listed_once(storage):
+    storage.update_family_info('family-only', [{'id': 'member-1', 'date_of_birth': '1980-01-01', 'retirement_age': 65}])
+    storage.update_retirement_fund_data('funds-only', [make_fund('fund-1'), make_fund('fund-2', actual_data=actual_data(2020))])
+    storage.update_family_info('both', [])
+    storage.update_retirement_fund_data('both', [make_fund('fund-1')])
+    storage.put_materialized_projection('projection-only', {'body': None})
+
+    user_ids = list(storage.iter_user_ids())
+    assert sorted(user_ids) == ['both', 'family-only', 'funds-only']
+
+def test_patch_never_writes_storage_keys(storage):
+    storage.update_retirement_fund_data('user-1', [make_fund('fund-1'), make_fund('fund-2')])
+    patch = {'sk': 'FUND#fund-2', 'user_id': 'user-2', 'position': 7, 'fund_id': 'fund-2', 'regular_contribution': 600}
+    assert storage.update_single_fund('user-1', 'fund-1', patch)
+
+    funds = storage.get_retirement_fund_data('user-1')
+    assert [(fund['id'], fund['regular_contribution']) for fund in funds] == [('fund-1', 600), ('fund-2', 500)]
+    assert stored_items('user-1')['FUND#fund-1']['position'] == 0
+    assert not list(dynamodb._db_items_query('user-2'))
+
+def test_fund_and_actuals_are_written_in_one_transaction(storage, monkeypatch):
+    storage.update_retirement_fund_data('user-1', [make_fund('fund-1', actual_data=actual_data(2020, 2021))])
+    def no_batch_writes(*args):
+        raise AssertionError('actual items written outside the transaction')
+    monkeypatch.setattr(dynamodb, '_db_write_batch', no_batch_writes)
+
+    assert storage.update_single_fund('user-1', 'fund-1', {'regular_contribution': 600, 'actual_data': actual_data(2021, 2022)}, expected_version=1)
+    [fund] = storage.get_retirement_fund_data('user-1')
+    assert (fund['regular_contribution'], fund['version']) == (600, 2)
+    assert [entry['year'] for entry in fund['actual_data']] == [2021, 2022]
+
+    # A version conflict cancels the whole transaction
+    with pytest.raises(FundVersionConflictError):
+        storage.update_single_fund('user-1', 'fund-1', {'regular_contribution': 700, 'actual_data': actual_data(2023)}, expected_version=1)
+    [fund] = storage.get_retirement_fund_data('user-1')
+    assert (fund['regular_contribution'], fund['version']) == (600, 2)
+    assert [entry['year'] for entry in fund['actual_data']] == [2021, 2022]
+
+    assert not storage.update_single_fund('user-1', 'fund-9', {'actual_data': actual_data(2023)})
+    assert 'ACTUAL#fund-9#2023' not in stored_items('user-1')
+
+def test_actual_changes_over_the_transaction_limit(storage):
+    storage.update_retirement_fund_data('user-1', [make_fund('fund-1')])
+    years = list(range(1900, 1900 + dynamodb.TRANSACT_WRITE_MAX_ITEMS + 20))
+    assert storage.update_single_fund('user-1', 'fund-1', {'actual_data': actual_data(*years)})
+    [fund] = storage.get_retirement_fund_data('user-1')
+    assert [entry['year'] for entry in fund['actual_data']] == years
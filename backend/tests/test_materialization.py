@@ -0,0 +1,45 @@
+# Materialized projections and the GET that answers from them
+import json
+from datetime import datetime
+
+from db.storage import MATERIALIZED_PROJECTION_KEY
+from services import materialization
+
+NOW = datetime.now()
+FAMILY = [{'id': 'member-1', 'date_of_birth': f'{NOW.year - 40}-03-01', 'retirement_age': 65}]
+FUND = {'id': 'fund-1', 'name': 'RRSP', 'family_member_id': 'member-1', 'initial_investment': 10000,
+        'regular_contribution': 100, 'contribution_frequency': 12}
+
+def get_event(user_id):
+    return {'pathParameters': {'user_id': user_id}, 'queryStringParameters': None, 'headers': {}}
+
+def test_get_answers_from_the_materialized_projection(sqlite_storage, load_handler, monkeypatch):
+    sqlite_storage.update_family_info('user-1', FAMILY)
+    sqlite_storage.update_retirement_fund_data('user-1', [FUND])
+    assert materialization.materialize_user('user-1')
+
+    handler = load_handler('get-retirement-data')
+    monkeypatch.setattr(handler, 'build_response', lambda *args: None)
+    response = handler.lambda_handler(get_event('user-1'), None)
+    assert response['statusCode'] == 200
+
+def test_too_large_projection_is_not_queued_again(sqlite_storage, load_handler, monkeypatch):
+    sqlite_storage.update_family_info('user-1', FAMILY)
+    sqlite_storage.update_retirement_fund_data('user-1', [FUND])
+    monkeypatch.setattr(materialization, 'MATERIALIZED_MAX_BYTES', 10)
+    assert materialization.materialize_user('user-1')
+    materialized = sqlite_storage.get_retirement_data('user-1')[MATERIALIZED_PROJECTION_KEY]
+    assert materialized['body'] is None and materialized['source_version']
+
+    handler = load_handler('get-retirement-data')
+    enqueued = []
+    monkeypatch.setattr(handler, 'enqueue_materialization', enqueued.append)
+    response = handler.lambda_handler(get_event('user-1'), None)
+    assert response['statusCode'] == 200
+    assert json.loads(response['body'])['retirement_fund_data'][0]['retirement_projection']
+    assert enqueued == []
+
+    # Once the data changes the stored marker is stale, and the recompute is queued
+    sqlite_storage.update_retirement_fund_data('user-1', [{**FUND, 'regular_contribution': 200}])
+    assert handler.lambda_handler(get_event('user-1'), None)['statusCode'] == 200
+    assert enqueued == ['user-1']
@@ -0,0 +1,59 @@
+# Materialized projections of the document layout, stored apart from the retirement data item
+import pytest
+
+from db import dynamodb
+from db.storage import MATERIALIZED_PROJECTION_KEY
+from services.materialization import MATERIALIZED_MAX_BYTES
+
+FAMILY = [{'family_member_id': 'member-1', 'date_of_birth': '1980-01-01'}]
+
+def make_fund(index, notes_bytes=0):
+    return {'id': f'fund-{index}', 'name': f'Fund {index}', 'family_member_id': 'member-1',
+            'initial_investment': 1000, 'notes': 'x' * notes_bytes}
+
+def materialized(body_bytes):
+    return {'source_version': 'v1', 'valid_until': '2100-01-01', 'materialized_at': '2026-01-01T00:00:00', 'body': 'b' * body_bytes}
+
+def stored_data_item(user_id):
+    return dynamodb._db_get_item(dynamodb.RETIREMENT_DATA_TABLE, {'user_id': user_id})
+
+@pytest.fixture(params=[dynamodb.CODEC_DECIMAL, dynamodb.CODEC_NATIVE])
+def storage(request, dynamodb_storage):
+    storage = dynamodb_storage(codec=request.param)
+    storage.update_family_info('user-1', FAMILY)
+    return storage
+
+def test_projection_is_read_with_the_data(storage):
+    storage.update_retirement_fund_data('user-1', [make_fund(1)])
+    assert storage.put_materialized_projection('user-1', materialized(100))
+
+    assert MATERIALIZED_PROJECTION_KEY not in stored_data_item('user-1')
+    retirement_data = storage.get_retirement_data('user-1')
+    assert retirement_data[MATERIALIZED_PROJECTION_KEY] == materialized(100)
+    assert [fund['id'] for fund in retirement_data['retirement_fund_data']] == ['fund-1']
+
+def test_no_projection(storage):
+    assert MATERIALIZED_PROJECTION_KEY not in storage.get_retirement_data('user-1')
+    assert storage.get_retirement_data('user-2') is None
+
+def test_large_data_and_projection(storage):
+    # Together well over the 400 KB item limit, each far under it
+    storage.update_retirement_fund_data('user-1', [make_fund(index, 50 * 1024) for index in range(4)])
+    assert storage.put_materialized_projection('user-1', materialized(MATERIALIZED_MAX_BYTES))
+    assert storage.get_retirement_data('user-1')[MATERIALIZED_PROJECTION_KEY]['body'] == 'b' * MATERIALIZED_MAX_BYTES
+
+@pytest.mark.parametrize('write', [
+    lambda storage: storage.update_family_info('user-1', FAMILY),
+    lambda storage: storage.update_retirement_fund_data('user-1', [make_fund(1)]),
+    lambda storage: storage.update_single_fund('user-1', 'fund-1', {'name': 'Renamed'}),
+])
+def test_projection_on_the_data_item_is_ignored_and_removed(storage, write):
+    storage.update_retirement_fund_data('user-1', [make_fund(1)])
+    dynamodb._db_update_item(
+        dynamodb.RETIREMENT_DATA_TABLE, {'user_id': 'user-1'},
+        f'SET {MATERIALIZED_PROJECTION_KEY} = :materialized', {':materialized': materialized(100)}
+    )
+    assert MATERIALIZED_PROJECTION_KEY not in storage.get_retirement_data('user-1')
+
+    assert write(storage)
+    assert MATERIALIZED_PROJECTION_KEY not in stored_data_item('user-1')
@@ -0,0 +1,129 @@
+# Request metrics - EMF records of instrumented handlers, and the disabled no-op path
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from utils import metrics
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_ENABLED', True)
+    monkeypatch.setattr(metrics, '_cold_start', True)
+
+def emitted(capsys):
+    lines = capsys.readouterr().out.splitlines()
+    return [json.loads(line) for line in lines]
+
+def make_handler(stage_calls=2, status_code=200, body='{"ok": true}'):
+    stage = metrics.timed('stage')(lambda: None)
+
+    @metrics.instrument_handler('test-function')
+    def handler(event, context):
+        for _ in range(stage_calls):
+            stage()
+        with metrics.span('block'):
+            metrics.record('Items', 3)
+            metrics.record('Items', 4)
+        return {'statusCode': status_code, 'body': body}
+    return handler
+
+def test_record_shape(enabled, capsys):
+    handler = make_handler()
+    response = handler({'body': 'x' * 17}, SimpleNamespace(aws_request_id='request-1'))
+    assert response == {'statusCode': 200, 'body': '{"ok": true}'}
+
+    [record] = emitted(capsys)
+    [directive] = record['_aws']['CloudWatchMetrics']
+    assert isinstance(record['_aws']['Timestamp'], int)
+    assert directive['Namespace'] == metrics.METRICS_NAMESPACE
+    assert directive['Dimensions'] == [['FunctionName'], ['FunctionName', 'ColdStart']]
+
+    # Every declared metric is a top-level number, and every dimension a top-level string
+    units = {metric['Name']: metric['Unit'] for metric in directive['Metrics']}
+    assert units == {
+        'RequestBytes': metrics.UNIT_BYTES,
+        'ResponseBytes': metrics.UNIT_BYTES,
+        'Duration': metrics.UNIT_MILLISECONDS,
+        'stage': metrics.UNIT_MILLISECONDS,
+        'block': metrics.UNIT_MILLISECONDS,
+        'Items': metrics.UNIT_COUNT,
+    }
+    assert all(isinstance(record[name], (int, float)) for name in units)
+    assert record['FunctionName'] == 'test-function'
+    assert record['ColdStart'] == 'true'
+
+    assert record['RequestBytes'] == 17
+    assert record['ResponseBytes'] == len('{"ok": true}')
+    assert record['Items'] == 7
+    assert record['Duration'] >= record['stage'] + record['block'] - 0.002
+    assert record['StatusCode'] == 200
+    assert record['RequestId'] == 'request-1'
+
+def test_one_record_per_invocation_and_only_the_first_is_cold(enabled, capsys):
+    handler = make_handler()
+    for _ in range(3):
+        handler({}, None)
+    records = emitted(capsys)
+    assert [record['ColdStart'] for record in records] == ['true', 'false', 'false']
+    assert all('RequestId' not in record for record in records)
+    assert all(record['RequestBytes'] == 0 for record in records)
+
+def test_repeated_stages_add_up(enabled, capsys, monkeypatch):
+    times = iter(range(100))
+    monkeypatch.setattr(metrics.time, 'perf_counter', lambda: next(times) / 1000)
+    make_handler(stage_calls=3)({}, None)
+    [record] = emitted(capsys)
+    # Each stage call takes 1 ms of the fake clock
+    assert record['stage'] == 3
+
+def test_failed_invocation_is_still_recorded(enabled, capsys):
+    @metrics.instrument_handler('test-function')
+    def handler(event, context):
+        metrics.record('Items', 1)
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        handler({}, None)
+    [record] = emitted(capsys)
+    assert record['Items'] == 1
+    assert 'StatusCode' not in record
+    assert 'Duration' in record
+    assert metrics.current_request() is None
+
+def test_outside_a_handler_records_nothing(enabled, capsys):
+    metrics.record('Items', 1)
+    with metrics.span('block'):
+        pass
+    metrics.timed('stage')(lambda: None)()
+    assert metrics.current_request() is None
+    assert capsys.readouterr().out == ''
+
+def test_disabled_is_a_no_op(monkeypatch, capsys):
+    monkeypatch.setattr(metrics, 'METRICS_ENABLED', False)
+
+    def stage():
+        return 'result'
+
+    def handler(event, context):
+        return {'statusCode': 200, 'body': ''}
+
+    assert metrics.timed('stage')(stage) is stage
+    assert metrics.instrument_handler('test-function')(handler) is handler
+    assert metrics.span('block') is metrics.span('other')
+    assert metrics.span('block').__class__ is metrics._NullSpan
+
+    make_handler()({'body': 'x'}, None)
+    assert capsys.readouterr().out == ''
+    assert metrics.current_request() is None
+
+def test_instrumented_lambda_handler(enabled, capsys, sqlite_storage, load_handler):
+    handler = load_handler('get-retirement-data').lambda_handler
+    response = handler({'pathParameters': {'user_id': 'missing-user'}, 'queryStringParameters': None},
+                       SimpleNamespace(aws_request_id='request-2'))
+
+    [record] = emitted(capsys)
+    assert record['FunctionName'] == 'get-retirement-data'
+    assert record['StatusCode'] == response['statusCode']
+    assert record['ResponseBytes'] == len(response['body'])
+    assert record['RequestId'] == 'request-2'
@@ -0,0 +1,90 @@
+# Content-addressed projection cache: key stability, key changes on edits and eviction
+import copy
+from datetime import datetime
+
+import pytest
+
+from services.projection_cache import (
+    FileProjectionStore, ProjectionCache, calculate_retirement_projection_cached, projection_cache_key
+)
+from services.projection_result import FundProjection, RESULT_COLUMNS, RESULT_ROWS
+
+NOW = datetime(2026, 6, 1)
+
+FUND = {
+    'id': 'fund-1', 'family_member_id': 'member-1', 'initial_investment': 50000,
+    'regular_contribution': 500, 'contribution_frequency': 12, 'start_date': None,
+    'return_rate_params': [{'from_age': 18, 'to_age': 50, 'return_rate': 6}],
+    'contribution_params': [], 'actual_data': [],
+}
+MEMBER = {'id': 'member-1', 'date_of_birth': '1986-03-01', 'retirement_age': 65}
+
+def key(fund=FUND, member=MEMBER, latest_retirement_year=2051, now=NOW):
+    return projection_cache_key(fund, member, latest_retirement_year, now)
+
+def test_key_is_stable():
+    reordered = dict(reversed(list(FUND.items())))
+    assert key(reordered) == key()
+    # Outputs and the storage version aren't inputs
+    assert key({**FUND, 'version': 7, 'retirement_projection': [{'year': 2026}]}) == key()
+    # Later in the same year at the same age
+    assert key(now=datetime(2026, 6, 20)) == key()
+
+@pytest.mark.parametrize('changed_key', [
+    lambda: key({**FUND, 'regular_contribution': 501}),
+    lambda: key({**FUND, 'return_rate_params': [{'from_age': 18, 'to_age': 50, 'return_rate': 5}]}),
+    lambda: key({**FUND, 'actual_data': [{'year': 2025, 'actual_balance': 60000}]}),
+    lambda: key(member={**MEMBER, 'retirement_age': 60}),
+    lambda: key(member={**MEMBER, 'date_of_birth': '1987-03-01'}),
+    lambda: key(latest_retirement_year=2055),
+    lambda: key(now=datetime(2027, 1, 2)),
+])
+def test_key_changes_on_input_edits(changed_key):
+    assert changed_key() != key()
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ProjectionCache(max_entries=2)
+    cache.put('a', [1])
+    cache.put('b', [2])
+    assert cache.get('a') == [1]
+    cache.put('c', [3])
+    assert cache.get('b') is None
+    assert cache.get('a') == [1]
+    assert cache.get('c') == [3]
+
+def test_persisted_tier_refills_the_process_cache(tmp_path):
+    store = FileProjectionStore(str(tmp_path))
+    ProjectionCache(store=store).put('rows', [{'year': 2026, 'end_amount': 1.5}])
+    ProjectionCache(store=store).put('columns', FundProjection.empty())
+
+    cache = ProjectionCache(store=store)
+    assert cache.get('rows') == [{'year': 2026, 'end_amount': 1.5}]
+    assert isinstance(cache.get('columns'), FundProjection)
+    assert cache.get('missing') is None
+
+def test_rows_and_columns_are_cached_side_by_side():
+    cache = ProjectionCache()
+    family_info = {'family_info_data': [MEMBER]}
+    for result_format in (RESULT_ROWS, RESULT_COLUMNS):
+        calculate_retirement_projection_cached({'retirement_fund_data': [copy.deepcopy(FUND)]}, family_info, cache=cache, result_format=result_format)
+    assert len(cache._entries) == 2
+
+    for result_format, projection_type in ((RESULT_ROWS, list), (RESULT_COLUMNS, FundProjection)):
+        retirement_fund_info = {'retirement_fund_data': [copy.deepcopy(FUND)]}
+        calculate_retirement_projection_cached(retirement_fund_info, family_info, cache=cache, result_format=result_format)
+        assert isinstance(retirement_fund_info['retirement_fund_data'][0]['retirement_projection'], projection_type)
+    assert len(cache._entries) == 2
+
+def test_edited_fund_misses_and_unchanged_fund_hits():
+    cache = ProjectionCache()
+    family_info = {'family_info_data': [MEMBER]}
+    other_fund = {**FUND, 'id': 'fund-2', 'initial_investment': 1000}
+    retirement_fund_info = {'retirement_fund_data': [copy.deepcopy(FUND), copy.deepcopy(other_fund)]}
+    calculate_retirement_projection_cached(retirement_fund_info, family_info, cache=cache)
+    unchanged_rows = retirement_fund_info['retirement_fund_data'][1]['retirement_projection']
+
+    edited = {'retirement_fund_data': [{**FUND, 'regular_contribution': 900}, copy.deepcopy(other_fund)]}
+    calculate_retirement_projection_cached(edited, family_info, cache=cache)
+    assert edited['retirement_fund_data'][1]['retirement_projection'] is unchanged_rows
+    assert edited['retirement_fund_data'][0]['retirement_projection'] != retirement_fund_info['retirement_fund_data'][0]['retirement_projection']
+    assert len(cache._entries) == 3
@@ -0,0 +1,103 @@
+# Parity of the vectorized projection engine with the reference loop
+import copy
+import random
+from datetime import datetime
+
+import pytest
+
+from services.projection_result import RESULT_COLUMNS
+from services.retirement_calculator import (
+    calculate_retirement_projection, ENGINE_REFERENCE, ENGINE_VECTORIZED, VECTORIZED_RELATIVE_ERROR
+)
+
+NUM_HOUSEHOLDS = 300
+
+AMOUNT_FIELDS = ('begin_amount', 'contribution', 'growth', 'end_amount')
+
+def make_random_household(seed, now):
+    """
+    Build a random household covering the inputs the engines must agree on: overlapping and
+    gapped age bands, mixed contribution frequencies, negative returns, funds without a start
+    date or family member, and duplicate or out-of-range actual_data years
+    """
+    rng = random.Random(seed)
+    family_info_data = [
+        {
+            'id': f'member-{i}',
+            'name': f'Member {i}',
+            'date_of_birth': f'{now.year - rng.randint(20, 75)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+            'retirement_age': rng.randint(50, 80),
+            'life_expectancy': rng.randint(80, 100),
+        }
+        for i in range(rng.randint(1, 3))
+    ]
+
+    def age_bands(make_band):
+        bands = []
+        for _ in range(rng.randint(0, 3)):
+            from_age = rng.randint(18, 95)
+            bands.append({'from_age': from_age, 'to_age': rng.randint(from_age, 100), **make_band()})
+        return bands
+
+    retirement_fund_data = []
+    for i in range(rng.randint(1, 5)):
+        start_year = now.year - rng.randint(0, 15)
+        actual_data = [
+            {
+                'year': rng.randint(start_year - 2, now.year + 3),
+                'actual_balance': round(rng.uniform(0, 500000), 2),
+                'actual_contributions': round(rng.uniform(0, 20000), 2),
+                'actual_growth': round(rng.uniform(-20000, 50000), 2),
+            }
+            for _ in range(rng.randint(0, 12))
+        ]
+        retirement_fund_data.append({
+            'id': f'fund-{i}',
+            'name': f'Fund {i}',
+            'family_member_id': rng.choice(family_info_data)['id'] if rng.random() > 0.05 else 'unknown-member',
+            'initial_investment': rng.randint(0, 300000),
+            'regular_contribution': rng.randint(0, 3000),
+            'contribution_frequency': rng.choice((1, 12, 26, 52, 365)),
+            'start_date': f'{start_year}-01-01' if rng.random() > 0.3 else None,
+            'return_rate_params': age_bands(lambda: {'return_rate': round(rng.uniform(-5, 12), 2)}),
+            'contribution_params': age_bands(lambda: {
+                'contribution_amount': round(rng.uniform(0, 3000), 2),
+                'contribution_frequency': rng.choice((1, 12, 26, 52)),
+            }),
+            'actual_data': actual_data,
+        })
+
+    return {'retirement_fund_data': retirement_fund_data}, {'family_info_data': family_info_data}
+
+def project(retirement_fund_info, family_info, engine, result_format=None):
+    retirement_fund_info = copy.deepcopy(retirement_fund_info)
+    kwargs = {'result_format': result_format} if result_format else {}
+    calculate_retirement_projection(retirement_fund_info, family_info, engine=engine, **kwargs)
+    return [fund['retirement_projection'] for fund in retirement_fund_info['retirement_fund_data']]
+
+@pytest.mark.parametrize('seed', range(NUM_HOUSEHOLDS))
+def test_vectorized_engine_matches_reference(seed):
+    retirement_fund_info, family_info = make_random_household(seed, datetime.now())
+
+    vectorized = project(retirement_fund_info, family_info, ENGINE_VECTORIZED)
+    columns = project(retirement_fund_info, family_info, ENGINE_VECTORIZED, RESULT_COLUMNS)
+    reference = project(retirement_fund_info, family_info, ENGINE_REFERENCE)
+
+    assert len(vectorized) == len(reference)
+    for fund_rows, fund_columns, reference_rows in zip(vectorized, columns, reference):
+        assert len(fund_rows) == len(reference_rows)
+        for offset, (row, reference_row) in enumerate(zip(fund_rows, reference_rows)):
+            assert row.keys() == reference_row.keys()
+            # Rows match exactly, except an amount within VECTORIZED_RELATIVE_ERROR of a
+            # half-cent boundary, which may round to the neighbouring cent
+            max_error = VECTORIZED_RELATIVE_ERROR * (1 + sum(abs(reference_row[key]) for key in AMOUNT_FIELDS))
+            for key in AMOUNT_FIELDS:
+                unrounded = float(getattr(fund_columns, key)[offset])
+                assert abs(unrounded - reference_row[key]) <= 0.005 + max_error, (key, unrounded, reference_row)
+            for key, value in reference_row.items():
+                if row[key] == value:
+                    continue
+                assert key in AMOUNT_FIELDS, (key, reference_row)
+                unrounded = float(getattr(fund_columns, key)[offset])
+                assert abs(round(row[key] * 100) - round(value * 100)) == 1, (key, reference_row)
+                assert abs(abs(unrounded - value) - 0.005) <= max_error, (key, unrounded, reference_row)
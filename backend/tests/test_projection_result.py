@@ -0,0 +1,75 @@
+# Columnar FundProjection against the original rows
+import json
+from datetime import datetime
+
+import pytest
+
+from services.projection_result import FundProjection, PROJECTION_FIELDS, RESULT_COLUMNS, projection_json_default
+from services.retirement_calculator import calculate_retirement_projection
+from utils.response import json_response
+
+NOW = datetime.now()
+
+def make_retirement_data():
+    family_info_data = [{'id': 'member-1', 'date_of_birth': f'{NOW.year - 45}-02-01', 'retirement_age': 60}]
+    retirement_fund_data = [
+        {
+            'id': 'fund-1', 'family_member_id': 'member-1', 'initial_investment': 12345.678,
+            'regular_contribution': 333.33, 'contribution_frequency': 26, 'start_date': f'{NOW.year - 3}-01-01',
+            'return_rate_params': [{'from_age': 18, 'to_age': 55, 'return_rate': 6.5}],
+            'contribution_params': [],
+            'actual_data': [{'year': NOW.year - 1, 'actual_balance': 20000.123, 'actual_contributions': 8000, 'actual_growth': 900}],
+        },
+        {
+            'id': 'orphan', 'family_member_id': 'member-9', 'initial_investment': 1, 'regular_contribution': 1,
+            'contribution_frequency': 12, 'start_date': None, 'return_rate_params': [], 'contribution_params': [], 'actual_data': [],
+        },
+    ]
+    return {'retirement_fund_data': retirement_fund_data, 'family_info_data': family_info_data}
+
+def projected(result_format=None):
+    retirement_data = make_retirement_data()
+    kwargs = {'result_format': result_format} if result_format else {}
+    calculate_retirement_projection(retirement_data, retirement_data, **kwargs)
+    return [fund['retirement_projection'] for fund in retirement_data['retirement_fund_data']]
+
+def test_columns_hold_the_same_projection_as_rows():
+    rows, orphan_rows = projected()
+    columns, orphan_columns = projected(RESULT_COLUMNS)
+    assert isinstance(columns, FundProjection)
+    assert len(columns) == len(rows)
+    assert columns.to_rows() == rows
+    assert orphan_columns.to_rows() == orphan_rows == []
+
+def test_columnar_shape_round_trips():
+    columns, _ = projected(RESULT_COLUMNS)
+    shape = columns.to_columns()
+    assert list(shape) == list(PROJECTION_FIELDS)
+    assert all(isinstance(values, list) and len(values) == len(columns) for values in shape.values())
+    assert shape['begin_amount'] == [round(value, 2) for value in shape['begin_amount']]
+    assert FundProjection.from_columns(shape).to_columns() == shape
+
+def test_slots_only():
+    columns, _ = projected(RESULT_COLUMNS)
+    assert not hasattr(columns, '__dict__')
+    with pytest.raises(AttributeError):
+        columns.extra = []
+
+def test_serialized_as_columns():
+    columns, _ = projected(RESULT_COLUMNS)
+    response = json_response(200, {'retirement_projection': columns}, default=projection_json_default)
+    assert json.loads(response['body'])['retirement_projection'] == columns.to_columns()
+
+def test_handler_format_option(sqlite_storage, load_handler):
+    retirement_data = make_retirement_data()
+    sqlite_storage.update_family_info('user-1', retirement_data['family_info_data'])
+    sqlite_storage.update_retirement_fund_data('user-1', retirement_data['retirement_fund_data'])
+    handler = load_handler('get-retirement-data')
+
+    def get(query):
+        return handler.lambda_handler({'pathParameters': {'user_id': 'user-1'}, 'queryStringParameters': query, 'headers': {}}, None)
+
+    rows = json.loads(get(None)['body'])['retirement_fund_data'][0]['retirement_projection']
+    columns = json.loads(get({'format': 'columns'})['body'])['retirement_fund_data'][0]['retirement_projection']
+    assert FundProjection.from_columns(columns).to_rows() == rows
+    assert get({'format': 'csv'})['statusCode'] == 400
@@ -0,0 +1,31 @@
+# Response helpers: JSON body format, conditional GETs and compression
+import json
+from decimal import Decimal
+
+import pytest
+
+from utils.response import json_dumps, json_response, matching_etag, not_modified_response
+
+def test_decimals_are_written_as_strings():
+    # The format the handlers' json.dumps(default=str) sent before the fast JSON helpers
+    data = {'initial_investment': Decimal('10000.5'), 'contribution_frequency': Decimal('12'), 'return_rate': 6.5}
+    assert json.loads(json_dumps(data)) == json.loads(json.dumps(data, default=str))
+    assert json.loads(json_response(200, data)['body']) == {'initial_investment': '10000.5', 'contribution_frequency': '12', 'return_rate': 6.5}
+
+ETAG = '"0123456789abcdef"'
+
+@pytest.mark.parametrize('if_none_match, expected', [
+    ('"0123456789abcdef"', '"0123456789abcdef"'),
+    ('"0123456789abcdef-gzip"', '"0123456789abcdef-gzip"'),
+    ('W/"0123456789abcdef-br"', '"0123456789abcdef-br"'),
+    ('"other", "0123456789abcdef-gzip"', '"0123456789abcdef-gzip"'),
+    ('*', '"0123456789abcdef"'),
+    ('"0123456789abcdef-deflate"', None),
+    ('"other-gzip"', None),
+    (None, None),
+])
+def test_304_carries_the_variant_the_client_holds(if_none_match, expected):
+    event = {'headers': {'If-None-Match': if_none_match} if if_none_match else {}}
+    assert matching_etag(event, ETAG) == expected
+    if expected:
+        assert not_modified_response(expected)['headers']['ETag'] == expected
@@ -0,0 +1,30 @@
+# RetirementFundData validation of the age bands
+import pytest
+
+from models.retirement_fund_data import RetirementFundData
+
+def validate_fund(**fields):
+    fund = {'name': 'RRSP', 'family_member_id': 'member-1', 'initial_investment': 0,
+            'regular_contribution': 100, 'contribution_frequency': 12, **fields}
+    return RetirementFundData({'retirement_fund_data': [fund]}).validate()
+
+def contribution_band(from_age, to_age, amount=100, frequency=12):
+    return {'from_age': from_age, 'to_age': to_age, 'contribution_amount': amount, 'contribution_frequency': frequency}
+
+@pytest.mark.parametrize('contribution_params, error', [
+    ([contribution_band(30, 40)], None),
+    ([contribution_band(30, 40, frequency=0)], "Contribution band frequency must be greater than 0"),
+    ([contribution_band(30, 40, amount=-1)], "Contribution band amount must be non-negative"),
+    # The first band wins where bands overlap, so a band it shadows entirely is never used
+    ([contribution_band(30, 40), contribution_band(32, 38, frequency=0)], None),
+    ([contribution_band(30, 40), contribution_band(32, 41, frequency=0)], "Contribution band frequency must be greater than 0"),
+    ([contribution_band(40, 30)], "Contribution band 1: from_age must not be greater than to_age"),
+    ([contribution_band(30, 151)], "Contribution band 1: ages must be between 0 and 150"),
+])
+def test_contribution_bands(contribution_params, error):
+    assert validate_fund(contribution_params=contribution_params) == (error is None, error or "")
+
+def test_return_rate_bands():
+    assert validate_fund(return_rate_params=[{'from_age': 30, 'to_age': 65, 'return_rate': 6}]) == (True, "")
+    assert validate_fund(return_rate_params=[{'from_age': 70, 'to_age': 65, 'return_rate': 6}]) == (
+        False, "Return rate band 1: from_age must not be greater than to_age")
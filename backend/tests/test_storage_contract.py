@@ -0,0 +1,99 @@
+# StorageBackend contract, run against every DynamoDB layout and codec and against SQLite
+import pytest
+
+from db import dynamodb, storage as db_storage
+from db.sqlite import SQLiteStorage
+from db.storage import FundVersionConflictError, MATERIALIZED_PROJECTION_KEY, StorageBackend
+
+FAMILY_INFO_DATA = [
+    {'id': 'member-1', 'name': 'Alex', 'date_of_birth': '1980-04-01', 'retirement_age': 65},
+    {'id': 'member-2', 'name': 'Sam', 'date_of_birth': '1982-09-15', 'retirement_age': 63},
+]
+
+def make_fund(fund_id, regular_contribution=500, **fields):
+    return {
+        'id': fund_id, 'name': f'Fund {fund_id}', 'family_member_id': 'member-1', 'initial_investment': 10000,
+        'regular_contribution': regular_contribution, 'contribution_frequency': 12, 'start_date': None,
+        'return_rate_params': [{'from_age': 18, 'to_age': 60, 'return_rate': 6.5}],
+        'contribution_params': [], 'actual_data': [], **fields,
+    }
+
+ACTUAL_DATA = [
+    {'year': 2021, 'actual_balance': 12000.5, 'actual_contributions': 6000, 'actual_growth': 250.25},
+    {'year': 2022, 'actual_balance': 19000.75, 'actual_contributions': 6000, 'actual_growth': 1000.25},
+]
+
+@pytest.fixture(params=['document', 'document-native', 'items', 'items-native', 'sqlite', 'sqlite-file'])
+def storage(request, dynamodb_storage, tmp_path):
+    if request.param.startswith('sqlite'):
+        storage = SQLiteStorage(str(tmp_path / 'retirement.sqlite3') if request.param == 'sqlite-file' else ':memory:')
+        storage.create_tables_if_not_exist()
+        return storage
+    layout, _, codec = request.param.partition('-')
+    return dynamodb_storage(layout, codec or dynamodb.CODEC_DECIMAL)
+
+def without_versions(funds):
+    return [{k: v for k, v in fund.items() if k != 'version'} for fund in funds]
+
+def test_is_a_storage_backend(storage):
+    assert isinstance(storage, StorageBackend)
+
+def test_unknown_user(storage):
+    assert storage.get_retirement_data('nobody') is None
+    assert storage.get_retirement_fund_data('nobody') is None
+    assert storage.get_family_info('nobody') is None
+    assert not storage.update_single_fund('nobody', 'fund-1', {'regular_contribution': 1})
+    # A projection alone doesn't make a user with data
+    assert storage.put_materialized_projection('nobody', {'body': None})
+    assert storage.get_retirement_data('nobody') is None
+    assert list(storage.iter_user_ids()) == []
+
+def test_users(storage):
+    assert storage.create_user_if_not_exists('user-1', 'one@example.com')
+    assert storage.create_user_if_not_exists('user-1', 'one@example.com')
+    assert storage.get_user_id('one@example.com') == 'user-1'
+    assert storage.get_user_id('two@example.com') is None
+
+def test_retirement_data_round_trips(storage):
+    funds = [make_fund('fund-2', actual_data=ACTUAL_DATA), make_fund('fund-1', family_member_id='member-2')]
+    assert storage.update_family_info('user-1', FAMILY_INFO_DATA)
+    assert storage.update_retirement_fund_data('user-1', funds)
+
+    document = storage.get_retirement_data('user-1')
+    assert document['family_info_data'] == FAMILY_INFO_DATA
+    assert without_versions(document['retirement_fund_data']) == funds
+    assert without_versions(storage.get_retirement_fund_data('user-1')) == funds
+    assert storage.get_family_info('user-1') == FAMILY_INFO_DATA
+    assert list(storage.iter_user_ids()) == ['user-1']
+
+    # A fund left out of the list is deleted, with its actual data
+    assert storage.update_retirement_fund_data('user-1', funds[1:])
+    assert without_versions(storage.get_retirement_fund_data('user-1')) == funds[1:]
+
+def test_single_fund_patch(storage):
+    storage.update_retirement_fund_data('user-1', [make_fund('fund-1'), make_fund('fund-2')])
+    assert storage.update_single_fund('user-1', 'fund-2', {'regular_contribution': 650, 'actual_data': ACTUAL_DATA}, expected_version=1)
+    with pytest.raises(FundVersionConflictError):
+        storage.update_single_fund('user-1', 'fund-2', {'regular_contribution': 700}, expected_version=1)
+    assert not storage.update_single_fund('user-1', 'fund-3', {'regular_contribution': 700})
+
+    funds = storage.get_retirement_fund_data('user-1')
+    assert [int(fund['version']) for fund in funds] == [1, 2]
+    assert without_versions(funds) == [make_fund('fund-1'), make_fund('fund-2', 650, actual_data=ACTUAL_DATA)]
+
+def test_materialized_projection(storage):
+    storage.update_family_info('user-1', FAMILY_INFO_DATA)
+    materialized = {'source_version': 'abc', 'valid_until': '2030-01-01', 'materialized_at': '2026-01-01T00:00:00', 'body': '{}'}
+    assert storage.put_materialized_projection('user-1', materialized)
+    assert storage.get_retirement_data('user-1')[MATERIALIZED_PROJECTION_KEY] == materialized
+    # Not part of the fund or family reads
+    assert storage.get_family_info('user-1') == FAMILY_INFO_DATA
+
+def test_db_functions_use_the_installed_backend(storage):
+    db_storage.db_set_storage(storage)
+    try:
+        assert db_storage.db_update_family_info('user-1', FAMILY_INFO_DATA)
+        assert storage.get_family_info('user-1') == FAMILY_INFO_DATA
+        assert db_storage.db_get_retirement_data('user-1') == storage.get_retirement_data('user-1')
+    finally:
+        db_storage.db_set_storage(None)
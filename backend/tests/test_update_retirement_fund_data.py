@@ -0,0 +1,30 @@
+# Single fund updates through the update-retirement-fund-data handler
+import json
+
+import pytest
+
+@pytest.fixture
+def update_fund(sqlite_storage, load_handler):
+    sqlite_storage.update_retirement_fund_data('user-1', [{
+        'id': 'fund-1', 'name': 'Fund', 'family_member_id': 'member-1', 'initial_investment': 1000,
+        'regular_contribution': 100, 'contribution_frequency': 12, 'return_rate_params': [],
+        'contribution_params': [], 'actual_data': [],
+    }])
+    handler = load_handler('update-retirement-fund-data')
+
+    def update(body, fund_id='fund-1'):
+        return handler.lambda_handler({'pathParameters': {'user_id': 'user-1', 'fund_id': fund_id}, 'body': body, 'headers': {}}, None)
+    return update
+
+@pytest.mark.parametrize('body', ['[{"regular_contribution": 600}]', '600', '"600"', 'null', '{"regular', None])
+def test_body_must_be_a_json_object(update_fund, sqlite_storage, body):
+    assert update_fund(body)['statusCode'] == 400
+    [fund] = sqlite_storage.get_retirement_fund_data('user-1')
+    assert fund['regular_contribution'] == 100
+
+def test_fund_is_patched(update_fund, sqlite_storage):
+    assert update_fund(json.dumps({'regular_contribution': 600, 'version': 1}))['statusCode'] == 200
+    assert update_fund(json.dumps({'regular_contribution': 700, 'version': 1}))['statusCode'] == 409
+    assert update_fund(json.dumps({'regular_contribution': 700}), fund_id='fund-2')['statusCode'] == 404
+    [fund] = sqlite_storage.get_retirement_fund_data('user-1')
+    assert (fund['regular_contribution'], fund['version']) == (600, 2)